@@ -1,92 +1,188 @@
 import os
-import requests
-import xml.etree.ElementTree as ET
+import json
+import time
+import random
+import asyncio
+import hashlib
 from datetime import datetime
+from itertools import zip_longest
 from dotenv import load_dotenv
+from services.kdca_aggregator import KdcaAggregator
 
 # Load env to ensure we can access keys inside the service if needed
 load_dotenv()
 
 class KdcaService:
+    """
+    KDCA alerts for the HealthLab widget, served from memory.
+    - run() refreshes in the background every KDCA_REFRESH_SECONDS (± KDCA_REFRESH_JITTER, so
+      several workers don't hit data.go.kr together); a failed refresh keeps the last payload
+      and retries after KDCA_RETRY_SECONDS; it and get() share one in-flight refresh, and a
+      payload that is still fresh is not re-fetched
+    - every good payload is written to an on-disk snapshot, so a restart serves the last data at once
+    - get() never waits on the portal: a stale payload is returned while a refresh runs (stale-while-revalidate)
+    """
+
     def __init__(self):
         # Service Key for Public Data Portal (data.go.kr)
         self.api_key = os.getenv("KDCA_API_KEY")
-        self.base_url = "http://apis.data.go.kr/1352000/ODMS_COVID_04" # Standard COVID/Infectious Disease Endpoint Base
+        self.aggregator = KdcaAggregator(self.api_key)  # Feeds under KDCA_BASE_URL
+        self.max_alerts = int(os.getenv("KDCA_MAX_ALERTS", "10"))
+        self.max_news = 5
+
+        self.refresh_interval = float(os.getenv("KDCA_REFRESH_SECONDS", "3600"))
+        self.jitter = float(os.getenv("KDCA_REFRESH_JITTER", "0.1"))
+        self.retry_after = float(os.getenv("KDCA_RETRY_SECONDS", "300"))
+        self.snapshot_file = os.getenv("KDCA_SNAPSHOT_PATH") or os.path.join(os.path.dirname(__file__), 'data/kdca_snapshot.json')
+
+        self.payload = None
+        self.etag = None
+        self.updated_at = 0.0  # Wall-clock time of the payload (survives restarts through the snapshot)
+        self._refreshing = None
+        self.retry_at = 0.0  # After a failed refresh, get() waits this long before trying again
+
+        self.refreshes = 0
+        self.failures = 0
+        self.served = 0
+        self.not_modified = 0
+
+        if not self._load_snapshot():
+            self._set_payload(self._build_payload(None), time.time() - self.refresh_interval)  # Mock now, refresh soon
+
+    def _set_payload(self, payload, updated_at):
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        self.payload = payload
+        self.etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+        self.updated_at = updated_at
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self._set_payload(snapshot['payload'], snapshot['updated_at'])
+            print(f"[KDCA] Loaded snapshot from {datetime.fromtimestamp(self.updated_at):%Y-%m-%d %H:%M}")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"[KDCA] Snapshot load failed: {e}")
+            return False
+
+    def _write_snapshot(self):
+        tmp_file = self.snapshot_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"updated_at": self.updated_at, "payload": self.payload}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.snapshot_file)
+
+    def is_stale(self):
+        return time.time() - self.updated_at >= self.refresh_interval
+
+    def get(self):
+        """(payload, etag) from memory; a stale payload also starts a background refresh."""
+        if self.is_stale() and self._refreshing is None and time.time() >= self.retry_at:
+            try:
+                self._start_refresh()
+            except RuntimeError:
+                pass  # No running loop (sync caller): run() will refresh
+        self.served += 1
+        return self.payload, self.etag
+
+    def _start_refresh(self):
+        """The in-flight refresh, started when none is running: the portal sees one fetch at a time."""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self.refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        return self._refreshing
+
+    def _refresh_done(self, task):
+        self._refreshing = None
+
+    async def refresh(self):
+        self.refreshes += 1
+        try:
+            real_alerts = await self._fetch_real_alerts() if self.api_key else None
+        except Exception as e:
+            print(f"KDCA API Error: {e}")
+            real_alerts = None
+        if self.api_key and not real_alerts:
+            self.failures += 1
+            self.retry_at = time.time() + self.retry_after
+            if self.payload and self.payload.get("source") == "kdca":
+                return False  # Keep serving the last real data
 
-    def get_health_data(self):
+        # Mock data after a failure is stale again at retry_at, so the next attempt isn't an hour away
+        updated_at = time.time() if real_alerts or not self.api_key else self.retry_at - self.refresh_interval
+        self._set_payload(self._build_payload(real_alerts), updated_at)
+        try:
+            await asyncio.to_thread(self._write_snapshot)
+        except Exception as e:
+            print(f"[KDCA] Snapshot write failed: {e}")
+        return bool(real_alerts) or not self.api_key
+
+    def _next_delay(self, ok):
+        base = self.refresh_interval if ok else self.retry_after
+        return base * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def run(self):
+        """Background refresher (started from the FastAPI lifespan)."""
+        while True:
+            if self.is_stale():
+                # Joins a refresh a request already started rather than fetching twice
+                ok = await self._start_refresh()
+                delay = self._next_delay(ok)
+            else:
+                # Fresh: a snapshot from the last run, or a request-triggered refresh got there first
+                remaining = self.updated_at + self.refresh_interval - time.time()
+                delay = remaining * (1 + random.uniform(0, self.jitter))
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "source": self.payload.get("source") if self.payload else None,
+            "age_seconds": round(time.time() - self.updated_at),
+            "stale": self.is_stale(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "served": self.served,
+            "not_modified": self.not_modified,
+            "feeds": self.aggregator.feed_stats,
+        }
+
+    def _build_payload(self, real_alerts):
         """
-        Aggregates data from real KDCA API if key is present, otherwise returns mock.
+        Aggregates data from real KDCA API if available, otherwise returns mock.
         """
-        if self.api_key:
-            try:
-                real_alerts = self._fetch_real_alerts()
-                if real_alerts:
-                    return {
-                        "alerts": real_alerts,
-                        "news": self._get_mock_news(), # Keeping mock news for now as no specific API was found for news
-                        "summary": self._generate_briefing(real_alerts)
-                    }
-            except Exception as e:
-                print(f"KDCA API Error: {e}")
-                # Fallback to mock on error
+        if real_alerts:
+            # Newest row of every feed first, so one busy feed doesn't fill the widget
+            by_feed = {}
+            for row in real_alerts:
+                if row['kind'] != "notice":
+                    by_feed.setdefault(row['feed'], []).append(row)
+            alerts = [row for rows in zip_longest(*by_feed.values()) for row in rows if row][:self.max_alerts]
+            news = [
+                {"id": row['id'], "title": row['message'], "source": "질병관리청", "date": row['date'], "url": row['url'] or "#"}
+                for row in real_alerts if row['kind'] == "notice"
+            ][:self.max_news]
+            return {
+                "source": "kdca",
+                "alerts": alerts or self._get_mock_alerts(),
+                "news": news or self._get_mock_news(),
+                "summary": self._generate_briefing(alerts or real_alerts)
+            }
         
         return {
+            "source": "mock",
             "alerts": self._get_mock_alerts(),
             "news": self._get_mock_news(),
             "summary": "현재 KDCA 데이터 연동 상태를 확인 중입니다. (Mock Data 제공됨)"
         }
 
-    def _fetch_real_alerts(self):
+    async def _fetch_real_alerts(self):
         """
-        Fetches real-time infectious disease data from KDCA/Open Data Portal.
-        Currently targeting COVID-19/Flu trends.
+        Fetches the infectious disease and notice feeds from KDCA/Open Data Portal
+        (see services/kdca_aggregator) as one normalized table, newest first.
         """
-        # Example Endpoint: Covid-19 Infection Status
-        # Note: Depending on the specific 'Infectious Disease' service, the URL differs.
-        # We use a generic 'Infectious Disease' structure here.
-        
-        # NOTE: Since the exact endpoint might vary, we implement a robust catch.
-        # Ideally, we call: http://apis.data.go.kr/1352000/ODMS_COVID_04/callCovid04Api
-        # params: serviceKey=..., pageNo=1, numOfRows=10, apiType=JSON
-        
-        params = {
-            "serviceKey": self.api_key,
-            "pageNo": "1",
-            "numOfRows": "5",
-            "apiType": "JSON"  # Attempt JSON first
-        }
-        
-        # Using a reliable endpoint for testing (Covid Inf State)
-        url = f"{self.base_url}/callCovid04Api" 
-        
-        try:
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            items = data.get("response", {}).get("body", {}).get("items", [])
-            
-            # Transform to our alert format
-            alerts = []
-            for item in items:
-                alerts.append({
-                    "id": item.get("seq", 0),
-                    "disease": "코로나19 (COVID-19)",
-                    "level": "발생",
-                    "level_color": "red" if int(item.get("incDec", 0) or 0) > 1000 else "orange",
-                    "date": item.get("stateDt", datetime.now().strftime("%Y-%m-%d")),
-                    "message": f"일일 확진자: {item.get('incDec', '0')}명 / 누적: {item.get('defCnt', '0')}명"
-                })
-            
-            if not alerts:
-                # If JSON empty or structured differently (XML), might fail silently
-                return None
-                
-            return alerts
-            
-        except Exception:
-            # Silent fail to trigger fallback
-            return None
+        return await self.aggregator.fetch_all()
 
     def _get_mock_alerts(self):
         return [
@@ -1,22 +1,32 @@
 import os
+import hmac
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import requests
 from typing import List, Optional
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 import json
 import asyncio
+from contextlib import asynccontextmanager
 from tavily import TavilyClient
 import google.generativeai as genai
-# from kdca_service import KdcaService 
+from kdca_service import KdcaService
 
 # Load environment variables
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # KDCA alerts are refreshed in the background; /api/health-data only reads memory
+    kdca_task = asyncio.create_task(kdca_service.run())
+    yield
+    kdca_task.cancel()
+    # Close pooled provider connections
+    await http_clients.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -28,6 +38,17 @@ app.add_middleware(
 )
 
 from services.search_manager import SearchManager
+from services.intents import classify
+from services.http_client import http_clients
+from services.medical_facts import MedicalFacts
+from services.local_retriever import LocalRetriever
+from services.speculative import SpeculationPolicy
+from services.gemini_stream import GeminiStreamer
+from services.prompt_cache import PromptCache
+from services.history_cache import HistoryCache
+from services.context_packer import ContextPacker
+from services.suggest_service import SuggestService
+from services.typeahead import TypeaheadIndex
 
 from supabase import create_client, Client
 
@@ -48,18 +69,43 @@ if supabase_url and supabase_key:
         print(f"Supabase Init Failed: {e}")
 
 # Initialize Services
-# kdca_service = KdcaService()
+kdca_service = KdcaService()
 search_manager = SearchManager()
+progressive_default = os.getenv("PROGRESSIVE_SOURCES", "false").lower() == "true"
+medical_facts = MedicalFacts()
+# Tier 0.5: BM25 over the curated facts (and stored KB answers with RAG_INCLUDE_KB), answered in-process
+local_retriever = LocalRetriever(medical_facts, search_manager.knowledge_base)
+speculation = SpeculationPolicy()
+context_packer = ContextPacker()
+suggest_service = SuggestService()
+
+# Local typeahead over the curated corpus; KB entries learned later are added as they sync
+typeahead = TypeaheadIndex()
+typeahead.add_many(entry['query'] for entry in search_manager.knowledge_base.data)
+for fact in medical_facts.entries:
+    typeahead.add_many(fact.get('keywords', []), weight=2)
+search_manager.knowledge_base.on_new_entries.append(lambda entries: typeahead.add_many(e['query'] for e in entries))
+print(f"[Typeahead] Indexed {len(typeahead)} terms")
+
+# GEMINI_BASE_URL points the SDK at another endpoint (e.g. the load-test stand-in) over REST
+gemini_base_url = os.getenv("GEMINI_BASE_URL")
 
 if gemini_api_key:
-    genai.configure(api_key=gemini_api_key)
+    if gemini_base_url:
+        genai.configure(api_key=gemini_api_key, transport="rest", client_options={"api_endpoint": gemini_base_url})
+    else:
+        genai.configure(api_key=gemini_api_key)
     model = genai.GenerativeModel('gemini-2.0-flash')
 else:
     model = None
 
+# Async token streaming (GEMINI_STREAM_MODE=async|thread)
+gemini = GeminiStreamer(model)
+if gemini_base_url:
+    gemini.mode = "thread"  # The SDK's REST transport has no async streaming
+
 # --- Helper: Fetch System Prompt Dynamic ---
-def fetch_system_prompt():
-    default_prompt = """
+DEFAULT_SYSTEM_PROMPT = """
 당신은 '우리집 AI 안심씨(Ansimssi)'입니다. 
 당신은 단순한 AI가 아니라, 24시간 가족의 건강과 안전을 생각하고 지켜주는 **'주치의 겸 돌봄이'**입니다.
 사용자가 당신을 "안심", "안씨" 등으로 부르더라도, 당신은 정중하고 따뜻하게 자신을 "안심씨"라고 소개하며 가족을 돌보는 역할을 강조해야 합니다.
@@ -84,19 +130,21 @@ def fetch_system_prompt():
 *   의학적 진단은 내리지 말고, 정보 제공 차원에서 답변하며 전문가 상담을 권유하세요.
 *   Markdown 형식을 사용하여 가독성 있게 답변하세요.
 """ # Updated Persona Definition
-    
+
+def fetch_system_prompt():
+    """
+    Reads the admin-edited prompt row: (content, updated_at), or None when none is stored.
+    Called through system_prompt_cache, never per request.
+    """
     if not supabase:
-        return default_prompt
+        return None
+    response = supabase.table('prompt_config').select('content, updated_at').eq('key', 'main_system_prompt').execute()
+    if response.data and response.data[0].get('content'):
+        return response.data[0]['content'], response.data[0].get('updated_at')
+    return None
 
-    try:
-        response = supabase.table('prompt_config').select('content').eq('key', 'main_system_prompt').execute()
-        if response.data and len(response.data) > 0:
-            print("loaded system prompt from DB")
-            return response.data[0]['content']
-    except Exception as e:
-        print(f"DB Prompt Fetch Error: {e}")
-    
-    return default_prompt # Fallback if DB update fails or empty
+# Cached with a version stamp; POST /api/admin/prompt/invalidate reloads it after an edit
+system_prompt_cache = PromptCache(fetch_system_prompt, DEFAULT_SYSTEM_PROMPT)
 
 class Contact(BaseModel):
     name: str
@@ -106,6 +154,8 @@ class SearchRequest(BaseModel):
     query: str
     thread_id: Optional[str] = None
     contacts: Optional[List[Contact]] = []
+    progressive: Optional[bool] = None  # Stream sources as providers answer (default: PROGRESSIVE_SOURCES)
+    speculative: Optional[bool] = None  # Start Gemini before search finishes (default: SPECULATIVE_GENERATION)
 
 class Source(BaseModel):
     title: str
@@ -113,28 +163,166 @@ class Source(BaseModel):
     content: str
 # ... (existing Source model definition if duplicated, but I am replacing the block containing SearchRequest)
 
+def to_frontend_sources(results):
+    return [
+        {"title": r['title'], "url": r.get('url', r.get('link', '#')), "content": r['content']}
+        for r in results[:8] 
+        if 'title' in r and 'content' in r
+    ]
+
+def default_related_questions(query):
+    return [
+        f"{query}에 대해 더 자세히 알려줘",
+        f"{query} 관련 최신 정보는?",
+        "다른 추천 사항이 있나요?"
+    ]
+
+async def replay_cached_answer(query, entry, disclaimer_text):
+    """
+    Streams a stored KB answer in the same NDJSON meta/content/done format as a live answer.
+    """
+    yield json.dumps({
+        "type": "meta",
+        "sources": to_frontend_sources(entry.get('sources', [])),
+        "images": entry.get('images', []),
+        "disclaimer": disclaimer_text,
+        "academic": entry.get('academic', []),
+        "cached": True
+    }) + "\n"
+
+    # Paragraph-sized deltas so the client renders progressively like a live stream
+    for paragraph in entry['answer'].split("\n\n"):
+        yield json.dumps({"type": "content", "delta": paragraph + "\n\n"}) + "\n"
+
+    yield json.dumps({
+        "type": "done",
+        "related_questions": entry.get('related_questions') or default_related_questions(query)
+    }) + "\n"
+
+def fetch_thread_messages(thread_id):
+    """
+    Last 6 messages (3 turns) of the thread from Supabase, oldest first. Read through history_cache.
+    """
+    history_response = supabase.table('messages')\
+        .select('role, content')\
+        .eq('thread_id', thread_id)\
+        .order('created_at', desc=True)\
+        .limit(6)\
+        .execute()
+    # Re-order to chronological
+    return (history_response.data or [])[::-1]
+
+# Per-thread ring buffer of recent messages: Supabase is only read on a miss
+history_cache = HistoryCache(fetch_thread_messages)
+
+async def fetch_thread_history(thread_id, query):
+    """
+    Recent messages of the thread ([{role, content}], oldest first), [] when unavailable.
+    """
+    if not thread_id or not supabase:
+        return []
+    history_msgs = await history_cache.get(thread_id, query)
+    if history_msgs:
+        print(f"📖 Loaded {len(history_msgs)} history messages for context.")
+    return history_msgs or []
+
+async def resolve_system_prompt():
+    system_prompt_content = await system_prompt_cache.get()
+    # Fallback logic handled in fetch_system_prompt or if empty string
+    if "System Prompt" in system_prompt_content and len(system_prompt_content) < 100:
+        return """당신은 24시간 가족의 건강과 안전을 생각하는 주치의 겸 돌봄이, '안심씨'입니다. 사용자가 아프다고 하면 비대면 진료 연결을 제안하고, 건강과 안전을 위한 적극적인 도움을 제공하세요."""
+    return system_prompt_content
+
+def build_prompt(system_prompt, query, context, history):
+    """
+    context / history come from context_packer and appear exactly once, after the instructions.
+    """
+    from datetime import datetime
+    today_date = datetime.now().strftime("%Y-%m-%d")
+
+    prompt = f"""
+    {system_prompt}
+
+    **Current Request**:
+    Query: {query}
+    (The Conversation History and Context for this request follow the instructions below.)
+
+    **STRICT Format Instruction (Gemini Visual Blueprint)**:
+    Use `---` separators between sections.
+
+    **1. The Intro (Summary)**
+    - Start directly with a brief, empathetic summary (1-2 lines).
+    - **IMMEDIATELY FOLLOW with a horizontal rule (`---`).**
+
+    **2. The Body (Main Advice)**
+    - Use **Numbered Headers** (e.g., **1. Header Name**) for main points.
+    - Use beaded bullets inside sections.
+    - Max 5 sections.
+
+    **3. The Caution (⚠️)**
+    - IF AND ONLY IF medical/safety context:
+    - **Title**: "⚠️ 이럴 때는 반드시 전문가와 상담하세요" (Exact string, NO Markdown)
+    - List critical warning signs.
+    - If not medical/safety, OMIT this entire section.
+
+    **4. The Closing (Interactive)**
+    - A specific, empathetic question to continue the dialogue.
+    - Example: "지금 어떤 증상이 가장 심하신가요?"
+
+    **Output Logic**:
+    [Summary]
+    
+    ---
+    
+    [Numbered Body 1...5]
+    
+    [Caution if applicable]
+    [Closing Question]
+
+    **Tone & Style (Gemini's Smart Sibling)**:
+    - **Voice**: Professional but friendly ('해요' style). Avoid stiff '다/까' endings unless defining terms. Use '대신', '하지만' for smooth flow.
+    - **Closing Phrases**: ALWAYS end with one of these patterns:
+      - "...알려드릴 수 있습니다."
+      - "...연결해드릴까요?"
+      - "...도와드릴까요?"
+    - **Professional & Deep**: Synthesize logic/cause-effect. Use specific numbers/stats.
+    - **Zero Fluff**: Start immediately. No "Here is the answer".
+
+    **Safety & Medical**:
+    - If medical/safety context, use the "3. The Caution" section strictly.
+    - **Never** say "I am not a doctor" repetitively in the body. Use the disclaimer section.
+    
+    **Handling Follow-ups**:
+    - If the query is "buy link" or similar short follow-up, USE THE HISTORY to understand what product is being discussed.
+
+    OUTPUT FORMAT: Raw Markdown text only.
+    """
+
+    # [CONTEXT GUARD] Ensure Gemini 'sees' the history clearly
+    history_block = f"**Conversation History (Previous Context)**:\n{history}\n\n" if history else ""
+    return f"{prompt}\n\n[SYSTEM NOTE: Today is {today_date}.]\n\n{history_block}Context:\n{context}\n\nQuery: {query}"
+
 # ...
 
 @app.post("/api/search")
 async def search_endpoint(request: SearchRequest):
     async def event_generator():
+        academic_task = None
         try:
             # 1. 5-Tier Hybrid Search (Async)
             from datetime import datetime
             today_str = datetime.now().strftime("%Y-%m-%d")
             search_query = request.query
-            if any(w in request.query for w in ["오늘", "날씨", "뉴스", "today", "weather", "news"]):
+            # One automaton pass classifies the query for every stage below (TTL, disclaimer, deep links, fallbacks)
+            intents = classify(request.query)
+            is_time_sensitive = "time_sensitive" in intents
+            typeahead.record(request.query)
+            if is_time_sensitive:
                 search_query = f"{search_query} {today_str}"
-                
-            results, images, source_engine = await search_manager.search(search_query, contacts=request.contacts)
-            academic_papers = search_manager.search_academic(search_query)
 
             # [PERSONA LOGIC] Dynamic Disclaimer Detection
-            medical_keywords = ["약", "질병", "치료", "증상", "복용", "수술", "병원", "진료", "부작용", "효능", "통증", "혈압", "당뇨", "건강", "검진", "예방", "섭취", "영양제"]
-            has_medical_intent = any(k in request.query for k in medical_keywords)
-
-            legal_keywords = ["층간소음", "분쟁", "규약", "법률", "법적", "책임", "손해배상", "고소", "판례", "변호사", "소송", "합의", "민사", "형사", "위자료"]
-            has_legal_intent = any(k in request.query for k in legal_keywords)
+            has_medical_intent = "medical" in intents
+            has_legal_intent = "legal" in intents
             
             disclaimer_text = ""
             if has_medical_intent:
@@ -142,139 +330,194 @@ async def search_endpoint(request: SearchRequest):
             elif has_legal_intent:
                 disclaimer_text = "참고용으로만 사용하시기 바랍니다. 법률적인 자문이나 도움이 필요한 경우 전문가에게 문의하세요."
 
-            # Map sources for Frontend
-            frontend_sources = [
-                {"title": r['title'], "url": r.get('url', r.get('link', '#')), "content": r['content']}
-                for r in results[:8] 
-                if 'title' in r and 'content' in r
-            ]
-
-            # [STREAM START] Yield Metadata Event
-            yield json.dumps({
-                "type": "meta",
-                "sources": frontend_sources,
-                "images": images, 
-                "disclaimer": disclaimer_text, 
-                "academic": academic_papers
-            }) + "\n"
-
-            # Format context
-            search_context = "\n\n".join([f"Source '{r['title']}': {r['content']}" for r in results[:12]])
-            full_context = f"{rag_context}\n\n=== WEB SEARCH RESULTS (Source: {source_engine}) ===\n{search_context}" if 'rag_context' in locals() else f"=== WEB SEARCH RESULTS (Source: {source_engine}) ===\n{search_context}"
-
-            # 1.5 Fetch Thread History (Context Injection)
-            chat_history_text = ""
-            if request.thread_id and supabase:
+            # 0. Tier 0: Replay a stored answer for a near-duplicate question (no search, no Gemini)
+            if not is_time_sensitive:
+                cached = await search_manager.lookup_cached_answer(request.query)
+                if cached:
+                    async for event in replay_cached_answer(request.query, cached, disclaimer_text):
+                        yield event
+                    if request.thread_id:
+                        history_cache.record_turn(request.thread_id, request.query, cached['answer'])
+                    return
+
+            # Academic / government / hospital sources run beside the web fan-out (own deadline + cache)
+            academic_task = asyncio.ensure_future(search_manager.search_academic(search_query))
+            academic_papers = None  # None until the academic stage has been sent to the client
+
+            def take_academic():
+                nonlocal academic_papers
+                if academic_papers is None and academic_task.done():
+                    academic_papers = academic_task.result()
+                    if academic_papers:
+                        return json.dumps({"type": "academic", "academic": academic_papers}) + "\n"
+                return None
+
+            def meta_event():
+                nonlocal academic_papers
+                if academic_task.done() and academic_papers is None:
+                    academic_papers = academic_task.result()  # Ready in time: goes out with meta
+                return json.dumps({
+                    "type": "meta",
+                    "sources": frontend_sources,
+                    "images": images, 
+                    "disclaimer": disclaimer_text, 
+                    "academic": academic_papers or []
+                }) + "\n"
+
+            def sources_event(payload):
+                return json.dumps({
+                    "type": "sources",
+                    "engine": payload['engine'],
+                    "sources": to_frontend_sources(payload['results']),
+                    "images": payload['images']
+                }) + "\n"
+
+            # Trusted local facts are available before any provider answers
+            rag_context = local_retriever.context_for(request.query)
+
+            progressive = progressive_default if request.progressive is None else request.progressive
+            speculative = speculation.enabled if request.speculative is None else request.speculative
+            full_answer_text = ""
+            chat_history = []
+
+            if speculative:
+                # Speculative mode: Gemini starts as soon as there is enough context (SpeculationPolicy),
+                # while the fan-out, history and system prompt fetches are still running
+                history_task = asyncio.ensure_future(fetch_thread_history(request.thread_id, request.query))
+                prompt_task = asyncio.ensure_future(resolve_system_prompt())
+
+                seed_context = rag_context
+                kb_match = None if is_time_sensitive else await search_manager.knowledge_base.find_match_async(request.query)
+                if kb_match:
+                    kb_context = "\n\n".join(f"Source '{s['title']}': {s['content']}" for s in kb_match.get('sources', [])[:5] if 'title' in s and 'content' in s)
+                    seed_context = f"{seed_context}\n\n{kb_context}".strip()
+
+                events = asyncio.Queue()
+
+                async def pump_search():
+                    try:
+                        async for kind, payload in search_manager.search_progressive(search_query, contacts=request.contacts, intents=intents):
+                            events.put_nowait((kind, 0, payload))
+                    except Exception as e:
+                        events.put_nowait(("search_error", 0, e))
+
+                async def pump_answer(generation, prompt):
+                    try:
+                        async for delta in gemini.stream(prompt):
+                            events.put_nowait(("content", generation, delta))
+                        events.put_nowait(("generated", generation, None))
+                    except Exception as e:
+                        events.put_nowait(("generation_error", generation, e))
+
+                academic_task.add_done_callback(lambda t: events.put_nowait(("academic", 0, None)))
+                search_task = asyncio.ensure_future(pump_search())
+                web_results = []
+                search_done = generated = False
+                trigger = None
+                answer_task = None
+                generation = restarts = late_new = 0
                 try:
-                    # Fetch last 6 messages for context (3 turns)
-                    history_response = supabase.table('messages')\
-                        .select('role, content')\
-                        .eq('thread_id', request.thread_id)\
-                        .order('created_at', desc=True)\
-                        .limit(6)\
-                        .execute()
-                    
-                    if history_response.data:
-                        # Re-order to chronological
-                        history_msgs = history_response.data[::-1]
-                        history_lines = [f"{m['role'].upper()}: {m['content']}" for m in history_msgs]
-                        chat_history_text = "\n".join(history_lines)
-                        print(f"📖 Loaded {len(history_msgs)} history messages for context.")
-                except Exception as e:
-                    print(f"History Fetch Error: {e}")
-            
-            # [CONTEXT GUARD] Ensure Gemini 'sees' the history clearly
-            if chat_history_text:
-                full_context = f"**PREVIOUS CONVERSATION HISTORY (Context)**:\n{chat_history_text}\n\n" + full_context
-
-            # 2. Generate Answer with Gemini (Streaming)
-            system_prompt_content = fetch_system_prompt()
-            # Fallback logic handled in fetch_system_prompt or if empty string
-            if "System Prompt" in system_prompt_content and len(system_prompt_content) < 100:
-                 system_prompt = """당신은 24시간 가족의 건강과 안전을 생각하는 주치의 겸 돌봄이, '안심씨'입니다. 사용자가 아프다고 하면 비대면 진료 연결을 제안하고, 건강과 안전을 위한 적극적인 도움을 제공하세요.""" 
+                    while not (search_done and generated):
+                        if answer_task is None:
+                            started_by = speculation.trigger(len(web_results), bool(seed_context), search_done, is_time_sensitive)
+                            if started_by:
+                                trigger = trigger or started_by
+                                chat_history = await history_task
+                                if search_done:
+                                    context, history = context_packer.pack(request.query, results, source_engine, chat_history, seed_context)
+                                else:
+                                    context, history = context_packer.pack(request.query, web_results, "speculative", chat_history, seed_context)
+                                prompt = build_prompt(await prompt_task, request.query, context, history)
+                                generation += 1
+                                late_new = 0
+                                print(f"🏎️ Generation started ({started_by}) with {len(web_results)} web sources")
+                                answer_task = asyncio.ensure_future(pump_answer(generation, prompt))
+
+                        kind, event_generation, payload = await events.get()
+                        if kind == "sources":
+                            web_results.extend(payload['results'])
+                            if progressive:
+                                yield sources_event(payload)
+                            # A finished answer is kept: restarting it would leave the new generation
+                            # cancelled by the loop exit once "final" arrives
+                            if answer_task is not None and not generated:
+                                late_new += len(payload['results'])
+                                if speculation.should_restart(late_new, len(full_answer_text), restarts):
+                                    print(f"🔁 Restarting generation: {late_new} late sources")
+                                    answer_task.cancel()
+                                    answer_task = None
+                                    restarts += 1
+                                    full_answer_text = ""
+                                    yield json.dumps({"type": "reset"}) + "\n"
+                        elif kind == "final":
+                            results, images, source_engine = payload
+                            search_done = True
+                            frontend_sources = to_frontend_sources(results)
+                            yield meta_event()
+                        elif kind == "academic":
+                            academic_event = take_academic()
+                            if academic_event:
+                                yield academic_event
+                        elif kind == "search_error":
+                            raise payload
+                        elif event_generation == generation:  # Events of a cancelled generation are dropped
+                            if kind == "content":
+                                full_answer_text += payload
+                                yield json.dumps({"type": "content", "delta": payload}) + "\n"
+                            elif kind == "generated":
+                                generated = True
+                            elif kind == "generation_error":
+                                raise payload
+                finally:
+                    search_task.cancel()
+                    if answer_task is not None:
+                        answer_task.cancel()
+                speculation.record(trigger, restarts)
             else:
-                 system_prompt = system_prompt_content
-
-            today_date = datetime.now().strftime("%Y-%m-%d")
-            
-            prompt = f"""
-            {system_prompt}
-
-            **Current Request**:
-            Query: {request.query}
-            Context: {full_context}
-            
-            **Conversation History (Previous Context)**:
-            {chat_history_text}
-
-            **STRICT Format Instruction (Gemini Visual Blueprint)**:
-            Use `---` separators between sections.
-
-            **1. The Intro (Summary)**
-            - Start directly with a brief, empathetic summary (1-2 lines).
-            - **IMMEDIATELY FOLLOW with a horizontal rule (`---`).**
-
-            **2. The Body (Main Advice)**
-            - Use **Numbered Headers** (e.g., **1. Header Name**) for main points.
-            - Use beaded bullets inside sections.
-            - Max 5 sections.
-
-            **3. The Caution (⚠️)**
-            - IF AND ONLY IF medical/safety context:
-            - **Title**: "⚠️ 이럴 때는 반드시 전문가와 상담하세요" (Exact string, NO Markdown)
-            - List critical warning signs.
-            - If not medical/safety, OMIT this entire section.
-
-            **4. The Closing (Interactive)**
-            - A specific, empathetic question to continue the dialogue.
-            - Example: "지금 어떤 증상이 가장 심하신가요?"
-
-            **Output Logic**:
-            [Summary]
-            
-            ---
-            
-            [Numbered Body 1...5]
-            
-            [Caution if applicable]
-            [Closing Question]
-
-            **Tone & Style (Gemini's Smart Sibling)**:
-            - **Voice**: Professional but friendly ('해요' style). Avoid stiff '다/까' endings unless defining terms. Use '대신', '하지만' for smooth flow.
-            - **Closing Phrases**: ALWAYS end with one of these patterns:
-              - "...알려드릴 수 있습니다."
-              - "...연결해드릴까요?"
-              - "...도와드릴까요?"
-            - **Professional & Deep**: Synthesize logic/cause-effect. Use specific numbers/stats.
-            - **Zero Fluff**: Start immediately. No "Here is the answer".
-
-            **Safety & Medical**:
-            - If medical/safety context, use the "3. The Caution" section strictly.
-            - **Never** say "I am not a doctor" repetitively in the body. Use the disclaimer section.
-            
-            **Handling Follow-ups**:
-            - If the query is "buy link" or similar short follow-up, USE THE HISTORY to understand what product is being discussed.
-
-            OUTPUT FORMAT: Raw Markdown text only.
-            """
-            
-            prompt = f"{prompt}\n\n[SYSTEM NOTE: Today is {today_date}.]\n\nContext:\n{full_context}\n\nQuery: {request.query}"
-
-            # Stream Content
-            response_stream = model.generate_content(prompt, stream=True)
-            
-            full_answer_text = ""
-            for chunk in response_stream:
-                if chunk.text:
-                    full_answer_text += chunk.text
-                    yield json.dumps({"type": "content", "delta": chunk.text}) + "\n"
+                if progressive:
+                    # Progressive mode: each provider's new sources go out the moment it answers
+                    async for kind, payload in search_manager.search_progressive(search_query, contacts=request.contacts, intents=intents):
+                        if kind == "sources":
+                            yield sources_event(payload)
+                        else:
+                            results, images, source_engine = payload
+                        academic_event = take_academic()
+                        if academic_event:
+                            yield academic_event
+                else:
+                    results, images, source_engine = await search_manager.search(search_query, contacts=request.contacts, intents=intents)
+
+                # Map sources for Frontend
+                frontend_sources = to_frontend_sources(results)
+
+                # [STREAM START] Yield Metadata Event
+                yield meta_event()
+
+                # 1.5 Fetch Thread History (Context Injection)
+                chat_history = await fetch_thread_history(request.thread_id, request.query)
+                # Deduplicated, relevance-ranked and token-budgeted (CONTEXT_TOKEN_BUDGET)
+                context, history = context_packer.pack(request.query, results, source_engine, chat_history, rag_context)
+
+                # 2. Generate Answer with Gemini (Streaming)
+                prompt = build_prompt(await resolve_system_prompt(), request.query, context, history)
+
+                # Stream Content (awaited chunk by chunk: other streams keep flowing)
+                async for delta in gemini.stream(prompt):
+                    full_answer_text += delta
+                    yield json.dumps({"type": "content", "delta": delta}) + "\n"
+                    # Academic stage finished late: stream it as its own event
+                    academic_event = take_academic()
+                    if academic_event:
+                        yield academic_event
+
+            if academic_papers is None:
+                await asyncio.wait([academic_task])  # Bounded by the academic deadline
+                academic_event = take_academic()
+                if academic_event:
+                    yield academic_event
 
             # 3. Related Questions (Optional: Separate call or heuristic)
-            related_questions = [
-                f"{request.query}에 대해 더 자세히 알려줘",
-                f"{request.query} 관련 최신 정보는?",
-                "다른 추천 사항이 있나요?"
-            ]
+            related_questions = default_related_questions(request.query)
             
             # [STREAM END] Yield Completion Event
             yield json.dumps({
@@ -282,8 +525,15 @@ async def search_endpoint(request: SearchRequest):
                 "related_questions": related_questions
             }) + "\n"
             
+            # The client persists both messages; keep the cached thread history in step
+            if request.thread_id and full_answer_text:
+                history_cache.record_turn(request.thread_id, request.query, full_answer_text)
+
             # --- SELF IMPROVEMENT LOOP (Async) ---
-            if source_engine in ["google", "tavily", "exa", "brave"] and full_answer_text and len(frontend_sources) > 0:
+            # The KB is shared across users: answers built on this caller's thread history or
+            # contacts (app action cards carry tel:/sms: numbers) are not stored
+            personal = bool(chat_history) or any(intent.startswith("app_") for intent in intents)
+            if not personal and source_engine in ["hybrid_aggregation", "google", "tavily", "exa", "brave"] and full_answer_text and len(frontend_sources) > 0:
                  # Background save (Fire and forget logic ideally, here synchronous for simplicity)
                  try:
                      search_manager.knowledge_base.save_interaction(
@@ -292,7 +542,7 @@ async def search_endpoint(request: SearchRequest):
                              "answer": full_answer_text,
                              "sources": results[:5],
                              "images": images,
-                             "academic": academic_papers
+                             "academic": academic_papers or []
                          }
                      )
                  except:
@@ -301,9 +551,45 @@ async def search_endpoint(request: SearchRequest):
         except Exception as e:
             print(f"Stream Error: {e}")
             yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+        finally:
+            if academic_task and not academic_task.done():
+                academic_task.cancel()
 
     return StreamingResponse(event_generator(), media_type="application/x-ndjson")
 
+# --- Admin API: access check ---
+admin_api_token = os.getenv("ADMIN_API_TOKEN", "")
+
+def is_admin_session(access_token):
+    """
+    True when the Supabase access token belongs to a user whose profile has is_admin
+    (the same flag the admin UI checks).
+    """
+    if not supabase:
+        return False
+    user = supabase.auth.get_user(access_token).user
+    if not user:
+        return False
+    response = supabase.table('profiles').select('is_admin').eq('id', user.id).execute()
+    return bool(response.data and response.data[0].get('is_admin'))
+
+async def require_admin(request: Request):
+    """
+    Admin endpoints accept either X-Admin-Token matching ADMIN_API_TOKEN (ops, scripts) or the
+    Supabase session of an admin user (Authorization: Bearer <access token>, sent by the admin UI).
+    """
+    token = request.headers.get("x-admin-token", "")
+    if admin_api_token and token and hmac.compare_digest(token, admin_api_token):
+        return
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            if await asyncio.to_thread(is_admin_session, authorization[7:].strip()):
+                return
+        except Exception as e:
+            print(f"Admin session check failed: {e}")
+    raise HTTPException(status_code=401, detail="Admin credentials required")
+
 # --- Admin API: User Management (CRM) ---
 @app.get("/api/admin/users")
 async def get_admin_users():
@@ -346,54 +632,80 @@ async def get_admin_users():
         print(f"Admin User Fetch Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/admin/stats", dependencies=[Depends(require_admin)])
+async def get_admin_stats():
+    """
+    Runtime performance counters for the search backend.
+    """
+    return {
+        **search_manager.stats(),
+        "speculative": speculation.stats(),
+        "gemini": gemini.stats(),
+        "system_prompt": system_prompt_cache.stats(),
+        "history_cache": history_cache.stats(),
+        "context_packer": context_packer.stats(),
+        "suggest": suggest_service.stats(),
+        "typeahead": typeahead.stats(),
+        "local_retriever": local_retriever.stats(),
+        "kdca": kdca_service.stats(),
+    }
+
+@app.post("/api/admin/prompt/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_system_prompt():
+    """
+    Called by the admin PromptEditor after saving: reloads the cached system prompt now.
+    """
+    reloaded = await system_prompt_cache.invalidate()
+    return {"reloaded": reloaded, "version": system_prompt_cache.version}
+
 @app.get("/api/health-data")
-async def get_health_data():
-    # Placeholder for KDCA service
-    return {"status": "ok", "data": "Health data placeholder"}
+async def get_health_data(request: Request):
+    """
+    KDCA alerts/news/briefing from the in-memory snapshot, with ETag revalidation.
+    """
+    payload, etag = kdca_service.get()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        kdca_service.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+# Chip type of a suggestion: first matching suggest_* intent in this order
+SUGGEST_TYPES = ("tips", "map", "info", "reco", "troubleshoot")
 
 @app.get("/api/suggest")
-async def get_suggestions(q: str):
+async def get_suggestions(q: str, remote: Optional[bool] = None):
     """
-    Proxies Google Suggest API and classifies intents.
+    Local typeahead completions (KB queries, medical keywords), topped up with Google Suggest
+    when it answers within SUGGEST_REMOTE_DEADLINE. Classifies intents.
     """
     if not q:
         return []
     
-    try:
-        # 1. Fetch from Google Suggest
-        url = f"http://suggestqueries.google.com/complete/search?client=firefox&q={q}"
-        response = requests.get(url, timeout=2)
-        if response.status_code == 200:
-            data = response.json()
-            suggestions = data[1] # List of strings
-            
-            # 2. Smart Classification
-            results = []
-            for text in suggestions[:6]: # Limit to 6
-                # Determine Type/Icon
-                type_ = "search"
-                if any(x in text for x in ["방법", "법", "how to", "guide", "tip"]):
-                    type_ = "tips"
-                elif any(x in text for x in ["병원", "근처", "near", "위치", "장소", "맛집"]):
-                    type_ = "map"
-                elif any(x in text for x in ["가격", "비용", "price", "cost", "요금"]):
-                    type_ = "info"
-                elif any(x in text for x in ["추천", "recommend", "best", "top"]):
-                    type_ = "reco"
-                elif any(x in text for x in ["오류", "고장", "error", "fix", "안돼"]):
-                    type_ = "troubleshoot"
-                
-                results.append({
-                    "query": text,
-                    "label": text,
-                    "type": type_
-                })
-            return results
-    except Exception as e:
-        print(f"Suggestion Error: {e}")
-        return []
+    # 1. Local index first, remote suggester only fills the remaining chips
+    suggestions = list(typeahead.complete(q, limit=6))
+    use_remote = suggest_service.remote_enabled if remote is None else remote
+    if use_remote and len(suggestions) < 6:
+        seen = {s.lower() for s in suggestions}
+        for text in await suggest_service.suggest_within(q):
+            if text.lower() not in seen:
+                seen.add(text.lower())
+                suggestions.append(text)
     
-    return []
+    # 2. Smart Classification
+    results = []
+    for text in suggestions[:6]: # Limit to 6
+        # Determine Type/Icon
+        text_intents = classify(text)
+        type_ = next((t for t in SUGGEST_TYPES if f"suggest_{t}" in text_intents), "search")
+        
+        results.append({
+            "query": text,
+            "label": text,
+            "type": type_
+        })
+    return results
 
 @app.get("/")
 def read_root():
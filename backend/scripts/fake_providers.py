@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+# Local stand-ins for every remote dependency of /api/search, so load tests run with no network.
+# One server, one path prefix per provider (point <PROVIDER>_BASE_URL at http://host:port/<prefix>):
+#   /tavily   POST /search                  Tavily
+#   /serpapi  GET  /search                  SerpAPI (engine=google / google_scholar)
+#   /exa      POST /search                  Exa
+#   /brave    GET  /res/v1/web/search       Brave
+#   /gemini   POST /v1beta/models/{model}:streamGenerateContent   Gemini REST streaming
+#   /supabase GET  /rest/v1/{table}         Supabase PostgREST (messages, prompt_config)
+#   /suggest  GET  /complete/search         Google Suggest
+# GET /_stats returns the call/error counters.
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PROVIDERS = ["tavily", "serpapi", "exa", "brave", "gemini", "supabase", "suggest"]
+
+# provider -> (mean latency s, jitter s, error rate); Gemini's latency is the time to the first chunk
+DEFAULT_PROFILES = {
+    "tavily": (0.9, 0.3, 0.0),
+    "serpapi": (1.2, 0.4, 0.0),
+    "exa": (1.0, 0.3, 0.0),
+    "brave": (0.7, 0.2, 0.0),
+    "gemini": (0.6, 0.2, 0.0),
+    "supabase": (0.08, 0.03, 0.0),
+    "suggest": (0.1, 0.05, 0.0),
+}
+
+
+def parse_profiles(specs):
+    """["tavily=0.8:0.3:0.05", ...] -> {provider: (mean, jitter, error_rate)} over the defaults."""
+    profiles = dict(DEFAULT_PROFILES)
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        if name not in profiles:
+            raise ValueError(f"Unknown provider '{name}' (one of {', '.join(PROVIDERS)})")
+        parts = [float(v) for v in values.split(":")]
+        mean, jitter, error_rate = (parts + list(profiles[name])[len(parts):])[:3]
+        profiles[name] = (mean, jitter, error_rate)
+    return profiles
+
+
+def create_app(profiles, gemini_chunks=20, gemini_chunk_interval=0.05):
+    app = FastAPI()
+    calls = Counter()
+    errors = Counter()
+
+    async def delay(provider):
+        """Sleeps the provider's latency; returns True when this call should fail."""
+        mean, jitter, error_rate = profiles[provider]
+        calls[provider] += 1
+        await asyncio.sleep(max(0.0, random.gauss(mean, jitter)))
+        if random.random() < error_rate:
+            errors[provider] += 1
+            return True
+        return False
+
+    def failure(provider):
+        return JSONResponse({"error": f"fake {provider} failure"}, status_code=random.choice([429, 500, 503]))
+
+    def web_items(query, n=5, prefix="r"):
+        return [
+            {
+                "title": f"{query} 관련 정보 {prefix}{i}",
+                "url": f"https://example.{prefix}.test/{abs(hash(query)) % 10000}/{i}",
+                "content": f"{query}에 대한 {prefix} 제공 요약 {i}. 생활 수칙과 전문가 권고를 정리한 문서입니다. " * 3,
+            }
+            for i in range(n)
+        ]
+
+    @app.post("/tavily/search")
+    async def tavily(request: Request):
+        body = await request.json()
+        if await delay("tavily"):
+            return failure("tavily")
+        return {"results": web_items(body.get("query", ""), prefix="tavily"), "images": ["https://img.test/1.png"]}
+
+    @app.get("/serpapi/search")
+    async def serpapi(request: Request):
+        params = request.query_params
+        if await delay("serpapi"):
+            return failure("serpapi")
+        query = params.get("q", "")
+        items = [
+            {"title": r["title"], "link": r["url"], "snippet": r["content"], "displayed_link": "example.test",
+             "publication_info": {"summary": "Example Journal, 2024"}}
+            for r in web_items(query, prefix="serp")
+        ]
+        return {"organic_results": items}
+
+    @app.post("/exa/search")
+    async def exa(request: Request):
+        body = await request.json()
+        if await delay("exa"):
+            return failure("exa")
+        return {"results": [{"title": r["title"], "url": r["url"], "text": r["content"]} for r in web_items(body.get("query", ""), prefix="exa")]}
+
+    @app.get("/brave/res/v1/web/search")
+    async def brave(request: Request):
+        query = request.query_params.get("q", "")
+        if await delay("brave"):
+            return failure("brave")
+        return {"web": {"results": [{"title": r["title"], "url": r["url"], "description": r["content"]} for r in web_items(query, prefix="brave")]}}
+
+    @app.post("/gemini/v1beta/models/{model_action:path}")
+    async def gemini(model_action: str):
+        if await delay("gemini"):
+            return failure("gemini")
+
+        async def chunks():
+            # REST streaming format of the SDK: one JSON array, elements flushed as they are generated
+            for i in range(gemini_chunks):
+                if i:
+                    await asyncio.sleep(gemini_chunk_interval)
+                piece = {"candidates": [{"content": {"parts": [{"text": f"답변 토큰 {i}. "}], "role": "model"}, "index": 0}]}
+                yield ("[" if i == 0 else ",\r\n") + json.dumps(piece, ensure_ascii=False) + ("]" if i == gemini_chunks - 1 else "")
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/supabase/rest/v1/{table}")
+    async def supabase(table: str):
+        if await delay("supabase"):
+            return failure("supabase")
+        if table == "messages":
+            return [
+                {"role": "assistant", "content": "이전 답변입니다."},
+                {"role": "user", "content": "이전 질문입니다."},
+            ]
+        return []  # prompt_config: no stored prompt, the built-in default is used
+
+    @app.get("/suggest/complete/search")
+    async def suggest(q: str = ""):
+        if await delay("suggest"):
+            return failure("suggest")
+        return [q, [f"{q} {suffix}" for suffix in ("방법", "추천", "가격", "증상", "병원", "예방")]]
+
+    @app.get("/_stats")
+    async def stats():
+        return {"calls": dict(calls), "errors": dict(errors)}
+
+    return app
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", action="append", default=[], metavar="PROVIDER=MEAN[:JITTER[:ERROR_RATE]]",
+                        help=f"latency/error profile, e.g. tavily=0.8:0.3:0.05 (providers: {', '.join(PROVIDERS)})")
+    parser.add_argument("--gemini-chunks", type=int, default=20)
+    parser.add_argument("--gemini-chunk-interval", type=float, default=0.05)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve fake Tavily/SerpAPI/Exa/Brave/Gemini/Supabase/Suggest endpoints.")
+    parser.add_argument("--port", type=int, default=8799)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    app = create_app(parse_profiles(args.profile), args.gemini_chunks, args.gemini_chunk_interval)
+    print(f"Fake providers on http://127.0.0.1:{args.port} ({', '.join(PROVIDERS)})", file=sys.stderr)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level=os.getenv("FAKE_LOG_LEVEL", "warning"))
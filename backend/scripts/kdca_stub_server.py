@@ -0,0 +1,107 @@
+import json
+import time
+import random
+import argparse
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+# Local stand-in for the data.go.kr KDCA feeds used by services/kdca_aggregator.
+# Run `python scripts/kdca_stub_server.py` and start the backend with
+# KDCA_BASE_URL=http://127.0.0.1:8790 KDCA_API_KEY=test
+# tests/test_kdca_aggregator.py starts it the same way to check the aggregator end to end.
+
+parser = argparse.ArgumentParser(description="Serve fake KDCA feeds (XML or JSON, paged) for local tests.")
+parser.add_argument("--port", type=int, default=8790)
+parser.add_argument("--rows", type=int, default=250, help="items per feed (across all pages)")
+parser.add_argument("--format", choices=["auto", "xml", "json"], default="auto",
+                    help="auto: JSON only when the request asks for it (apiType/_type=json), like the portal")
+parser.add_argument("--latency", type=float, default=0.2, help="seconds before each page is answered")
+parser.add_argument("--error-rate", type=float, default=0.0, help="share of pages answered with HTTP 500")
+parser.add_argument("--auth-error", action="store_true", help="answer every page with the portal's key error (XML)")
+args = parser.parse_args()
+
+DISEASES = ["인플루엔자", "수두", "유행성이하선염", "성홍열", "백일해", "노로바이러스", "쯔쯔가무시증", "말라리아"]
+
+
+def covid_item(i):
+    return {"seq": i, "stateDt": (date.today() - timedelta(days=i)).strftime("%Y%m%d"),
+            "incDec": str(random.randint(100, 3000)), "defCnt": str(30000000 + i)}
+
+
+def disease_item(i):
+    return {"sn": i, "icdNm": DISEASES[i % len(DISEASES)], "resultVal": str(random.randint(1, 500)),
+            "baseDt": (date.today() - timedelta(days=i // len(DISEASES))).strftime("%Y%m%d")}
+
+
+def notice_item(i):
+    return {"nttId": i, "title": f"감염병 예방 수칙 안내 {i}", "regDt": (date.today() - timedelta(days=i)).isoformat(),
+            "url": f"https://www.kdca.go.kr/board/{i}"}
+
+
+FEEDS = {
+    "/1352000/ODMS_COVID_04/callCovid04Api": covid_item,
+    "/1790387/EIDAPIService/Disease": disease_item,
+    "/1790387/kdcaNotice/getNoticeList": notice_item,
+}
+
+AUTH_ERROR = (
+    "<OpenAPI_ServiceResponse><cmmMsgHeader><errMsg>SERVICE ERROR</errMsg>"
+    "<returnAuthMsg>SERVICE_KEY_IS_NOT_REGISTERED_ERROR</returnAuthMsg>"
+    "<returnReasonCode>30</returnReasonCode></cmmMsgHeader></OpenAPI_ServiceResponse>"
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        make_item = FEEDS.get(url.path)
+        if make_item is None:
+            self.send_error(404)
+            return
+        time.sleep(args.latency)
+        if random.random() < args.error_rate:
+            self.send_error(500)
+            return
+        if args.auth_error:
+            self._send("application/xml", [AUTH_ERROR.encode("utf-8")])
+            return
+
+        page = int(params.get("pageNo", 1))
+        rows = int(params.get("numOfRows", 10))
+        first = (page - 1) * rows
+        items = [make_item(i) for i in range(first, min(first + rows, args.rows))]
+        wants_json = "json" in (params.get("apiType", "") + params.get("_type", "")).lower()
+
+        if args.format == "json" or (args.format == "auto" and wants_json):
+            body = {"response": {"header": {"resultCode": "00", "resultMsg": "NORMAL SERVICE."},
+                                 "body": {"items": {"item": items}, "numOfRows": rows, "pageNo": page, "totalCount": args.rows}}}
+            self._send("application/json;charset=UTF-8", [json.dumps(body, ensure_ascii=False).encode("utf-8")])
+            return
+
+        # XML is written item by item so the client sees a streamed body
+        chunks = [f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><response><header><resultCode>00</resultCode>"
+                  f"<resultMsg>NORMAL SERVICE.</resultMsg></header><body><items>".encode("utf-8")]
+        for item in items:
+            fields = "".join(f"<{k}>{escape(str(v))}</{k}>" for k, v in item.items())
+            chunks.append(f"<item>{fields}</item>".encode("utf-8"))
+        chunks.append(f"</items><numOfRows>{rows}</numOfRows><pageNo>{page}</pageNo>"
+                      f"<totalCount>{args.rows}</totalCount></body></response>".encode("utf-8"))
+        self._send("application/xml;charset=UTF-8", chunks)
+
+    def _send(self, content_type, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(sum(len(c) for c in chunks)))
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+
+    def log_message(self, format, *log_args):
+        print(f"[kdca-stub] {self.command} {self.path.split('?')[0]} {format % log_args}")
+
+
+print(f"KDCA stub serving {len(FEEDS)} feeds on http://127.0.0.1:{args.port} ({args.rows} rows each)")
+ThreadingHTTPServer(("127.0.0.1", args.port), Handler).serve_forever()
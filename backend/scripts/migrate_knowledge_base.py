@@ -0,0 +1,23 @@
+import os
+import sys
+import argparse
+
+# Allow running as `python scripts/migrate_knowledge_base.py` from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kb_store import KnowledgeStore, migrate_json
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description="Import legacy knowledge_base JSON files into the SQLite store.")
+parser.add_argument("--db", default=os.getenv("KB_DB_PATH") or os.path.join(base_dir, "data", "knowledge_base.db"))
+parser.add_argument("files", nargs="*", default=[
+    os.path.join(base_dir, "data", "knowledge_base.json"),
+    os.path.join(base_dir, "data", "knowledge_base_backup.json"),
+])
+args = parser.parse_args()
+
+store = KnowledgeStore(args.db)
+print(f"Migrating into {args.db} ...")
+inserted = migrate_json(store, args.files)
+print(f"Done. {inserted} new entries, {store.count()} total.")
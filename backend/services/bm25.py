@@ -0,0 +1,84 @@
+import math
+from collections import Counter, defaultdict
+from .hangul import normalize_tokens
+
+
+def _bigrams(token):
+    return [f"b:{token[i:i + 2]}" for i in range(len(token) - 1)] if len(token) >= 3 else []
+
+
+def bm25_terms(text):
+    """
+    Particle-stripped tokens plus the syllable bigrams of longer tokens, so compounds match their
+    parts ("미세먼지" ~ "미세 먼지", "혈압약" ~ "혈압").
+    """
+    terms = []
+    for token in normalize_tokens(text):
+        terms.append(token)
+        terms.extend(_bigrams(token))
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over short passages, built in memory and extended with add().
+    Keyword fields count `keyword_weight` times per occurrence (a light BM25F).
+    """
+
+    def __init__(self, k1=1.5, b=0.75, keyword_weight=3):
+        self.k1 = k1
+        self.b = b
+        self.keyword_weight = keyword_weight
+        self.postings = defaultdict(list)  # term -> [(doc, tf)]
+        self.doc_lengths = []
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, text, keywords=()):
+        """Indexes one passage; returns its doc id (0, 1, 2, ...)."""
+        doc = len(self.doc_lengths)
+        tf = Counter(bm25_terms(text))
+        for keyword in keywords:
+            for term in bm25_terms(keyword):
+                tf[term] += self.keyword_weight
+        length = sum(tf.values())
+        self.doc_lengths.append(length)  # Before the postings: concurrent searches never see an unknown doc
+        self.total_length += length
+        for term, count in tf.items():
+            self.postings[term].append((doc, count))
+        return doc
+
+    def search(self, query, limit=3):
+        """[(score, doc)] best first."""
+        n = len(self.doc_lengths)
+        if not n:
+            return []
+        avg_length = self.total_length / n
+        # A query token counts once: whole when it is indexed, otherwise spread over its bigrams.
+        # Two-syllable words and bigrams are the same text, so each side falls back to the other
+        # ("미세 먼지" finds "미세먼지" and the other way round)
+        query_terms = {}
+        for token in normalize_tokens(query):
+            bigrams = _bigrams(token)
+            if token in self.postings or not bigrams:
+                if token not in self.postings and f"b:{token}" in self.postings:
+                    token = f"b:{token}"
+                query_terms[token] = max(query_terms.get(token, 0), 1.0)
+            else:
+                for bigram in bigrams:
+                    if bigram not in self.postings and bigram[2:] in self.postings:
+                        bigram = bigram[2:]
+                    query_terms[bigram] = max(query_terms.get(bigram, 0), 1.0 / len(bigrams))
+
+        scores = defaultdict(float)
+        for term, weight in query_terms.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = weight * math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(((score, doc) for doc, score in scores.items()), reverse=True)[:limit]
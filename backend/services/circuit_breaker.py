@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from collections import deque
+from datetime import date
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker driven by the error/timeout rate over the last `window` calls.
+    closed    -> calls flow; trips to open when failures/calls >= failure_rate (after min_calls)
+    open      -> calls are rejected instantly until `cooldown` seconds have passed
+    half_open -> one probe call is let through; success closes the circuit, failure re-opens it
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=20, cooldown=30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)  # True = success
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def available(self):
+        """Whether allow() would let a call through now, without reserving the half-open probe."""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            return now - self.opened_at >= self.cooldown
+        if self.state == self.HALF_OPEN:
+            return not (self.probe_started_at and now - self.probe_started_at < self.cooldown)
+        return True
+
+    def allow(self):
+        """Call right before a request is sent: in half-open state it takes the probe slot."""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.cooldown:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_started_at = 0.0
+
+        if self.state == self.HALF_OPEN:
+            # One probe at a time; if a probe never reports back, allow another after the cooldown
+            if self.probe_started_at and now - self.probe_started_at < self.cooldown:
+                self.rejected += 1
+                return False
+            self.probe_started_at = now
+        return True
+
+    def record_success(self):
+        self.outcomes.append(True)
+        if self.state == self.HALF_OPEN:
+            print(f"🟢 Circuit closed: {self.name}")
+            self.state = self.CLOSED
+            self.outcomes.clear()
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+        failures = sum(1 for ok in self.outcomes if not ok)
+        if self.state == self.CLOSED and len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate:
+            self._trip()
+
+    def _trip(self):
+        print(f"🔴 Circuit opened: {self.name} (cooldown {self.cooldown:.0f}s)")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "recent_failures": sum(1 for ok in self.outcomes if not ok),
+            "recent_calls": len(self.outcomes),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class QuotaBudget:
+    """
+    Per-account call budget with a per-minute and a per-day limit (None = unlimited).
+    Configured with <ACCOUNT>_QUOTA_PER_MINUTE / <ACCOUNT>_QUOTA_PER_DAY, e.g. SERPAPI_QUOTA_PER_DAY=300.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        per_minute = os.getenv(f"{name.upper()}_QUOTA_PER_MINUTE")
+        per_day = os.getenv(f"{name.upper()}_QUOTA_PER_DAY")
+        self.per_minute = int(per_minute) if per_minute else None
+        self.per_day = int(per_day) if per_day else None
+        self.minute_bucket = 0
+        self.minute_count = 0
+        self.day = date.today()
+        self.day_count = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        bucket = int(time.time() // 60)
+        if bucket != self.minute_bucket:
+            self.minute_bucket = bucket
+            self.minute_count = 0
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.day_count = 0
+
+    def _has_budget(self):
+        self._roll()
+        return not (
+            (self.per_minute is not None and self.minute_count >= self.per_minute)
+            or (self.per_day is not None and self.day_count >= self.per_day)
+        )
+
+    def available(self):
+        """Planning check only: concurrent callers may all see the same last unit of budget."""
+        if self._has_budget():
+            return True
+        self.exhausted += 1
+        return False
+
+    def try_consume(self):
+        """Spends one call if the budget allows it (check and spend are atomic). Call right before sending."""
+        with self._lock:
+            if not self._has_budget():
+                self.exhausted += 1
+                return False
+            self.minute_count += 1
+            self.day_count += 1
+            return True
+
+    def refund(self):
+        """Gives back a unit taken by try_consume() for a call that was not sent."""
+        with self._lock:
+            self.minute_count = max(0, self.minute_count - 1)
+            self.day_count = max(0, self.day_count - 1)
+
+    def stats(self):
+        self._roll()
+        return {
+            "per_minute": self.per_minute,
+            "per_day": self.per_day,
+            "used_this_minute": self.minute_count,
+            "used_today": self.day_count,
+            "exhausted": self.exhausted,
+        }
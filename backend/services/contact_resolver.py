@@ -0,0 +1,149 @@
+import os
+import time
+from collections import OrderedDict
+from .intents import AhoCorasick
+
+# Particles / honorifics that may follow a name: "엄마한테 전화해줘", "김부장님께 문자 보내줘"
+NAME_SUFFIXES = ("에게서", "한테서", "님에게", "님한테", "에게", "한테", "님께", "께", "님", "씨", "이랑", "랑", "하고", "의", "이", "가", "을", "를", "은", "는")
+# Particles that mark the recipient of a call/message
+RECIPIENT_PARTICLES = ("에게", "한테", "께")
+# Suffixes recognised when the query continues without a space
+UNSPACED_SUFFIXES = ("님에게", "님한테", "님께", "에게", "한테", "께", "님")
+
+
+def _is_hangul_name(name):
+    return len(name) == 3 and all('가' <= ch <= '힣' for ch in name)
+
+
+def _boundary_before(text, start):
+    return start == 0 or not text[start - 1].isalnum()
+
+
+def _suffix_after(text, end):
+    """
+    (particle, bounded) right after a match: bounded when a word boundary follows, unbounded when
+    more Hangul follows ("엄마한테전화해줘", "엄마전화해" typed without spaces). None inside a
+    longer non-Hangul word.
+    """
+    if end == len(text) or not text[end].isalnum():
+        return "", True
+    for suffix in NAME_SUFFIXES:
+        if text.startswith(suffix, end):
+            after = end + len(suffix)
+            if after == len(text) or not text[after].isalnum():
+                return suffix, True
+    if not '가' <= text[end] <= '힣':
+        return None
+    # Without a space any one-syllable particle could be the next word ("엄마이번주"); only the
+    # recipient particles and honorifics are taken
+    for suffix in UNSPACED_SUFFIXES:
+        if text.startswith(suffix, end):
+            return suffix, False
+    return "", False
+
+
+class ContactMatch:
+    def __init__(self, name, number, start, end):
+        self.name = name
+        self.number = number
+        self.start = start  # Span of the name and its particle in the query
+        self.end = end
+
+    def __repr__(self):
+        return f"ContactMatch({self.name!r}, {self.number!r})"
+
+
+class ContactIndex:
+    """
+    One user's address book compiled into an Aho-Corasick automaton over the contact names
+    (plus the given name of three-syllable Korean names, "김철수" -> "철수", when unambiguous).
+    resolve() scans the query once, whatever the number of contacts.
+    """
+
+    def __init__(self, contacts):
+        self.automaton = AhoCorasick()
+        aliases = {}
+        for c in contacts:
+            name = c.name.strip()
+            if not name:
+                continue
+            number = c.number.replace("-", "").strip()
+            self.automaton.add(name.lower(), (name, number, True))
+            compact = name.replace(" ", "")
+            if compact != name:
+                self.automaton.add(compact.lower(), (name, number, True))
+            if _is_hangul_name(name):
+                aliases.setdefault(name[1:], []).append((name, number))
+        for alias, owners in aliases.items():
+            if len(owners) == 1:
+                name, number = owners[0]
+                self.automaton.add(alias, (name, number, False))
+        self.automaton.build()
+        self.size = len(contacts)
+
+    def resolve(self, query):
+        """
+        Best contact mentioned in the query, or None. Preference: followed by a recipient particle
+        (에게/한테/께), then followed by a word boundary (over a name run into the next word),
+        then full name over given-name alias, then the longest match.
+        """
+        text = query.lower()
+        best = None
+        best_score = None
+        for start, end, (name, number, full) in self.automaton.search(text):
+            if not _boundary_before(text, start):
+                continue
+            after = _suffix_after(text, end)
+            if after is None:
+                continue
+            suffix, bounded = after
+            score = (suffix.endswith(RECIPIENT_PARTICLES), bounded, full, end - start, -start)
+            if best_score is None or score > best_score:
+                best_score = score
+                best = ContactMatch(name, number, start, end + len(suffix))
+        return best
+
+
+class ContactResolver:
+    """
+    Caches compiled ContactIndex objects by the content of the contact list, so a user who sends
+    the same address book on every turn only pays for compiling it once.
+    """
+
+    def __init__(self):
+        self.max_indexes = int(os.getenv("CONTACT_INDEX_CACHE_SIZE", "1000"))
+        self._indexes = OrderedDict()  # fingerprint -> ContactIndex
+
+        self.hits = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def index_for(self, contacts):
+        fingerprint = hash(tuple((c.name, c.number) for c in contacts))
+        index = self._indexes.get(fingerprint)
+        if index is not None:
+            self._indexes.move_to_end(fingerprint)
+            self.hits += 1
+            return index
+
+        started = time.perf_counter()
+        index = ContactIndex(contacts)
+        self.build_seconds += time.perf_counter() - started
+        self.builds += 1
+        self._indexes[fingerprint] = index
+        while len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+        return index
+
+    def resolve(self, query, contacts):
+        if not contacts:
+            return None
+        return self.index_for(contacts).resolve(query)
+
+    def stats(self):
+        return {
+            "indexes": len(self._indexes),
+            "hits": self.hits,
+            "builds": self.builds,
+            "avg_build_ms": round(self.build_seconds / self.builds * 1000, 3) if self.builds else 0,
+        }
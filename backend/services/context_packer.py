@@ -0,0 +1,155 @@
+import os
+import math
+import re
+from .kb_matcher import query_features
+
+
+def estimate_tokens(text):
+    """
+    Rough Gemini token count without a tokenizer: ~1.5 Hangul syllables or ~4 other characters per token.
+    """
+    if not text:
+        return 0
+    hangul = sum(1 for ch in text if '가' <= ch <= '힣')
+    return math.ceil(hangul / 1.5 + (len(text) - hangul) / 4)
+
+
+def truncate_tokens(text, max_tokens):
+    """Cuts text to about max_tokens, preferring a sentence/line boundary in the last 40%."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cost = 0.0
+    cut = len(text)
+    for i, ch in enumerate(text):
+        cost += 1 / 1.5 if '가' <= ch <= '힣' else 1 / 4
+        if cost > max_tokens:
+            cut = i
+            break
+    head = text[:cut]
+    boundary = max(head.rfind(". "), head.rfind("다."), head.rfind("\n"))
+    if boundary > cut * 0.6:
+        return head[:boundary + 1].rstrip() + " …"
+    return head.rstrip() + " …"
+
+
+def relevance(query_feats, text):
+    """Share of the query's n-gram features found in the text (0..1)."""
+    if not query_feats:
+        return 0.0
+    return len(query_feats & query_features(text[:2000])) / len(query_feats)
+
+
+def _dedupe_key(text):
+    return re.sub(r"\W+", "", text.lower())[:200]
+
+
+class ContextPacker:
+    """
+    Builds the context and history sections of the Gemini prompt within a token budget.
+    - history: thread messages with their role prefixes, each body cut to its share of
+      history_max_tokens
+    - rag_context (curated facts / KB seed): capped at a third of the budget
+    - app / service cards (results tagged 'card'): kept first, in the order search() put them
+    - web snippets: duplicates dropped, ranked by lexical relevance to the query, each cut to
+      snippet_max_tokens, added until the budget is spent
+    Tracks tokens saved against the previous assembly (context twice, history three times, no limits).
+    """
+
+    def __init__(self):
+        self.budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2500"))
+        self.snippet_max_tokens = int(os.getenv("CONTEXT_SNIPPET_MAX_TOKENS", "250"))
+        self.history_max_tokens = int(os.getenv("CONTEXT_HISTORY_MAX_TOKENS", "600"))
+        self.max_snippets = 12
+
+        self.packed = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.snippets_in = 0
+        self.snippets_kept = 0
+        self.duplicates = 0
+
+    def _pack_history(self, messages):
+        """
+        "ROLE: content" lines, oldest first. Every message keeps its role prefix; bodies are cut to
+        a fair share of history_max_tokens (short messages keep their text and pass the rest on), so
+        a long answer cannot push out the earlier turn (e.g. the symptom the user mentioned).
+        """
+        lines = [(f"{m.get('role', 'user').upper()}: ", m.get('content') or "") for m in messages or []]
+        allowance = [0] * len(lines)
+        remaining = self.history_max_tokens
+        by_cost = sorted(range(len(lines)), key=lambda i: estimate_tokens(lines[i][1]))
+        for position, i in enumerate(by_cost):
+            share = remaining // (len(lines) - position)
+            allowance[i] = min(estimate_tokens(lines[i][1]), share - estimate_tokens(lines[i][0]))
+            remaining -= allowance[i] + estimate_tokens(lines[i][0])
+        return "\n".join(prefix + truncate_tokens(body, max(allowance[i], 1)) for i, (prefix, body) in enumerate(lines))
+
+    def pack(self, query, results, source_engine, history=(), rag_context=""):
+        """Returns (context, history) for build_prompt; history is the thread's [{role, content}], oldest first."""
+        candidates = [r for r in results if 'title' in r and 'content' in r][:self.max_snippets]
+        header = f"=== WEB SEARCH RESULTS (Source: {source_engine}) ===\n"
+
+        packed_history = self._pack_history(history)
+        rag = truncate_tokens(rag_context, self.budget // 3) if rag_context else ""
+        remaining = self.budget - estimate_tokens(packed_history) - estimate_tokens(rag) - estimate_tokens(header)
+
+        pinned = [r for r in candidates if r.get('card')]
+        seen = set()
+        unique = []
+        for r in candidates:
+            if r.get('card'):
+                continue
+            key = _dedupe_key(r['content'])
+            if key in seen:
+                self.duplicates += 1
+                continue
+            seen.add(key)
+            unique.append(r)
+
+        query_feats = query_features(query)
+        ranked = sorted(
+            enumerate(unique),
+            key=lambda pair: (-relevance(query_feats, f"{pair[1]['title']} {pair[1]['content']}"), pair[0])
+        )
+
+        snippets = []
+        for r in pinned + [r for _, r in ranked]:
+            snippet = f"Source '{r['title']}': {truncate_tokens(r['content'], self.snippet_max_tokens)}"
+            cost = estimate_tokens(snippet)
+            if cost > remaining and not r.get('card'):  # Cards are one line each and always kept
+                continue
+            snippets.append(snippet)
+            remaining -= cost
+
+        context = header + "\n\n".join(snippets)
+        if rag:
+            context = f"{rag}\n\n{context}"
+
+        # Previous assembly: full context (history prefixed) in the template and again at the end,
+        # plus the history block in the template
+        raw_context = estimate_tokens(rag_context) + estimate_tokens(header) + sum(
+            estimate_tokens(f"Source '{r['title']}': {r['content']}") for r in candidates
+        )
+        raw_history = sum(estimate_tokens(f"{m.get('role', 'user').upper()}: {m.get('content') or ''}") for m in history or [])
+        tokens_in = 2 * (raw_context + raw_history) + raw_history
+        tokens_out = estimate_tokens(context) + estimate_tokens(packed_history)
+
+        self.packed += 1
+        self.tokens_in += tokens_in
+        self.tokens_out += tokens_out
+        self.snippets_in += len(candidates)
+        self.snippets_kept += len(snippets)
+        return context, packed_history
+
+    def stats(self):
+        return {
+            "budget": self.budget,
+            "packed": self.packed,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_in - self.tokens_out,
+            "avg_tokens_out": round(self.tokens_out / self.packed) if self.packed else 0,
+            "snippets_in": self.snippets_in,
+            "snippets_kept": self.snippets_kept,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class GeminiStreamer:
+    """
+    Non-blocking Gemini streaming for the async endpoints.
+
+    async:  the SDK's generate_content_async(stream=True); chunks are awaited on the event loop.
+    thread: the sync SDK stream is consumed on a bounded worker pool and bridged to the event loop
+            through an asyncio queue (fallback for SDK/transport combinations without async support).
+    Either way one slow generation never stalls the other streams on the worker.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.mode = os.getenv("GEMINI_STREAM_MODE", "async")
+        # Max seconds between two chunks (including the first one) before the stream is abandoned
+        self.chunk_timeout = float(os.getenv("GEMINI_CHUNK_TIMEOUT", "30"))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("GEMINI_STREAM_THREADS", "32")), thread_name_prefix="gemini-stream"
+        )
+
+        self.active = 0
+        self.peak_active = 0
+        self.started = 0
+        self.failed = 0
+        self.first_chunk_total = 0.0
+        self.first_chunks = 0
+
+    async def stream(self, prompt):
+        """Yields the answer text deltas."""
+        if self.model is None:
+            raise RuntimeError("Gemini model is not configured (GEMINI_API_KEY)")
+
+        self.started += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        started = time.monotonic()
+        first = True
+        try:
+            deltas = self._stream_async(prompt) if self.mode == "async" else self._stream_thread(prompt)
+            async for delta in deltas:
+                if first:
+                    first = False
+                    self.first_chunk_total += time.monotonic() - started
+                    self.first_chunks += 1
+                yield delta
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+
+    async def _stream_async(self, prompt):
+        response = await asyncio.wait_for(self.model.generate_content_async(prompt, stream=True), self.chunk_timeout)
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), self.chunk_timeout)
+            except StopAsyncIteration:
+                return
+            if chunk.text:
+                yield chunk.text
+
+    async def _stream_thread(self, prompt):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        def produce():
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if cancelled.is_set():
+                        return
+                    if chunk.text:
+                        put(("delta", chunk.text))
+                put(("end", None))
+            except Exception as e:
+                put(("error", e))
+
+        loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                kind, payload = await asyncio.wait_for(queue.get(), self.chunk_timeout)
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise payload
+                yield payload
+        finally:
+            # Client gone or stream abandoned: the worker stops at its next chunk
+            cancelled.set()
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "active": self.active,
+            "peak_active": self.peak_active,
+            "started": self.started,
+            "failed": self.failed,
+            "avg_first_chunk": round(self.first_chunk_total / self.first_chunks, 3) if self.first_chunks else None,
+        }
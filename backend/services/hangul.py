@@ -0,0 +1,102 @@
+"""
+Hangul text helpers shared by the KnowledgeBase matcher (mirrors src/lib/hangul.js on the frontend).
+"""
+
+CHOSUNG = [
+    'ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+    'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ'
+]
+JUNGSUNG = [
+    'ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 'ㅙ',
+    'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ'
+]
+JONGSUNG = [
+    '', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ',
+    'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ'
+]
+
+# Longest first so "에서" is tried before "에"
+PARTICLES = sorted([
+    "은", "는", "이", "가", "을", "를", "의", "에", "도", "로", "와", "과", "만", "랑",
+    "으로", "에서", "에게", "한테", "께서", "까지", "부터", "이랑", "하고", "보다", "처럼",
+    "이나", "에는", "에도", "으로는",
+], key=len, reverse=True)
+
+# Single-syllable particles that rarely end a two-syllable noun ("약을", "눈은")
+SAFE_SHORT_PARTICLES = {"은", "는", "을", "를"}
+
+
+def is_hangul(char):
+    return 0xAC00 <= ord(char) <= 0xD7A3
+
+
+def get_chosung(text):
+    """
+    Extracts the Chosung (initial consonant) of each syllable.
+    Example: "감기" -> "ㄱㄱ", non-Hangul characters are kept as is.
+    """
+    return "".join(CHOSUNG[(ord(c) - 0xAC00) // 588] if is_hangul(c) else c for c in text)
+
+
+def decompose(text):
+    """
+    Splits Hangul syllables into jamo. Example: "감기" -> "ㄱㅏㅁㄱㅣ".
+    """
+    out = []
+    for c in text:
+        if is_hangul(c):
+            code = ord(c) - 0xAC00
+            out.append(CHOSUNG[code // 588])
+            out.append(JUNGSUNG[(code % 588) // 28])
+            out.append(JONGSUNG[code % 28])
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+# Compound jamo as they are typed on a 2-beolsik keyboard ("ㅘ" = ㅗ + ㅏ, "ㄺ" = ㄹ + ㄱ)
+KEYSTROKES = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+
+
+def is_jamo(char):
+    return 0x3131 <= ord(char) <= 0x318E
+
+
+def to_keystrokes(text):
+    """
+    Jamo in typing order, so every intermediate IME state is a prefix of the finished word.
+    Example: "닭" -> "ㄷㅏㄹㄱ" (typed as "다" -> "달" -> "닭"), "가방" -> "ㄱㅏㅂㅏㅇ" (shown as "갑" midway).
+    """
+    return "".join(KEYSTROKES.get(j, j) for j in decompose(text))
+
+
+def strip_particle(word):
+    """
+    Removes a trailing josa (은/는/이/가/에서...) from a Korean word.
+    Two-syllable words keep ambiguous endings ("아이", "나이").
+    """
+    if not word or not is_hangul(word[-1]):
+        return word
+    for particle in PARTICLES:
+        if word.endswith(particle) and len(word) > len(particle):
+            if len(particle) == 1 and len(word) == 2 and particle not in SAFE_SHORT_PARTICLES:
+                continue
+            return word[:-len(particle)]
+    return word
+
+
+def normalize_tokens(text):
+    """
+    Lowercased, punctuation-trimmed, particle-stripped tokens.
+    Example: "감기가 심할 때 약은?" -> ["감기", "심할", "때", "약"]
+    """
+    tokens = []
+    for raw in text.lower().split():
+        token = raw.strip(".,!?~\"'()[]{}:;")
+        if token:
+            tokens.append(strip_particle(token))
+    return tokens
@@ -0,0 +1,91 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+from .single_flight import SingleFlight
+
+
+class HistoryCache:
+    """
+    Per-thread ring buffer of the most recent messages ({'role', 'content'}, oldest first).
+    loader(thread_id): sync function returning the thread's recent messages from Supabase.
+
+    Loaded on first access (concurrent misses share one query), then kept current by appending
+    each turn as the backend streams its answer, so Supabase is only read on a miss.
+    Threads idle for longer than `ttl` expire (this also bounds staleness when another instance
+    or device wrote to the thread); beyond `max_threads` the least recently used thread is dropped.
+    """
+
+    def __init__(self, loader, max_messages=6):
+        self.loader = loader
+        self.max_messages = max_messages
+        self.max_threads = int(os.getenv("HISTORY_CACHE_MAX_THREADS", "5000"))
+        self.ttl = float(os.getenv("HISTORY_CACHE_TTL", "900"))
+        self._threads = OrderedDict()  # thread_id -> (last_used, deque of messages)
+        self._loads = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.load_failures = 0
+        self.evictions = 0
+
+    def _lookup(self, thread_id):
+        entry = self._threads.get(thread_id)
+        if entry is None:
+            return None
+        last_used, messages = entry
+        if time.monotonic() - last_used > self.ttl:
+            del self._threads[thread_id]
+            return None
+        self._threads[thread_id] = (time.monotonic(), messages)
+        self._threads.move_to_end(thread_id)
+        return messages
+
+    async def get(self, thread_id, current_query=None):
+        """Messages before the current turn."""
+        messages = self._lookup(thread_id)
+        if messages is not None:
+            self.hits += 1
+            return list(messages)
+
+        self.misses += 1
+        try:
+            loaded = await self._loads.do(thread_id, lambda: asyncio.to_thread(self.loader, thread_id))
+        except Exception as e:
+            self.load_failures += 1
+            print(f"History Fetch Error: {e}")
+            return []
+
+        loaded = list(loaded or [])
+        # The client stores the user's message before asking: it belongs to this turn, not the history
+        if loaded and current_query is not None and loaded[-1]['role'] == 'user' and loaded[-1]['content'] == current_query:
+            loaded.pop()
+
+        messages = self._lookup(thread_id)  # Another request may have filled it meanwhile
+        if messages is None:
+            messages = deque(({'role': m['role'], 'content': m['content']} for m in loaded), maxlen=self.max_messages)
+            self._threads[thread_id] = (time.monotonic(), messages)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+                self.evictions += 1
+        return list(messages)
+
+    def record_turn(self, thread_id, query, answer):
+        """Append a finished turn. Threads that are not cached are left for the next load."""
+        messages = self._lookup(thread_id)
+        if messages is None:
+            return
+        messages.append({'role': 'user', 'content': query})
+        messages.append({'role': 'assistant', 'content': answer})
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "threads": len(self._threads),
+            "max_threads": self.max_threads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "load_failures": self.load_failures,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,79 @@
+import os
+import asyncio
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Provider -> default base URL (override with <PROVIDER>_BASE_URL, e.g. for local stand-in servers)
+PROVIDER_BASE_URLS = {
+    "google": "https://serpapi.com",
+    "academic": "https://serpapi.com",
+    "tavily": "https://api.tavily.com",
+    "exa": "https://api.exa.ai",
+    "brave": "https://api.search.brave.com",
+    "suggest": "http://suggestqueries.google.com",
+    "kdca": "http://apis.data.go.kr",
+}
+
+# Provider -> (connect timeout, read timeout) in seconds (override with <PROVIDER>_CONNECT_TIMEOUT / _READ_TIMEOUT)
+PROVIDER_TIMEOUTS = {
+    "google": (2.0, 6.0),
+    "academic": (2.0, 5.0),
+    "tavily": (2.0, 8.0),
+    "exa": (2.0, 8.0),
+    "brave": (2.0, 5.0),
+    "suggest": (1.0, 1.5),
+    "kdca": (3.0, 5.0),
+}
+DEFAULT_TIMEOUT = (2.0, 8.0)
+
+
+class HttpClients:
+    """
+    Shared async HTTP layer for the search providers.
+    One keep-alive connection pool per provider (HTTP/2 when `h2` is installed),
+    each with its own connect/read timeouts, so a hung provider can't hold a worker thread.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._loop = None
+
+    def base_url(self, provider):
+        return os.getenv(f"{provider.upper()}_BASE_URL") or PROVIDER_BASE_URLS.get(provider, "")
+
+    def timeout(self, provider):
+        connect, read = PROVIDER_TIMEOUTS.get(provider, DEFAULT_TIMEOUT)
+        connect = float(os.getenv(f"{provider.upper()}_CONNECT_TIMEOUT", connect))
+        read = float(os.getenv(f"{provider.upper()}_READ_TIMEOUT", read))
+        return httpx.Timeout(read, connect=connect)
+
+    def get(self, provider):
+        # Pools are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = {}
+            self._loop = loop
+
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url(provider),
+                timeout=self.timeout(provider),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=30),
+                http2=HTTP2_AVAILABLE,
+            )
+            self._clients[provider] = client
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+
+http_clients = HttpClients()
@@ -0,0 +1,128 @@
+from collections import deque
+from functools import lru_cache
+
+# Declarative intent table: intent -> keywords, matched as substrings of the lowercased text.
+# Adding keywords costs nothing at request time: the whole table is one automaton.
+INTENTS = {
+    # Answer policy (search_endpoint / result cache TTL)
+    "time_sensitive": ["오늘", "날씨", "뉴스", "today", "weather", "news"],
+    "medical": ["약", "질병", "치료", "증상", "복용", "수술", "병원", "진료", "부작용", "효능", "통증", "혈압", "당뇨", "건강", "검진", "예방", "섭취", "영양제"],
+    "legal": ["층간소음", "분쟁", "규약", "법률", "법적", "책임", "손해배상", "고소", "판례", "변호사", "소송", "합의", "민사", "형사", "위자료"],
+
+    # Academic source routing (search_academic)
+    "academic_gov": ["통계", "현황", "정책", "가이드라인", "지침", "법령", "보건소", "질병관리청", "stats", "policy", "guideline"],
+    "academic_clinical": ["증상", "치료법", "수술", "식이요법", "좋은 음식", "피해야", "symptom", "treatment", "died"],
+
+    # Korean life services (_inject_korean_services)
+    "shopping": ["살래", "사줘", "구매", "가격", "최저가", "쿠팡", "쇼핑", "얼마", "buy", "price", "cost"],
+    "map": ["어디", "위치", "가는길", "지도", "맛집", "근처", "주변", "병원", "약국", "map", "location", "nav"],
+    "booking": ["예약", "숙소", "펜션", "호텔", "식당", "회식", "booking", "reserve"],
+
+    # App deep links (_inject_app_actions)
+    "app_youtube": ["유튜브", "youtube"],
+    "app_kakaotalk": ["카카오톡", "카톡", "kakaotalk"],
+    "app_call": ["전화", "call"],
+    "app_sms": ["문자", "메시지", "sms"],
+    "app_tmap": ["티맵", "tmap"],
+
+    # Offline fallback topics (_get_mock_data)
+    "topic_health_center": ["보건소", "health center"],
+    "topic_diabetes": ["당뇨", "diabetes", "혈당", "인슐린", "insulin", "glucose"],
+    "topic_hypertension": ["고혈압", "hypertension"],
+    "topic_cold": ["감기", "독감", "cold", "flu", "기침", "열"],
+    "topic_naver": ["naver", "네이버"],
+
+    # Suggestion chip types (/api/suggest)
+    "suggest_tips": ["방법", "법", "how to", "guide", "tip"],
+    "suggest_map": ["병원", "근처", "near", "위치", "장소", "맛집"],
+    "suggest_info": ["가격", "비용", "price", "cost", "요금"],
+    "suggest_reco": ["추천", "recommend", "best", "top"],
+    "suggest_troubleshoot": ["오류", "고장", "error", "fix", "안돼"],
+}
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher: one pass over the text finds every occurrence of every pattern.
+    add() all patterns, build() once, then search() as often as needed.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # state -> [(pattern length, value)]
+
+    def add(self, pattern, value):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append((len(pattern), value))
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+        return self
+
+    def search(self, text):
+        """Yields (start, end, value) for every match, in order of end position."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, value in self.output[state]:
+                yield i + 1 - length, i + 1, value
+
+
+class Intents:
+    """Intents found in one text, with the keywords that triggered each."""
+
+    def __init__(self, matches):
+        self.matches = matches  # intent -> [keyword, ...]
+
+    def __contains__(self, intent):
+        return intent in self.matches
+
+    def __iter__(self):
+        return iter(self.matches)
+
+    def __repr__(self):
+        return f"Intents({sorted(self.matches)})"
+
+
+def _build_automaton():
+    automaton = AhoCorasick()
+    for intent, keywords in INTENTS.items():
+        for keyword in keywords:
+            automaton.add(keyword.lower(), (intent, keyword))
+    return automaton.build()
+
+
+_automaton = _build_automaton()
+
+
+@lru_cache(maxsize=2048)
+def classify(text):
+    """
+    All intents of a query in one automaton pass. Cached, so every stage of a request
+    (and every request for the same text) reuses the first result.
+    """
+    matches = {}
+    for _, _, (intent, keyword) in _automaton.search(text.lower()):
+        matches.setdefault(intent, []).append(keyword)
+    return Intents(matches)
@@ -0,0 +1,89 @@
+import time
+from collections import defaultdict, Counter
+
+
+class KeywordIndex:
+    """
+    Postings index over KnowledgeBase entries.
+    - keyword -> entry positions (candidates that share at least one keyword)
+    - exact query -> entry position
+    Fuzzy-only candidates come from NgramMatcher, which scores every entry in one batch.
+    Positions are offsets into KnowledgeBase.data, which is append-only.
+    """
+
+    def __init__(self, max_candidates=50, max_df=0.02):
+        self.max_candidates = max_candidates
+        self.max_df = max_df  # Keywords in more than this fraction of entries are ignored
+        self.keyword_postings = defaultdict(set)
+        self.exact = {}
+        self.size = 0
+
+        # Pruning metrics
+        self.lookups = 0
+        self.total_scored = 0
+        self.last_lookup = {}
+
+    def add(self, pos, query, keywords):
+        self.exact.setdefault(query, pos)
+        for kw in keywords:
+            self.keyword_postings[kw].add(pos)
+        self.size += 1
+
+    def lookup_exact(self, query):
+        return self.exact.get(query)
+
+    def candidates(self, query_keywords, fuzzy_candidates=()):
+        """
+        Returns the entry positions worth scoring: best keyword overlap first,
+        then the matcher's fuzzy candidates that aren't already included.
+        """
+        started = time.perf_counter()
+
+        # Terms that appear in a large share of entries carry no signal and cost the most to merge
+        df_limit = max(50, int(self.size * self.max_df))
+
+        keyword_hits = Counter()
+        frequent = []
+        for kw in query_keywords:
+            postings = self.keyword_postings.get(kw)
+            if postings and len(postings) <= df_limit:
+                keyword_hits.update(postings)
+            elif postings:
+                frequent.append(postings)
+
+        if not keyword_hits and frequent:
+            # Only common keywords matched: narrow down to entries sharing as many of them as possible
+            frequent.sort(key=len)
+            shared = frequent[0]
+            for postings in frequent[1:]:
+                narrowed = shared & postings
+                if narrowed:
+                    shared = narrowed
+            keyword_hits.update(sorted(shared, reverse=True)[:self.max_candidates])
+
+        selected = [pos for pos, _ in keyword_hits.most_common(self.max_candidates)]
+        seen = set(selected)
+        for pos in fuzzy_candidates:
+            if pos not in seen:
+                seen.add(pos)
+                selected.append(pos)
+
+        self.lookups += 1
+        self.total_scored += len(selected)
+        self.last_lookup = {
+            "entries": self.size,
+            "keyword_candidates": len(keyword_hits),
+            "fuzzy_candidates": len(fuzzy_candidates),
+            "scored": len(selected),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        return selected
+
+    def stats(self):
+        return {
+            "entries": self.size,
+            "keywords": len(self.keyword_postings),
+            "lookups": self.lookups,
+            "avg_scored_per_lookup": round(self.total_scored / self.lookups, 2) if self.lookups else 0,
+            "last_lookup": self.last_lookup,
+        }
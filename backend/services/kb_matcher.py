@@ -0,0 +1,228 @@
+import numpy as np
+from .hangul import normalize_tokens, decompose
+
+
+def query_features(text):
+    """
+    Sparse features for fuzzy matching:
+    - character bigrams of each particle-stripped token (word-level overlap)
+    - jamo trigrams (robust to typos and conjugation, e.g. "아파요" vs "아파")
+    """
+    features = set()
+    for token in normalize_tokens(text):
+        padded = f" {token} "
+        features.update(f"c:{padded[i:i + 2]}" for i in range(len(padded) - 1))
+        jamo = decompose(token)
+        features.update(f"j:{jamo[i:i + 3]}" for i in range(max(1, len(jamo) - 2)))
+    return features
+
+
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+
+
+class NgramMatcher:
+    """
+    TF-IDF weighted n-gram vectors for every KB query, stored as a column-sparse matrix
+    (indptr / rows / weights NumPy arrays). A lookup is one sparse matrix-vector product:
+    the postings of the query's features are gathered and summed with np.bincount,
+    which yields the cosine similarity against every stored query at once.
+
+    New rows go to a second, small sparse block (sorted feature ids / rows / weights) that is
+    scored with the same gather + bincount, until the matrix is rebuilt (when pending rows
+    exceed `rebuild_ratio` of the corpus, or `max_pending`).
+    """
+
+    def __init__(self, rebuild_ratio=0.1, min_rebuild=64, max_pending=1024):
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+        self.max_pending = max_pending  # Keeps the pending block (rebuilt on every add) small
+        self.vocab = {}
+        self.doc_features = []  # feature ids per row (kept for rebuilds)
+        self.pending = []       # row ids added since the last rebuild
+
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.built_rows = 0
+        self.rebuilds = 0
+
+        # Pending block, sorted by feature id (looked up with searchsorted)
+        self.pending_cols = np.zeros(0, dtype=np.int64)
+        self.pending_rows = np.zeros(0, dtype=np.int32)
+        self.pending_weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.doc_features)
+
+    def add(self, text):
+        self.add_many([text])
+
+    def add_many(self, texts):
+        for text in texts:
+            ids = []
+            for feature in query_features(text):
+                fid = self.vocab.get(feature)
+                if fid is None:
+                    fid = len(self.vocab)
+                    self.vocab[feature] = fid
+                ids.append(fid)
+            self.doc_features.append(ids)
+            self.pending.append(len(self.doc_features) - 1)
+
+        if len(self.pending) >= min(self.max_pending, max(self.min_rebuild, int(self.built_rows * self.rebuild_ratio))):
+            self.rebuild()
+        else:
+            self._build_pending()
+
+    def truncate(self, n_rows):
+        """Drops the rows from n_rows on (e.g. a partly applied add_many) and rebuilds."""
+        del self.doc_features[n_rows:]
+        self.pending = []
+        self.rebuild()
+
+    def _max_idf(self):
+        return float(self.idf.max()) if len(self.idf) else 1.0
+
+    def _build_pending(self):
+        """Pending rows weighted with the current idf (features unseen at build get the highest idf)."""
+        lengths = np.fromiter((len(self.doc_features[row]) for row in self.pending), dtype=np.int64, count=len(self.pending))
+        cols = np.fromiter((fid for row in self.pending for fid in self.doc_features[row]), dtype=np.int64, count=int(lengths.sum()))
+        local = np.repeat(np.arange(len(self.pending), dtype=np.int64), lengths)
+        idf = np.full(len(cols), self._max_idf(), dtype=np.float32)
+        known = cols < len(self.idf)
+        idf[known] = self.idf[cols[known]]
+        norms = np.sqrt(np.bincount(local, weights=idf * idf, minlength=len(self.pending)))
+        values = idf / np.where(norms > 0, norms, 1)[local]
+
+        order = np.argsort(cols, kind="stable")
+        self.pending_cols = cols[order]
+        self.pending_rows = np.asarray(self.pending, dtype=np.int32)[local[order]]
+        self.pending_weights = values[order].astype(np.float32)
+
+    def rebuild(self):
+        n_docs = len(self.doc_features)
+        n_features = len(self.vocab)
+        lengths = np.fromiter((len(f) for f in self.doc_features), dtype=np.int64, count=n_docs)
+        if n_docs == 0 or lengths.sum() == 0:
+            self.idf = np.zeros(0, dtype=np.float32)
+            self.indptr = np.zeros(1, dtype=np.int64)
+            self.rows = np.zeros(0, dtype=np.int32)
+            self.weights = np.zeros(0, dtype=np.float32)
+            self.built_rows = 0
+            self.pending = list(range(n_docs))  # Featureless rows (if any) never match
+            self._build_pending()
+            return
+
+        cols = np.fromiter((fid for f in self.doc_features for fid in f), dtype=np.int64, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+
+        df = np.bincount(cols, minlength=n_features)
+        idf = (np.log((n_docs + 1) / (df + 1)) + 1).astype(np.float32)
+
+        # L2-normalize each row of the (binary tf) x idf matrix
+        values = idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_docs))
+        values = values / np.where(norms > 0, norms, 1)[rows]
+
+        order = np.argsort(cols, kind="stable")
+        self.rows = rows[order]
+        self.weights = values[order].astype(np.float32)
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=n_features))))
+        self.idf = idf
+        self.built_rows = n_docs
+        self.pending = []
+        self._build_pending()
+        self.rebuilds += 1
+
+    def match(self, text):
+        """
+        (rows, similarities): cosine similarity of `text` against the stored queries sharing at
+        least one feature with it, rows ascending. The cost follows the postings touched, not the
+        corpus size. When the postings cover much of the corpus, rows is None and similarities
+        has one slot per stored query.
+        """
+        fids = [self.vocab[f] for f in query_features(text) if f in self.vocab]
+        if not fids:
+            return _EMPTY
+
+        # Unseen-at-build features get the highest idf of the current model
+        max_idf = self._max_idf()
+        q_idf = np.array([self.idf[fid] if fid < len(self.idf) else max_idf for fid in fids], dtype=np.float32)
+        q_weights = q_idf / np.linalg.norm(q_idf)
+
+        row_parts, val_parts = [], []
+        built_fids = [(i, fid) for i, fid in enumerate(fids) if fid < len(self.idf)]
+        if built_fids and self.built_rows:
+            starts = self.indptr[[fid for _, fid in built_fids]]
+            ends = self.indptr[[fid + 1 for _, fid in built_fids]]
+            row_parts += [self.rows[s:e] for s, e in zip(starts, ends)]
+            val_parts += [self.weights[s:e] * q_weights[i] for (i, _), s, e in zip(built_fids, starts, ends)]
+
+        # Rows added since the last rebuild: same gather over the pending block
+        if self.pending:
+            q_fids = np.asarray(fids, dtype=np.int64)
+            starts = np.searchsorted(self.pending_cols, q_fids, side="left")
+            ends = np.searchsorted(self.pending_cols, q_fids, side="right")
+            for i in np.nonzero(ends > starts)[0]:
+                row_parts.append(self.pending_rows[starts[i]:ends[i]])
+                val_parts.append(self.pending_weights[starts[i]:ends[i]] * q_weights[i])
+
+        if not row_parts:
+            return _EMPTY
+        rows = np.concatenate(row_parts)
+        vals = np.concatenate(val_parts)
+        n_docs = len(self.doc_features)
+        if len(rows) * 8 >= n_docs:
+            # Postings cover a good part of the corpus: one dense bincount is cheaper than sorting them
+            return None, np.bincount(rows, weights=vals, minlength=n_docs).astype(np.float32)
+        hit, inverse = np.unique(rows, return_inverse=True)
+        return hit, np.bincount(inverse, weights=vals).astype(np.float32)
+
+    def scores(self, text):
+        """Cosine similarity of `text` against every stored query (NumPy array, one slot per row)."""
+        rows, similarities = self.match(text)
+        if rows is None:
+            return similarities
+        scores = np.zeros(len(self.doc_features), dtype=np.float32)
+        scores[rows] = similarities
+        return scores
+
+    @staticmethod
+    def similarity_of(match, positions):
+        """Similarities of the given rows in a `match()` result (0 for rows it doesn't contain)."""
+        rows, similarities = match
+        if rows is None:
+            return similarities[np.asarray(positions, dtype=np.int64)]
+        result = np.zeros(len(positions), dtype=np.float32)
+        if len(rows):
+            positions = np.asarray(positions, dtype=np.int64)
+            idx = np.searchsorted(rows, positions).clip(max=len(rows) - 1)
+            found = rows[idx] == positions
+            result[found] = similarities[idx[found]]
+        return result
+
+    @staticmethod
+    def top_k(scores, k=20):
+        """
+        Returns [(row, score), ...] for the k best rows, best first, from a `scores()` array or a
+        `match()` result.
+        """
+        if isinstance(scores, tuple):
+            rows, scores = scores
+        else:
+            rows = None
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i] if rows is not None else i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def stats(self):
+        return {
+            "rows": len(self.doc_features),
+            "features": len(self.vocab),
+            "pending_rows": len(self.pending),
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,173 @@
+import os
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+
+class KnowledgeStore:
+    """
+    SQLite storage engine for the KnowledgeBase (WAL mode).
+    - One row per learned query. The UNIQUE index on `query` makes duplicate checks O(1).
+    - Appends are single-row INSERTs instead of rewriting the whole JSON file.
+    - WAL lets several uvicorn workers read while another one writes.
+    - `seq` grows monotonically, so readers can pull only the rows they haven't seen yet.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL,
+            query TEXT NOT NULL UNIQUE,
+            entry TEXT NOT NULL,
+            created_at TEXT
+        )
+    """
+
+    def __init__(self, db_path):
+        """
+        Raises OSError / sqlite3.Error when db_path cannot be created or written.
+        ":memory:" gives a store shared by this process's threads that is lost on exit.
+        """
+        self.path = db_path  # As requested (":memory:" for the in-memory store)
+        self.in_memory = db_path == ":memory:"
+        if self.in_memory:
+            self.db_path = f"file:kb-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        else:
+            self.db_path = db_path
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # sqlite3 connections must not be shared across threads (executor / to_thread callers)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(self.SCHEMA)
+        # Fail now rather than on the first save when the file exists but is read-only
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+        # A shared in-memory database lives as long as one connection to it stays open
+        self._keepalive = conn
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None, uri=self.in_memory)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def insert(self, entry):
+        """
+        Insert an entry. Returns False (and writes nothing) if the query already exists.
+        """
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO entries (id, query, entry, created_at) VALUES (?, ?, ?, ?)",
+            (entry["id"], entry["query"], json.dumps(entry, ensure_ascii=False), entry.get("created_at")),
+        )
+        return cursor.rowcount == 1
+
+    def insert_many(self, entries):
+        """Bulk insert inside one transaction. Returns the number of new rows."""
+        conn = self._connect()
+        inserted = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for entry in entries:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO entries (id, query, entry, created_at) VALUES (?, ?, ?, ?)",
+                    (entry["id"], entry["query"], json.dumps(entry, ensure_ascii=False), entry.get("created_at")),
+                )
+                inserted += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def exists(self, query):
+        row = self._connect().execute("SELECT 1 FROM entries WHERE query = ?", (query,)).fetchone()
+        return row is not None
+
+    def get(self, query):
+        row = self._connect().execute("SELECT entry FROM entries WHERE query = ?", (query,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def last_seq(self):
+        row = self._connect().execute("SELECT MAX(seq) FROM entries").fetchone()
+        return row[0] or 0
+
+    def load_since(self, seq=0):
+        """Returns [(seq, entry), ...] for every row newer than `seq`, oldest first."""
+        rows = self._connect().execute(
+            "SELECT seq, entry FROM entries WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def open_store(db_paths, require_persistent=False):
+    """
+    KnowledgeStore at the first of db_paths that can be created and written. Falls back to an
+    in-memory store (learned answers last until restart) when none can, e.g. on a read-only
+    serverless filesystem, or raises RuntimeError instead with require_persistent.
+    """
+    for i, path in enumerate(db_paths):
+        try:
+            store = KnowledgeStore(path)
+            if i:
+                print(f"⚠️ [KnowledgeStore] Using fallback location {path}")
+            return store
+        except (OSError, sqlite3.Error) as e:
+            print(f"[KnowledgeStore] Cannot use {path}: {e}")
+    if require_persistent:
+        raise RuntimeError(f"[KnowledgeStore] No writable location among {', '.join(db_paths)}")
+    print("❌ [KnowledgeStore] No writable location, using an IN-MEMORY store: learned answers are lost on restart "
+          "and not shared between workers (set KB_DB_PATH, or KB_REQUIRE_PERSISTENT=true to fail instead)")
+    return KnowledgeStore(":memory:")
+
+
+def normalize_legacy_entry(item):
+    """
+    Legacy JSON rows only have query/answer/sources/images/timestamp.
+    Fill in the fields that save_interaction writes today.
+    """
+    now = datetime.now().isoformat()
+    entry = dict(item)
+    entry.setdefault("id", str(uuid.uuid4()))
+    entry.setdefault("category", "general")
+    entry.setdefault("answer", "")
+    entry.setdefault("sources", [])
+    entry.setdefault("images", [])
+    entry.setdefault("related_questions", [])
+    created_at = entry.get("created_at") or (f"{entry['timestamp']}T00:00:00" if entry.get("timestamp") else now)
+    entry.setdefault("created_at", created_at)
+    entry.setdefault("updated_at", created_at)
+    entry.setdefault("timestamp", created_at[:10])
+    return entry
+
+
+def migrate_json(store, json_paths):
+    """
+    Import legacy knowledge_base JSON files into the store.
+    Files are imported in order, so the first file wins when the same query appears twice.
+    Safe to run repeatedly (existing queries are skipped).
+    """
+    total = 0
+    for path in json_paths:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception as e:
+            print(f"[KnowledgeStore] Skipping {path}: {e}")
+            continue
+
+        entries = [normalize_legacy_entry(item) for item in items if isinstance(item, dict) and item.get("query")]
+        inserted = store.insert_many(entries)
+        print(f"[KnowledgeStore] Migrated {inserted}/{len(entries)} entries from {os.path.basename(path)}")
+        total += inserted
+    return total
@@ -0,0 +1,207 @@
+import os
+import json
+import math
+import time
+import asyncio
+import hashlib
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from .http_client import http_clients
+
+# Public Data Portal feeds (paths under KDCA_BASE_URL). Replace the whole list with KDCA_FEEDS
+# (JSON list of {"name", "path", "kind", "params"}) when the portal moves a service.
+DEFAULT_FEEDS = [
+    {"name": "covid", "path": "/1352000/ODMS_COVID_04/callCovid04Api", "kind": "covid", "params": {"apiType": "JSON"}},
+    {"name": "infectious_disease", "path": "/1790387/EIDAPIService/Disease", "kind": "disease", "params": {}},
+    {"name": "notices", "path": "/1790387/kdcaNotice/getNoticeList", "kind": "notice", "params": {}},
+]
+
+# Field names differ between feeds (and between versions of the same feed)
+DISEASE_FIELDS = ("icdNm", "diseaseNm", "dissNm", "disease")
+COUNT_FIELDS = ("incDec", "resultVal", "patntCnt", "cnt")
+DATE_FIELDS = ("stateDt", "occrrncDt", "baseDt", "regDt", "createDt", "date")
+ID_FIELDS = ("seq", "id", "sn", "nttId")
+OK_RESULT_CODES = {"00", "0", "000", "INFO-000"}
+
+
+class FeedError(Exception):
+    pass
+
+
+def _first(item, fields, default=""):
+    for field in fields:
+        value = item.get(field)
+        if value not in (None, ""):
+            return value
+    return default
+
+
+def _format_date(value):
+    value = str(value).strip()
+    if len(value) >= 8 and value[:8].isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+    return value[:10] if value else datetime.now().strftime("%Y-%m-%d")
+
+
+def _to_int(value):
+    try:
+        return int(str(value).replace(",", ""))
+    except ValueError:
+        return 0
+
+
+def normalize_item(feed, item):
+    """One raw feed item -> a row of the alert table."""
+    kind = feed["kind"]
+    raw_id = _first(item, ID_FIELDS)
+    if raw_id == "":
+        raw_id = hashlib.sha1(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    row = {
+        "id": f"{feed['name']}:{raw_id}",
+        "feed": feed["name"],
+        "kind": kind,
+        "date": _format_date(_first(item, DATE_FIELDS)),
+        "url": item.get("url") or item.get("link") or "",
+    }
+    if kind == "covid":
+        count = _to_int(_first(item, COUNT_FIELDS, "0"))
+        row.update({
+            "disease": "코로나19 (COVID-19)",
+            "level": "발생",
+            "level_color": "red" if count > 1000 else "orange",
+            "message": f"일일 확진자: {item.get('incDec', '0')}명 / 누적: {item.get('defCnt', '0')}명",
+        })
+    elif kind == "notice":
+        row.update({
+            "disease": "질병관리청 공지",
+            "level": "공지",
+            "level_color": "blue",
+            "message": item.get("title") or item.get("sj") or "",
+        })
+    else:
+        count = _first(item, COUNT_FIELDS, "0")
+        row.update({
+            "disease": _first(item, DISEASE_FIELDS, "감염병"),
+            "level": "발생",
+            "level_color": "orange",
+            "message": f"신고 환자: {count}명",
+        })
+    return row
+
+
+class KdcaAggregator:
+    """
+    Fetches every KDCA feed concurrently (at most KDCA_MAX_CONCURRENCY requests in flight across
+    feeds and pages) and merges them into one normalized alert table, newest first.
+    - XML bodies (the portal's default, and its error format even when JSON was requested) are
+      parsed while they stream in (XMLPullParser); each <item> is released once read
+    - JSON bodies have no incremental parser in the stdlib and are decoded per page (pages are
+      bounded by KDCA_PAGE_SIZE)
+    - page 1 gives totalCount; the remaining pages (up to KDCA_MAX_PAGES) are fetched in parallel
+    A failing feed is logged and left out; the others still make the table.
+    """
+
+    def __init__(self, api_key, feeds=None):
+        self.api_key = api_key
+        self.feeds = feeds or (json.loads(os.environ["KDCA_FEEDS"]) if os.getenv("KDCA_FEEDS") else DEFAULT_FEEDS)
+        self.max_concurrency = int(os.getenv("KDCA_MAX_CONCURRENCY", "4"))
+        self.page_size = int(os.getenv("KDCA_PAGE_SIZE", "100"))
+        self.max_pages = int(os.getenv("KDCA_MAX_PAGES", "5"))
+        self.feed_stats = {}  # feed -> outcome of the last run
+
+    async def _fetch_page(self, semaphore, feed, page):
+        """(raw items, totalCount) of one page."""
+        params = {"serviceKey": self.api_key, "pageNo": str(page), "numOfRows": str(self.page_size), **feed.get("params", {})}
+        async with semaphore:
+            client = http_clients.get("kdca")
+            async with client.stream("GET", feed["path"], params=params) as response:
+                response.raise_for_status()
+                parser = None
+                buffered = []
+                async for chunk in response.aiter_bytes():
+                    if parser is None and not buffered:
+                        head = chunk.lstrip()
+                        if not head:
+                            continue
+                        if head[:1] == b"<":
+                            parser = _XmlPageParser()
+                    if parser is not None:
+                        parser.feed(chunk)
+                    else:
+                        buffered.append(chunk)
+        if parser is not None:
+            return parser.close()
+        return _parse_json_page(b"".join(buffered))
+
+    async def _fetch_feed(self, semaphore, feed):
+        items, total = await self._fetch_page(semaphore, feed, 1)
+        pages = min(self.max_pages, max(1, math.ceil(total / self.page_size)))
+        if pages > 1:
+            rest = await asyncio.gather(*(self._fetch_page(semaphore, feed, page) for page in range(2, pages + 1)))
+            for page_items, _ in rest:
+                items.extend(page_items)
+        return [normalize_item(feed, item) for item in items]
+
+    async def _timed_feed(self, semaphore, feed):
+        started = time.perf_counter()
+        try:
+            rows = await self._fetch_feed(semaphore, feed)
+            self.feed_stats[feed["name"]] = {"ok": True, "rows": len(rows), "ms": round((time.perf_counter() - started) * 1000)}
+            return rows
+        except Exception as e:
+            print(f"[KDCA] Feed {feed['name']} failed: {e!r}")
+            self.feed_stats[feed["name"]] = {"ok": False, "error": repr(e)[:200], "ms": round((time.perf_counter() - started) * 1000)}
+            return []
+
+    async def fetch_all(self):
+        """Merged alert table (empty when every feed failed)."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._timed_feed(semaphore, feed) for feed in self.feeds))
+        table = {}
+        for rows in results:
+            for row in rows:
+                table.setdefault(row["id"], row)
+        return sorted(table.values(), key=lambda row: row["date"], reverse=True)
+
+
+class _XmlPageParser:
+    """Incremental parser for data.go.kr XML: collects <item> dicts, totalCount and result codes."""
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("end",))
+        self.items = []
+        self.fields = {}
+
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+        for _, elem in self.parser.read_events():
+            if elem.tag == "item":
+                self.items.append({child.tag: (child.text or "").strip() for child in elem})
+                elem.clear()
+            elif elem.tag in ("totalCount", "resultCode", "resultMsg", "returnAuthMsg", "returnReasonCode"):
+                self.fields[elem.tag] = (elem.text or "").strip()
+
+    def close(self):
+        self.parser.close()
+        if "returnReasonCode" in self.fields:
+            raise FeedError(self.fields.get("returnAuthMsg") or self.fields["returnReasonCode"])
+        code = self.fields.get("resultCode")
+        if code and code not in OK_RESULT_CODES:
+            raise FeedError(f"{code} {self.fields.get('resultMsg', '')}".strip())
+        return self.items, _to_int(self.fields.get("totalCount", len(self.items)))
+
+
+def _parse_json_page(body):
+    data = json.loads(body)
+    response = data.get("response", data)
+    header = response.get("header", {})
+    code = str(header.get("resultCode", "00"))
+    if code not in OK_RESULT_CODES:
+        raise FeedError(f"{code} {header.get('resultMsg', '')}".strip())
+    body = response.get("body", {})
+    items = body.get("items") or []
+    if isinstance(items, dict):
+        items = items.get("item") or []
+    if isinstance(items, dict):
+        items = [items]
+    return list(items), _to_int(body.get("totalCount", len(items)))
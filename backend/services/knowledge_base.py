@@ -1,45 +1,88 @@
 import os
-import json
-import difflib
+import asyncio
+import tempfile
+import threading
 import uuid
 from datetime import datetime
+from .kb_store import open_store, migrate_json
+from .kb_index import KeywordIndex
+from .kb_matcher import NgramMatcher
+from .hangul import normalize_tokens
 
 class KnowledgeBase:
-    def __init__(self, data_file='data/knowledge_base.json'):
-        self.data_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), data_file)
-        self.data = self._load_data()
+    def __init__(self, data_file='data/knowledge_base.json', backup_file='data/knowledge_base_backup.json'):
+        base_dir = os.path.dirname(os.path.dirname(__file__))
+        self.data_file = os.path.join(base_dir, data_file)
+        self.backup_file = os.path.join(base_dir, backup_file)
+        self.db_file = os.getenv("KB_DB_PATH") or os.path.join(base_dir, 'data/knowledge_base.db')
+
+        # data/ is read-only on serverless deployments (only the temp dir is writable)
+        self.store = open_store(
+            [self.db_file, os.path.join(tempfile.gettempdir(), 'ansimssi', 'knowledge_base.db')],
+            require_persistent=os.getenv("KB_REQUIRE_PERSISTENT", "false").lower() == "true"
+        )
+        if self.store.count() == 0:
+            # First boot on the SQLite engine: import the legacy JSON files
+            migrate_json(self.store, [self.data_file, self.backup_file])
+
+        # Above this many entries, async lookups run on a worker thread
+        self.offload_min_entries = int(os.getenv("KB_OFFLOAD_MIN_ENTRIES", "2000"))
+
+        self.data = []
+        self.index = KeywordIndex()
+        self.matcher = NgramMatcher()
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        # Called with the entries each sync adds (e.g. to keep the typeahead index current)
+        self.on_new_entries = []
+        self._load_data()
 
     def _load_data(self):
-        if not os.path.exists(self.data_file):
-            # Create empty file if not exists
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-            return []
-        
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading knowledge base: {e}")
-            return []
+        """
+        Incrementally pull rows written since the last sync (by this or another worker)
+        and add them to the keyword index. Cheap when nothing changed: a single MAX(seq) lookup.
+        """
+        with self._lock:
+            try:
+                if self.store.last_seq() <= self._last_seq:
+                    return self.data
+                rows = self.store.load_since(self._last_seq)
+                entries = [entry for _, entry in rows]
+                for entry in entries:
+                    # Stored keywords may come from the old whitespace tokenizer (or be missing)
+                    entry['keywords'] = self._extract_keywords(entry['query'])
+                try:
+                    self.matcher.add_many([entry['query'] for entry in entries])
+                except Exception:
+                    self.matcher.truncate(len(self.data))  # Matcher rows stay aligned with self.data
+                    raise
+                for entry in entries:
+                    self.index.add(len(self.data), entry['query'], entry['keywords'])
+                    self.data.append(entry)
+                # Only now: a failed sync is retried from the same rows
+                if rows:
+                    self._last_seq = rows[-1][0]
+                for listener in self.on_new_entries:
+                    listener(entries)
+            except Exception as e:
+                print(f"Error loading knowledge base: {e}")
+            return self.data
 
     def _extract_keywords(self, text):
-        """Simple keyword extraction (split by space)"""
+        """Keyword extraction: whitespace tokens with Korean particles stripped ("감기가" -> "감기")"""
         if not text:
             return []
-        # Basic tokenization: split by space and filter short words
-        return [w for w in text.split() if len(w) > 1]
+        # Filter on the raw token length so one-syllable nouns survive ("약을" -> "약")
+        return normalize_tokens(" ".join(w for w in text.split() if len(w) > 1))
 
     def save_interaction(self, query, response_data):
         """
         Save a successful interaction to the knowledge base.
-        response_data should contain 'answer', 'sources', 'images'.
+        response_data should contain 'answer', 'sources', 'images' (and optionally 'academic').
         """
-        # Check if similar query already exists to avoid duplicates
-        for item in self.data:
-            if item['query'] == query:
-                return # Already exists
+        # Check if the query already exists to avoid duplicates (O(1) via the UNIQUE index)
+        if self.store.exists(query):
+            return # Already exists
 
         entry = {
             "id": str(uuid.uuid4()),
@@ -47,66 +90,103 @@ class KnowledgeBase:
             "keywords": self._extract_keywords(query),
             "query": query,
             "answer": response_data.get('answer', ''),
-            "sources": response_data.get('sources', []),
+            # Web pages only: app action cards (tel:, sms:, app schemes) never reach the shared KB
+            "sources": [src for src in response_data.get('sources', []) if str(src.get('url', '')).startswith(("http://", "https://"))],
             "images": response_data.get('images', []),
+            "academic": response_data.get('academic', []),
             "related_questions": [],
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
             "timestamp": datetime.now().strftime("%Y-%m-%d") # Keep for backward compatibility
         }
         
-        self.data.append(entry)
-        
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-            print(f"[KnowledgeBase] Learned new information for: {query}")
+            if self.store.insert(entry):
+                self._load_data()
+                print(f"[KnowledgeBase] Learned new information for: {query}")
         except Exception as e:
             print(f"Error saving to knowledge base: {e}")
 
+    async def _offload(self, fn, *args):
+        """Large corpora are scored on a worker thread so the event loop keeps serving other requests."""
+        if len(self.data) >= self.offload_min_entries:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def find_match_async(self, query):
+        return await self._offload(self.find_match, query)
+
+    async def find_similar_async(self, query, threshold):
+        return await self._offload(self.find_similar, query, threshold)
+
+    def find_similar(self, query, threshold):
+        """
+        Nearest stored query by TF-IDF n-gram cosine only (no keyword bonus).
+        Returns (entry, similarity) when similarity >= threshold, else (None, best_similarity).
+        """
+        self._load_data()
+        if not self.data:
+            return None, 0.0
+
+        with self._lock:
+            exact_pos = self.index.lookup_exact(query)
+            if exact_pos is not None:
+                return self.data[exact_pos], 1.0
+            top = self.matcher.top_k(self.matcher.match(query), k=1)
+        if not top:
+            return None, 0.0
+        pos, similarity = top[0]
+        if similarity >= threshold:
+            return self.data[pos], similarity
+        return None, similarity
+
     def find_match(self, query):
         """
         Find a matching result in the knowledge base using a scoring system.
         Returns the best matching data object or None.
         """
-        # Reload data to ensure freshness (Dev Mode optimization)
-        self.data = self._load_data()
+        # Pick up entries learned by other workers since the last lookup
+        self._load_data()
         
         if not self.data:
             return None
 
+        print(f"[KnowledgeBase] Searching for: {query}")
+
         query_keywords = set(self._extract_keywords(query))
         best_score = 0
         best_match = None
 
-        print(f"[KnowledgeBase] Searching for: {query}")
-
-        for item in self.data:
-            score = 0
-            item_query = item['query']
-            
+        # Index, matcher and data are read under the lock that _load_data updates them with
+        with self._lock:
             # 1. Exact Match (Highest Priority)
-            if item_query == query:
+            exact_pos = self.index.lookup_exact(query)
+            if exact_pos is not None:
                 print(f"[KnowledgeBase] Exact match found for: {query}")
-                return item
-            
-            # 2. Keyword Intersection (Significant weight)
-            item_keywords = set(item.get('keywords', []))
-            # If keywords are missing in legacy data, extract on the fly
-            if not item_keywords:
-                item_keywords = set(self._extract_keywords(item_query))
-            
-            common_keywords = query_keywords.intersection(item_keywords)
-            score += len(common_keywords) * 10 
-            
-            # 3. Fuzzy Similarity (Tie-breaker and nuance)
-            ratio = difflib.SequenceMatcher(None, query, item_query).ratio()
-            score += ratio * 20 # Max 20 points for perfect string match
-            
-            # Thresholding
-            if score > best_score:
-                best_score = score
-                best_match = item
+                return self.data[exact_pos]
+
+            # Fuzzy similarity against the entries sharing an n-gram with the query, in one batch
+            match = self.matcher.match(query)
+            fuzzy_candidates = [pos for pos, _ in self.matcher.top_k(match, k=20)]
+
+            # Only entries sharing a keyword or close in n-gram space are scored
+            candidates = self.index.candidates(query_keywords, fuzzy_candidates)
+            similarities = self.matcher.similarity_of(match, candidates)
+            for pos, similarity in zip(candidates, similarities):
+                item = self.data[pos]
+                score = 0
+
+                # 2. Keyword Intersection (Significant weight)
+                common_keywords = query_keywords.intersection(item['keywords'])
+                score += len(common_keywords) * 10
+
+                # 3. Fuzzy Similarity (Tie-breaker and nuance)
+                score += float(similarity) * 20 # Max 20 points for an identical n-gram profile
+
+                # Thresholding
+                if score > best_score:
+                    best_score = score
+                    best_match = item
 
         # Determine if the best match is good enough
         # Minimum score requirement: e.g., at least one keyword match (10) or very high fuzzy (0.5 * 20 = 10)
@@ -118,3 +198,12 @@ class KnowledgeBase:
         
         print(f"[KnowledgeBase] No suitable match found. Best score was {best_score:.2f}")
         return None
+
+    def stats(self):
+        """Index size and candidate pruning metrics (exposed via /api/admin/stats)."""
+        return {
+            **self.index.stats(),
+            "matcher": self.matcher.stats(),
+            # in_memory: no writable location was found, learned answers are lost on restart
+            "store": {"path": self.store.path, "in_memory": self.store.in_memory, "fallback": self.store.path != self.db_file},
+        }
@@ -0,0 +1,95 @@
+import os
+import time
+from .bm25 import BM25Index
+
+
+def split_passages(text, max_chars=500):
+    """Paragraph-sized passages of a long answer."""
+    passages = []
+    current = ""
+    for paragraph in (p.strip() for p in text.split("\n")):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+
+class LocalRetriever:
+    """
+    BM25 retrieval over trusted local text, answered in-process before any provider call:
+    - data/medical_data.json facts (always; their keyword lists are weighted as a field)
+    - stored KnowledgeBase answers split into passages (RAG_INCLUDE_KB=true), kept current as
+      entries sync in
+    Passages scoring below RAG_MIN_SCORE (absolute BM25; tuned for medical_data, raise it with
+    RAG_INCLUDE_KB) or below half of the best passage are left out, so unrelated questions get no
+    local context.
+    """
+
+    def __init__(self, medical_facts, knowledge_base=None):
+        self.min_score = float(os.getenv("RAG_MIN_SCORE", "3.0"))
+        self.max_passages = int(os.getenv("RAG_MAX_PASSAGES", "3"))
+        self.min_relative = 0.5
+        self.include_kb = os.getenv("RAG_INCLUDE_KB", "false").lower() == "true"
+        self.index = BM25Index()
+        self.passages = []  # doc id -> (source, text)
+
+        for entry in medical_facts.entries:
+            self._add(f"medical_data:{entry['id']}", entry['content'], entry.get('keywords', []))
+        if self.include_kb and knowledge_base is not None:
+            self.add_kb_entries(knowledge_base.data)
+            knowledge_base.on_new_entries.append(self.add_kb_entries)
+
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+
+    def _add(self, source, text, keywords=()):
+        self.passages.append((source, text))
+        self.index.add(text, keywords)
+
+    def add_kb_entries(self, entries):
+        for entry in entries:
+            for passage in split_passages(entry.get('answer') or ""):
+                self._add(f"kb:{entry['query']}", passage, [entry['query']])
+
+    def retrieve(self, query, limit=None):
+        """[(score, source, text)] best first."""
+        started = time.perf_counter()
+        limit = limit or self.max_passages
+        found = []
+        sources = set()
+        for score, doc in self.index.search(query, limit * 3):
+            source, text = self.passages[doc]
+            if score < self.min_score or (found and score < found[0][0] * self.min_relative):
+                break
+            if source in sources:
+                continue  # One passage per fact / KB entry
+            sources.add(source)
+            found.append((score, source, text))
+            if len(found) == limit:
+                break
+        self.lookups += 1
+        self.hits += bool(found)
+        self.lookup_seconds += time.perf_counter() - started
+        return found
+
+    def context_for(self, query, limit=None):
+        """Prompt-ready block of the best passages ("" when nothing relevant is stored)."""
+        found = self.retrieve(query, limit)
+        if not found:
+            return ""
+        return "=== TRUSTED LOCAL FACTS ===\n" + "\n\n".join(text for _, _, text in found)
+
+    def stats(self):
+        return {
+            "passages": len(self.passages),
+            "include_kb": self.include_kb,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "avg_us": round(self.lookup_seconds / self.lookups * 1e6, 1) if self.lookups else 0,
+        }
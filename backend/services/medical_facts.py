@@ -0,0 +1,24 @@
+import os
+import json
+
+
+class MedicalFacts:
+    """
+    Curated health/safety facts from data/medical_data.json (KDCA guidelines, service intro).
+    Retrieval over them is done by LocalRetriever (BM25); the keyword lists also feed the typeahead.
+    """
+
+    def __init__(self, data_file='data/medical_data.json'):
+        base_dir = os.path.dirname(os.path.dirname(__file__))
+        self.data_file = os.path.join(base_dir, data_file)
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            print(f"[MedicalFacts] Loaded {len(entries)} entries")
+            return entries
+        except Exception as e:
+            print(f"[MedicalFacts] Load failed: {e}")
+            return []
@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+
+
+class PromptCache:
+    """
+    In-process cache of the admin-edited system prompt.
+    loader: sync function returning (content, updated_at) or None when no prompt is stored.
+
+    - Served from memory; after `ttl` seconds it is re-read in the background (stale-while-revalidate),
+      which also picks up edits saved through another instance.
+    - invalidate() (called by the admin PromptEditor on save) re-reads it immediately.
+    - A slow or failing Supabase never blocks a request for more than `timeout` seconds and
+      keeps the last good prompt (or the built-in default).
+    """
+
+    def __init__(self, loader, default):
+        self.loader = loader
+        self.default = default
+        self.ttl = float(os.getenv("PROMPT_CACHE_TTL", "60"))
+        self.timeout = float(os.getenv("PROMPT_FETCH_TIMEOUT", "1.5"))
+        self.retry_after = 15.0
+
+        self.prompt = None
+        self.version = None  # updated_at of the stored row ("default" when none is stored)
+        self.next_refresh = 0.0
+        self._refreshing = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.invalidations = 0
+
+    async def get(self):
+        if self.prompt is None and self.next_refresh == 0.0:
+            await self.refresh()  # First request: nothing to serve yet
+        elif time.monotonic() >= self.next_refresh and self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self.refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        return self.prompt or self.default
+
+    def _refresh_done(self, task):
+        self._refreshing = None
+
+    async def refresh(self):
+        self.refreshes += 1
+        try:
+            row = await asyncio.wait_for(asyncio.to_thread(self.loader), self.timeout)
+        except Exception as e:
+            self.failures += 1
+            self.next_refresh = time.monotonic() + self.retry_after
+            print(f"DB Prompt Fetch Error (keeping version {self.version}): {e!r}")
+            return False
+
+        if row:
+            content, updated_at = row
+            if content != self.prompt:
+                print(f"loaded system prompt from DB (version {updated_at})")
+            self.prompt, self.version = content, updated_at
+        else:
+            self.prompt, self.version = None, "default"
+        self.next_refresh = time.monotonic() + self.ttl
+        return True
+
+    async def invalidate(self):
+        self.invalidations += 1
+        return await self.refresh()
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "cached": self.prompt is not None,
+            "ttl": self.ttl,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,272 @@
+import os
+import time
+import asyncio
+from collections import deque
+
+
+class ProviderStats:
+    """Rolling window of (latency, result count) samples for one provider."""
+
+    def __init__(self, window=50):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.timeouts = 0
+        self.skipped = 0
+
+    def record(self, latency, n_results, timed_out=False):
+        self.samples.append((latency, n_results, timed_out))
+        if timed_out:
+            self.timeouts += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        latencies = sorted(s[0] for s in self.samples)
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    def avg_yield(self):
+        if not self.samples:
+            return 0.0
+        return sum(s[1] for s in self.samples) / len(self.samples)
+
+    def timeout_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for s in self.samples if s[2]) / len(self.samples)
+
+    def p_arrival(self, elapsed, deadline):
+        """P(latency <= deadline | latency > elapsed) from the completed samples."""
+        later = [s for s in self.samples if s[0] > elapsed]
+        if not later:
+            return 0.0
+        return sum(1 for s in later if s[0] <= deadline and not s[2]) / len(later)
+
+    def to_dict(self):
+        return {
+            "samples": len(self.samples),
+            "requests": self.requests,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "avg_yield": round(self.avg_yield(), 2),
+            "timeout_rate": round(self.timeout_rate(), 2),
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+        }
+
+
+class ProviderScheduler:
+    """
+    Decides how long SearchManager waits for its providers.
+
+    fixed:    the original voice strategy - wait 4.0s, and if fewer than 4 results arrived, 4.0s more.
+    adaptive: per-request soft deadline from each provider's rolling p90 latency, extended to the
+              hard deadline only while results are thin. Stops early once enough results arrived
+              and the expected extra yield from the providers still running is small.
+              Chronically slow providers are skipped (with periodic probes), and backup providers
+              are hedged in when the primaries look thin.
+    """
+
+    def __init__(self):
+        self.mode = os.getenv("SEARCH_SCHEDULER_MODE", "adaptive")
+        self.target_yield = int(os.getenv("SEARCH_TARGET_YIELD", "4"))
+        self.fixed_wave = float(os.getenv("SEARCH_FIXED_WAVE_SECONDS", "4.0"))
+        self.min_deadline = float(os.getenv("SEARCH_MIN_DEADLINE", "1.0"))
+        self.max_deadline = float(os.getenv("SEARCH_MAX_DEADLINE", "8.0"))
+        self.min_expected_gain = float(os.getenv("SEARCH_MIN_EXPECTED_GAIN", "1.5"))
+        self.min_samples = 5
+        self.deadline_slack = 1.25  # Lets the deadline grow again after censored (timed out) samples
+        self.probe_every = 10       # Chronically slow providers still get 1 in N requests
+        self.check_interval = 0.25
+        self.providers = {}
+        self._draining = set()
+        self.on_timeout = None  # Optional hook(name), e.g. to count timeouts against a circuit breaker
+
+    def stats_for(self, name):
+        if name not in self.providers:
+            self.providers[name] = ProviderStats()
+        return self.providers[name]
+
+    def record(self, name, latency, n_results, timed_out=False):
+        self.stats_for(name).record(latency, n_results, timed_out)
+
+    def _timed_out(self, name, elapsed):
+        self.record(name, elapsed, 0, timed_out=True)
+        if self.on_timeout:
+            self.on_timeout(name)
+
+    def is_chronically_slow(self, name):
+        stats = self.stats_for(name)
+        if len(stats.samples) < self.min_samples:
+            return False
+        return stats.timeout_rate() > 0.8 or (stats.percentile(0.5) or 0) > self.max_deadline
+
+    def soft_deadline(self, names):
+        p90s = []
+        for name in names:
+            stats = self.stats_for(name)
+            if len(stats.samples) < self.min_samples:
+                return self.fixed_wave  # Cold start: behave like the fixed first wave
+            p90s.append(stats.percentile(0.9) * self.deadline_slack)
+        if not p90s:
+            return self.fixed_wave
+        return min(self.max_deadline, max(self.min_deadline, max(p90s)))
+
+    def expected_gain(self, running, elapsed, deadline):
+        gain = 0.0
+        for name in running.values():
+            stats = self.stats_for(name)
+            if len(stats.samples) < self.min_samples:
+                gain += self.target_yield  # Unknown provider: assume it's worth waiting for
+            else:
+                gain += stats.p_arrival(elapsed, deadline) * stats.avg_yield()
+        return gain
+
+    async def run(self, providers, backups=None, on_result=None):
+        """
+        providers / backups: {name: coroutine function returning a provider result dict or None}
+        on_result: optional hook(result) called as soon as each non-empty result is collected
+        Returns the completed provider results (non-empty ones), in completion order.
+        """
+        backups = backups or {}
+        if self.mode == "fixed":
+            return await self._run_fixed(providers, on_result)
+
+        active = {}
+        for name, fn in providers.items():
+            stats = self.stats_for(name)
+            stats.requests += 1
+            if self.is_chronically_slow(name) and stats.requests % self.probe_every != 0:
+                stats.skipped += 1
+                print(f"🐢 Skipping chronically slow provider: {name}")
+                continue
+            active[name] = fn
+        if not active and backups:
+            # Every primary is being skipped: go straight to the backups
+            active, backups = dict(backups), {}
+
+        started = time.monotonic()
+        soft = self.soft_deadline(active)
+        hard = max(soft, self.max_deadline)
+        hedge_at = soft / 2
+        running = {asyncio.create_task(fn()): name for name, fn in active.items()}
+        collected = []
+        collected_yield = 0
+
+        while running or (backups and collected_yield < self.target_yield):
+            elapsed = time.monotonic() - started
+            deadline = soft if collected_yield >= self.target_yield else hard
+            if elapsed >= deadline:
+                break
+
+            # Enough results: stop as soon as waiting is unlikely to add much
+            if collected_yield >= self.target_yield and self.expected_gain(running, elapsed, deadline) < self.min_expected_gain:
+                print(f"⚡️ Scheduler early exit: {collected_yield} results in {elapsed:.2f}s")
+                break
+
+            # Thin, but nothing still running is expected to arrive before the hard deadline
+            warm = all(len(self.stats_for(name).samples) >= self.min_samples for name in running.values())
+            if elapsed >= soft and warm and not backups and self.expected_gain(running, elapsed, hard) == 0:
+                print(f"⏹️ Scheduler stop: remaining providers unlikely to answer before {hard:.1f}s")
+                break
+
+            # Thin so far: hedge with the backup providers
+            if backups and collected_yield < self.target_yield and (elapsed >= hedge_at or not running):
+                print(f"🛡️ Hedging with backups: {', '.join(backups)}")
+                for name, fn in backups.items():
+                    self.stats_for(name).requests += 1
+                    running[asyncio.create_task(fn())] = name
+                backups = {}
+
+            wake_at = min(deadline, hedge_at) if backups and hedge_at > elapsed else deadline
+            done, _ = await asyncio.wait(
+                list(running), timeout=max(0.01, min(self.check_interval, wake_at - elapsed)), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                running.pop(task)
+                try:
+                    res = task.result()
+                except Exception as e:
+                    print(f"Task Error during aggregation: {e}")
+                    continue
+                if res and res.get('results'):
+                    collected.append(res)
+                    collected_yield += len(res['results'])
+                    if on_result:
+                        on_result(res)
+
+        # Stragglers keep running in the background until the hard deadline, so their real latency
+        # is still recorded (and their results still land in the result cache)
+        if running:
+            drain = asyncio.create_task(self._drain(running, started, hard))
+            self._draining.add(drain)
+            drain.add_done_callback(self._draining.discard)
+
+        return collected
+
+    async def _drain(self, running, started, hard):
+        remaining = hard - (time.monotonic() - started)
+        if remaining > 0:
+            _, pending = await asyncio.wait(list(running), timeout=remaining)
+        else:
+            pending = set(running)
+        # Still running at the hard deadline: record the censored latency as a timeout
+        elapsed = time.monotonic() - started
+        for task in pending:
+            task.cancel()
+            self._timed_out(running[task], elapsed)
+
+    async def _run_fixed(self, providers, on_result=None):
+        started = time.monotonic()
+        tasks = {asyncio.create_task(fn()): name for name, fn in providers.items()}
+        for name in providers:
+            self.stats_for(name).requests += 1
+
+        def report(task):
+            if task.cancelled() or task.exception():
+                return
+            res = task.result()
+            if res and res.get('results'):
+                on_result(res)
+
+        if on_result:
+            # Report each result as its task completes, not only at the wave boundaries
+            for task in tasks:
+                task.add_done_callback(report)
+
+        # 1. Primary Wait: 4.0s (Acceptable voice delay)
+        done, pending = await asyncio.wait(list(tasks), timeout=self.fixed_wave)
+
+        def results_of(finished):
+            out = []
+            for task in finished:
+                try:
+                    res = task.result()
+                    if res and res.get('results'):
+                        out.append(res)
+                except Exception as e:
+                    print(f"Task Error during aggregation: {e}")
+            return out
+
+        collected = results_of(done)
+        initial_yield = sum(len(r['results']) for r in collected)
+
+        # 2. Decision Gate: If we have < 4 results, it's too thin. Pay the latency cost for intelligence.
+        if initial_yield < self.target_yield and pending:
+            print(f"⚠️ Low yield ({initial_yield}) after {self.fixed_wave}s. Extending wait for deep research...")
+            second_done, pending = await asyncio.wait(pending, timeout=self.fixed_wave)
+            collected.extend(results_of(second_done))
+        else:
+            print(f"⚡️ Voice Speed Success: {initial_yield} results in <{self.fixed_wave}s. Proceeding.")
+
+        # Cancel any stragglers (Too slow for voice)
+        elapsed = time.monotonic() - started
+        for task in pending:
+            task.cancel()
+            self._timed_out(tasks[task], elapsed)
+        return collected
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "providers": {name: stats.to_dict() for name, stats in self.providers.items()},
+        }
@@ -0,0 +1,149 @@
+import os
+import time
+import urllib.parse
+import numpy as np
+from .hangul import normalize_tokens
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "igshid"}
+_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+
+def canonical_url(url):
+    """
+    Collapses URL variants of the same page: scheme, www/m./mobile. hosts, tracking params,
+    fragments and trailing slashes. "https://m.health.chosun.com/a/?utm_source=x" ->
+    "health.chosun.com/a"
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url  # Deep links (tel:, kakaotalk://) are kept as they are
+    host = parts.netloc.lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    query = [
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/")
+    canonical = host + path
+    if query:
+        canonical += "?" + urllib.parse.urlencode(sorted(query))
+    return canonical
+
+
+def simhashes(texts):
+    """
+    64-bit SimHash of each text over word-bigram shingles, vectorised with NumPy.
+    (Python's str hash is per-process salted; fingerprints are only compared within one request.)
+    Returns (fingerprints, shingle_counts).
+    """
+    hashes = []
+    counts = []
+    for text in texts:
+        words = text[:500].lower().split()
+        shingles = list(zip(words, words[1:])) or words
+        hashes.extend(map(hash, shingles))
+        counts.append(len(shingles))
+    if not hashes:
+        return [0] * len(texts), counts
+
+    bits = np.unpackbits(np.array(hashes, dtype=np.int64).view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    signed = bits.astype(np.int16) * 2 - 1
+    nonempty = [i for i, count in enumerate(counts) if count]
+    offsets = np.cumsum([0] + counts)[:-1][nonempty]
+    column_sums = np.add.reduceat(signed, offsets, axis=0)
+    packed = np.packbits(column_sums > 0, axis=1, bitorder='little').view(np.uint64)[:, 0]
+    fingerprints = [0] * len(texts)
+    for i, fingerprint in zip(nonempty, packed.tolist()):
+        fingerprints[i] = fingerprint
+    return fingerprints, counts
+
+
+class ResultRanker:
+    """
+    Cleans up the aggregated provider results before they are cut to the top 10:
+    1. URL variants of the same page are merged (canonical_url)
+    2. near-duplicate snippets (syndicated articles, the same page seen by several providers) are
+       dropped by SimHash Hamming distance; very short snippets only match exactly
+    3. what is left is re-ranked lexically: query tokens in title/snippet, plus a bonus for results
+       several providers agreed on, plus the provider's own rank
+    """
+
+    def __init__(self):
+        self.max_distance = int(os.getenv("SIMHASH_MAX_DISTANCE", "8"))
+        self.min_shingles = 6
+        self.runs = 0
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+        self.total_seconds = 0.0
+
+    def rank(self, query, items, provider_ranks=None):
+        """
+        items: result dicts (url/title/content) in aggregation order.
+        provider_ranks: position of each item in its provider's own list (default: all 0).
+        """
+        started = time.perf_counter()
+        provider_ranks = provider_ranks or [0] * len(items)
+
+        # 1. URL variants
+        by_url = {}
+        unique = []
+        for item, provider_rank in zip(items, provider_ranks):
+            key = canonical_url(item.get('url') or '')
+            if key in by_url:
+                by_url[key]['agreement'] += 1
+                self.url_duplicates += 1
+                continue
+            entry = {'item': item, 'agreement': 1, 'provider_rank': provider_rank}
+            by_url[key] = entry
+            unique.append(entry)
+
+        # 2. Near-duplicate snippets
+        fingerprints, counts = simhashes([f"{e['item'].get('title', '')} {e['item'].get('content', '')}" for e in unique])
+        kept = []
+        for entry, fingerprint, count in zip(unique, fingerprints, counts):
+            duplicate_of = None
+            for other in kept:
+                if count >= self.min_shingles and other['shingles'] >= self.min_shingles:
+                    if (fingerprint ^ other['fingerprint']).bit_count() <= self.max_distance:
+                        duplicate_of = other
+                        break
+                elif fingerprint == other['fingerprint']:
+                    duplicate_of = other
+                    break
+            if duplicate_of:
+                duplicate_of['agreement'] += entry['agreement']
+                self.near_duplicates += 1
+                continue
+            entry['fingerprint'] = fingerprint
+            entry['shingles'] = count
+            kept.append(entry)
+
+        # 3. Lexical re-rank
+        query_tokens = [t for t in normalize_tokens(query) if len(t) > 1] or normalize_tokens(query)
+
+        def score(entry):
+            item = entry['item']
+            title = (item.get('title') or '').lower()
+            content = (item.get('content') or '').lower()
+            lexical = sum(2.0 * (t in title) + 1.0 * (t in content) for t in query_tokens) / max(1, len(query_tokens))
+            return lexical + 0.5 * (entry['agreement'] - 1) + 0.5 / (1 + entry['provider_rank'])
+
+        ranked = sorted(kept, key=score, reverse=True)
+
+        self.runs += 1
+        self.total_seconds += time.perf_counter() - started
+        return [entry['item'] for entry in ranked]
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "url_duplicates": self.url_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "avg_ms": round(self.total_seconds / self.runs * 1000, 3) if self.runs else 0,
+        }
@@ -1,7 +1,51 @@
 import os
-from tavily import TavilyClient
+import re
+import time
+import asyncio
 import urllib.parse
+import httpx
 from .knowledge_base import KnowledgeBase
+from .result_cache import TTLCache
+from .single_flight import SingleFlight
+from .http_client import http_clients
+from .provider_scheduler import ProviderScheduler
+from .circuit_breaker import CircuitBreaker, QuotaBudget
+from .result_ranker import ResultRanker, canonical_url
+from .intents import classify
+from .contact_resolver import ContactResolver
+
+# Provider -> API account whose quota it spends
+PROVIDER_ACCOUNTS = {"google": "serpapi", "academic": "serpapi", "tavily": "tavily", "exa": "exa", "brave": "brave"}
+
+
+def mock_academic_papers():
+    """Demo papers served when academic search has nothing (no key, failure or missed deadline)."""
+    # Fallback data with REAL viewable PDF links for demonstration
+    # Updated 2026-01-09 with Verified URLs
+    return [
+        {
+            "title": f"2023 당뇨병 진료지침 (제8판) - 대한당뇨병학회",
+            "link": "https://www.diabetes.or.kr/pro/news/admin/assets/standard_2023.pdf", # Direct PDF
+            "snippet": f"대한당뇨병학회에서 발간한 2023년 최신 진료지침 요약본입니다. 한국인 환자에 최적화된 약물 치료 및 생활 습관 가이드라인을 포함합니다.",
+            "publication_info": "대한당뇨병학회 (KDA) - 2023",
+            "year": "2023"
+        },
+        {
+            "title": "국가 건강검진 및 만성질환 관리 통계 연보",
+            "link": "https://www.nhis.or.kr/nhis/healthin/wbdc/wbdc0600.do?mode=download&articleNo=108398&attachNo=323719", # NHIS valid download
+            "snippet": "국민건강보험공단이 발행한 최신 만성질환 현황 통계입니다. 고혈압, 당뇨병 유병률 및 관리 실태를 확인할 수 있습니다.",
+            "publication_info": "국민건강보험공단 - 2024",
+            "year": "2024"
+        },
+        {
+            "title": "고혈압 진료지침 2022 - 대한고혈압학회",
+            "link": "https://koreanhypertension.org/assets/guideline/2022_Hypertension_Guideline_K.pdf", # Reliable Society Link
+            "snippet": "일차 의료기관 의사를 위한 고혈압 진료 가이드라인. 진단 기준 및 목표 혈압 설정에 대한 근거 중심의 권고안입니다.",
+            "publication_info": "대한고혈압학회 - 2022",
+            "year": "2022"
+        }
+    ]
+
 
 class SearchManager:
     def __init__(self):
@@ -11,11 +55,191 @@ class SearchManager:
         self.exa_key = os.getenv("EXA_API_KEY")
         self.brave_key = os.getenv("BRAVE_API_KEY")
         
-        # Clients
-        self.tavily_client = TavilyClient(api_key=self.tavily_key) if self.tavily_key else None
+        # Clients (HTTP pools are shared through services.http_client)
         self.knowledge_base = KnowledgeBase()
 
-    def search_academic(self, query):
+        # Tier 0: replay stored answers for near-duplicate questions
+        self.tier0_enabled = os.getenv("TIER0_CACHE_ENABLED", "false").lower() == "true"
+        self.tier0_threshold = float(os.getenv("TIER0_SIMILARITY_THRESHOLD", "0.9"))
+        self.tier0_hits = 0
+        self.tier0_misses = 0
+
+        # Provider result cache: keyed by (provider, query), TTL depends on query intent
+        self.result_cache = TTLCache(
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000")),
+            max_bytes=int(os.getenv("SEARCH_CACHE_MAX_MB", "32")) * 1024 * 1024
+        )
+        # Concurrent identical searches await one shared fan-out
+        self.single_flight = SingleFlight()
+        # Progressive mode: fan-out key -> provider results published so far + listener queues
+        self._progress = {}
+        # Near-duplicate filter + lexical re-ranker over the aggregated results
+        self.ranker = ResultRanker()
+        # Compiled per-address-book name automata for call/SMS deep links
+        self.contact_resolver = ContactResolver()
+
+        # Latency-aware wait strategy for the provider fan-out (SEARCH_SCHEDULER_MODE=adaptive|fixed)
+        self.scheduler = ProviderScheduler()
+
+        # Outage / rate-limit protection: skip providers instantly instead of waiting on timeouts
+        cooldown = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "30"))
+        self.breakers = {name: CircuitBreaker(name, cooldown=cooldown) for name in PROVIDER_ACCOUNTS}
+        self.quotas = {account: QuotaBudget(account) for account in set(PROVIDER_ACCOUNTS.values())}
+        self.scheduler.on_timeout = lambda name: self.breakers[name].record_failure()
+
+        self.cache_ttl = {
+            "time_sensitive": int(os.getenv("SEARCH_CACHE_TTL_TIME_SENSITIVE", "300")),
+            "medical": int(os.getenv("SEARCH_CACHE_TTL_MEDICAL", "86400")),
+            "default": int(os.getenv("SEARCH_CACHE_TTL_DEFAULT", "3600")),
+            # Guideline PDFs / papers rarely change
+            "academic": int(os.getenv("ACADEMIC_CACHE_TTL", str(7 * 86400))),
+        }
+        # Academic routing runs beside the web fan-out and must never hold up the answer
+        self.academic_deadline = float(os.getenv("ACADEMIC_DEADLINE_SECONDS", "3.0"))
+
+    def _cache_ttl_for(self, query):
+        # Time-sensitive answers change during the day; medical reference results stay valid for long
+        intents = classify(query)
+        if "time_sensitive" in intents:
+            return self.cache_ttl["time_sensitive"]
+        if "medical" in intents:
+            return self.cache_ttl["medical"]
+        return self.cache_ttl["default"]
+
+    async def _run_provider(self, name, query, provider_fn):
+        """
+        Runs one provider coroutine through the result cache. Only non-empty results are cached.
+        """
+        cache_key = self._cache_key(name, query)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            print(f"💾 {name} cache hit for: {query}")
+            return cached
+
+        # Budget and half-open probe are taken only now: concurrent fan-outs planned against the same state
+        if not self._acquire(name):
+            return None
+        started = time.monotonic()
+        try:
+            res = await provider_fn(query)
+        except httpx.TimeoutException:
+            print(f"⏱️ {name.capitalize()} timed out for: {query}")
+            self.scheduler.record(name, time.monotonic() - started, 0, timed_out=True)
+            self.breakers[name].record_failure()
+            return None
+        except Exception as e:
+            print(f"{name.capitalize()} Async Failed: {e}")
+            self.scheduler.record(name, time.monotonic() - started, 0)
+            self.breakers[name].record_failure()
+            return None
+
+        self.scheduler.record(name, time.monotonic() - started, len(res['results']) if res else 0)
+        self.breakers[name].record_success()
+
+        if res and res.get('results'):
+            self.result_cache.set(cache_key, res, self._cache_ttl_for(query))
+        return res
+
+    def stats(self):
+        """Runtime counters for /api/admin/stats."""
+        return {
+            "knowledge_base": self.knowledge_base.stats(),
+            "tier0": {
+                "enabled": self.tier0_enabled,
+                "threshold": self.tier0_threshold,
+                "hits": self.tier0_hits,
+                "misses": self.tier0_misses,
+            },
+            "result_cache": self.result_cache.stats(),
+            "single_flight": self.single_flight.stats(),
+            "result_ranker": self.ranker.stats(),
+            "contact_resolver": self.contact_resolver.stats(),
+            "scheduler": self.scheduler.stats(),
+            "circuit_breakers": {name: breaker.stats() for name, breaker in self.breakers.items()},
+            "quotas": {account: quota.stats() for account, quota in self.quotas.items()},
+        }
+
+    def _provider_available(self, name):
+        """
+        False when the provider's circuit is open or its account is out of budget.
+        Planning only: the half-open probe is reserved by allow() when the call is actually sent.
+        """
+        quota = self.quotas[PROVIDER_ACCOUNTS[name]]
+        if not quota.available():
+            print(f"💸 Skipping {name}: {quota.name} quota exhausted")
+            return False
+        if not self.breakers[name].available():
+            print(f"🔴 Skipping {name}: circuit open")
+            return False
+        return True
+
+    def _acquire(self, name):
+        """Right before a call is sent: spends one unit of quota and passes the circuit breaker."""
+        quota = self.quotas[PROVIDER_ACCOUNTS[name]]
+        if not quota.try_consume():
+            print(f"💸 Skipping {name}: {quota.name} quota exhausted")
+            return False
+        if not self.breakers[name].allow():
+            quota.refund()
+            print(f"🔴 Skipping {name}: circuit open")
+            return False
+        return True
+
+    def _cache_key(self, name, query):
+        return (name, " ".join(query.lower().split()))
+
+    def _fan_out_key(self, query):
+        return ("web", " ".join(query.lower().split()))
+
+    def _publish(self, key, res):
+        channel = self._progress.get(key)
+        if channel is None:
+            return
+        channel["published"].append(res)
+        for queue in channel["queues"]:
+            queue.put_nowait(res)
+
+    async def lookup_cached_answer(self, query):
+        """
+        Tier 0: Semantic Answer Cache
+        Returns a stored KB entry (answer, sources, images, academic) when a previous question
+        is similar enough, so the caller can skip web search and Gemini entirely.
+        """
+        if not self.tier0_enabled:
+            return None
+
+        entry, similarity = await self.knowledge_base.find_similar_async(query, self.tier0_threshold)
+        if entry and entry.get('answer'):
+            self.tier0_hits += 1
+            print(f"⚡️ Tier 0 Hit ({similarity:.2f}): {entry['query']}")
+            return entry
+
+        self.tier0_misses += 1
+        return None
+
+    async def search_academic(self, query):
+        """
+        Academic/source lookup with its own long-TTL cache and a strict deadline.
+        Identical concurrent queries share one call. Falls back to the mock papers when the
+        deadline passes; the shared call keeps running and fills the cache for the next asker.
+        """
+        cache_key = self._cache_key("academic", query)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            print(f"💾 academic cache hit for: {query}")
+            return list(cached)
+
+        try:
+            papers = await asyncio.wait_for(
+                self.single_flight.do(cache_key, lambda: self._search_academic(query)),
+                timeout=self.academic_deadline
+            )
+        except asyncio.TimeoutError:
+            print(f"⏱️ Academic search missed its {self.academic_deadline:.1f}s deadline for: {query}")
+            return mock_academic_papers()
+        return list(papers)
+
+    async def _search_academic(self, query):
         """
         Intelligent Academic Search with Source Routing
         Decides between Google Scholar (papers) vs Google Search (Gov/Hospital PDFs) based on intent.
@@ -23,15 +247,13 @@ class SearchManager:
         papers = []
         
         # 1. Intent Classification
-        q_lower = query.lower()
+        intents = classify(query)
         
         # Policy / Statistics -> Government Sources
-        gov_keywords = ["통계", "현황", "정책", "가이드라인", "지침", "법령", "보건소", "질병관리청", "stats", "policy", "guideline"]
-        is_gov = any(k in q_lower for k in gov_keywords)
+        is_gov = "academic_gov" in intents
         
         # Clinical / Patient Info -> Major Hospitals
-        clinical_keywords = ["증상", "치료법", "수술", "식이요법", "좋은 음식", "피해야", "symptom", "treatment", "died"]
-        is_clinical = any(k in q_lower for k in clinical_keywords)
+        is_clinical = "academic_clinical" in intents
         
         target_engine = "google_scholar"
         search_query = query
@@ -52,10 +274,8 @@ class SearchManager:
             print(f"🎓 Routing to Academic Scholar for: {query}")
             search_query = query + " filetype:pdf"
 
-        if self.serpapi_key:
+        if self.serpapi_key and self._acquire("academic"):
             try:
-                import requests
-                
                 if target_engine == "google_scholar":
                     params = {
                         "engine": "google_scholar",
@@ -75,7 +295,8 @@ class SearchManager:
                         "gl": "kr"
                     }
                     
-                response = requests.get("https://serpapi.com/search", params=params)
+                response = await http_clients.get("academic").get("/search", params=params)
+                response.raise_for_status()
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -107,7 +328,6 @@ class SearchManager:
                             pub_info = f"{source}"
 
                         # Extract Year
-                        import re
                         year = ""
                         match = re.search(r'\b20\d{2}\b', snippet + pub_info)
                         if match:
@@ -121,163 +341,114 @@ class SearchManager:
                             "year": year
                         })
                         
+                self.breakers["academic"].record_success()
+                if papers:
+                    self.result_cache.set(self._cache_key("academic", query), papers, self.cache_ttl["academic"])
             except Exception as e:
                 print(f"Academic/Source Search Failed: {e}")
+                self.breakers["academic"].record_failure()
                 
         # Mock Fallback if no results
         if not papers:
             print("Using Mock Academic Data")
             print("Using Mock Academic Data (Korean Optimized - Verified Links)")
-            # Fallback data with REAL viewable PDF links for demonstration
-            # Updated 2026-01-09 with Verified URLs
-            papers = [
-                {
-                    "title": f"2023 당뇨병 진료지침 (제8판) - 대한당뇨병학회",
-                    "link": "https://www.diabetes.or.kr/pro/news/admin/assets/standard_2023.pdf", # Direct PDF
-                    "snippet": f"대한당뇨병학회에서 발간한 2023년 최신 진료지침 요약본입니다. 한국인 환자에 최적화된 약물 치료 및 생활 습관 가이드라인을 포함합니다.",
-                    "publication_info": "대한당뇨병학회 (KDA) - 2023",
-                    "year": "2023"
-                },
-                {
-                    "title": "국가 건강검진 및 만성질환 관리 통계 연보",
-                    "link": "https://www.nhis.or.kr/nhis/healthin/wbdc/wbdc0600.do?mode=download&articleNo=108398&attachNo=323719", # NHIS valid download
-                    "snippet": "국민건강보험공단이 발행한 최신 만성질환 현황 통계입니다. 고혈압, 당뇨병 유병률 및 관리 실태를 확인할 수 있습니다.",
-                    "publication_info": "국민건강보험공단 - 2024",
-                    "year": "2024"
-                },
-                {
-                    "title": "고혈압 진료지침 2022 - 대한고혈압학회",
-                    "link": "https://koreanhypertension.org/assets/guideline/2022_Hypertension_Guideline_K.pdf", # Reliable Society Link
-                    "snippet": "일차 의료기관 의사를 위한 고혈압 진료 가이드라인. 진단 기준 및 목표 혈압 설정에 대한 근거 중심의 권고안입니다.",
-                    "publication_info": "대한고혈압학회 - 2022",
-                    "year": "2022"
-                }
-            ]
+            papers = mock_academic_papers()
             
         return papers
 
-    async def search(self, query, contacts=[]):
+    async def _fan_out(self, query):
         """
         Execute Parallel Race Strategy (The "Gemini" Speed)
+        Returns (aggregated_results, images) from all providers that answered in time.
         """
-        import asyncio
-        
-        results = []
         images = []
-        source_engine = "none"
-        
-        # ... (rest of async wrappers logic, keeping them unchanged implicitly or re-declaring them if needed. 
-        # Actually I need to be careful not to delete the entire function body. 
-        # I will just replace the top part and the app injection part)
+        fan_out_key = self._fan_out_key(query)
+        if fan_out_key in self._progress:
+            # Progressive listeners only see results from this run
+            self._progress[fan_out_key]["published"] = []
         
         # Define async wrappers for each provider (Redefining for context)
         async def run_google():
             if not self.serpapi_key: return None
-            try:
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self._search_google_sync, query)
-            except Exception as e:
-                print(f"Google Async Failed: {e}")
-                return None
+            return await self._run_provider("google", query, self._search_google)
 
         async def run_tavily():
-            if not self.tavily_client: return None
-            try:
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self._search_tavily_sync, query)
-            except Exception as e:
-                print(f"Tavily Async Failed: {e}")
-                return None
+            if not self.tavily_key: return None
+            return await self._run_provider("tavily", query, self._search_tavily)
 
         async def run_exa():
             if not self.exa_key: return None
-            try:
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self._search_exa_sync, query)
-            except Exception as e:
-                print(f"Exa Async Failed: {e}")
-                return None
+            return await self._run_provider("exa", query, self._search_exa)
                 
         async def run_brave():
             if not self.brave_key: return None
-            try:
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self._search_brave_sync, query)
-            except Exception as e:
-                print(f"Brave Async Failed: {e}")
-                return None
+            return await self._run_provider("brave", query, self._search_brave)
 
         # --- THE GREAT AGGREGATION (GEMINI STYLE) ---
         print(f"🧠 Starting Deep Research (Aggregation) for: {query}")
         
-        # Fire all requests simultaneously
-        tasks = [
-            asyncio.create_task(run_tavily()), # General Web & News
-            asyncio.create_task(run_google()), # Real-time Sync & Local
-            asyncio.create_task(run_exa()),    # Deep Content match
-            # asyncio.create_task(run_brave())   # Backup (Skip to save quota/time if others sufficient)
-        ]
-        
-        # Wait for ALL to complete (Enrichment Strategy)
-        # VOICE-FIRST OPTIMIZATION: Adaptive Latency
-        # 1. Primary Wait: 4.0s (Acceptable voice delay)
-        done, pending = await asyncio.wait(tasks, timeout=4.0)
+        # Fire all configured providers simultaneously; the scheduler decides how long to wait
+        configured = {}
+        if self.tavily_key: configured["tavily"] = run_tavily  # General Web & News
+        if self.serpapi_key: configured["google"] = run_google # Real-time Sync & Local
+        if self.exa_key: configured["exa"] = run_exa           # Deep Content match
+
+        # Open circuits / exhausted budgets are skipped instantly (cached results are still served)
+        providers = {
+            name: fn for name, fn in configured.items()
+            if self.result_cache.peek(self._cache_key(name, query)) is not None or self._provider_available(name)
+        }
+        tripped = set(configured) - set(providers)
+
+        # Backup: hedged in when the primaries look thin, promoted immediately when a primary tripped
+        backups = {}
+        if self.brave_key and self._provider_available("brave"):
+            if tripped:
+                print(f"🛡️ Brave promoted to primary (unavailable: {', '.join(sorted(tripped))})")
+                providers["brave"] = run_brave
+            else:
+                backups["brave"] = run_brave
+
+        provider_results = await self.scheduler.run(providers, backups, on_result=lambda res: self._publish(fan_out_key, res))
         
-        aggregated_results = []
-        seen_urls = set()
+        collected = []
+        provider_ranks = []
         
-        # Check yield from first wave
-        initial_yield = 0
-        for task in done:
-            try:
-                res = task.result()
-                if res and res.get('results'):
-                    initial_yield += len(res['results'])
-            except: pass
-            
-        # 2. Decision Gate: Do we have enough?
-        # If we have < 4 results, it's too thin. Pay the latency cost for intelligence.
-        # If we have >= 4, SPEED WINS.
-        if initial_yield < 4 and len(pending) > 0:
-            print(f"⚠️ Low yield ({initial_yield}) after 4s. Extending wait for deep research...")
-            second_wave_done, second_wave_pending = await asyncio.wait(pending, timeout=4.0)
+        # Collect results from all engines that answered in time
+        for res in provider_results:
+            engine_name = res.get('engine')
+            print(f"✅ {engine_name} contributed {len(res['results'])} results.")
             
-            # Meritge second wave into done
-            done = done.union(second_wave_done)
-            pending = second_wave_pending # Remainder are truly slow/dead
-        else:
-            print(f"⚡️ Voice Speed Success: {initial_yield} results in <4.0s. Proceeding.")
-        
-        # Collect results from all successful engines (merged from both waves)
-        for task in done:
-            try:
-                res = task.result()
-                if res and res.get('results'):
-                    engine_name = res.get('engine')
-                    print(f"✅ {engine_name} contributed {len(res['results'])} results.")
-                    
-                    # Add images if available
-                    if res.get('images'):
-                        images.extend(res['images'])
-                        
-                    # Add unique results
-                    for item in res['results']:
-                        url = item.get('url')
-                        if url and url not in seen_urls:
-                            seen_urls.add(url)
-                            # Tag the source engine for debugging/quality check
-                            item['source_engine'] = engine_name 
-                            aggregated_results.append(item)
-            except Exception as e:
-                print(f"Task Error during aggregation: {e}")
+            # Add images if available
+            if res.get('images'):
+                images.extend(res['images'])
                 
-        # Cancel any stragglers (Too slow for voice)
-        for t in pending: t.cancel()
+            for position, item in enumerate(res['results']):
+                if item.get('url'):
+                    # Tag the source engine for debugging/quality check (copy: items may be cached)
+                    collected.append({**item, 'source_engine': engine_name})
+                    provider_ranks.append(position)
+
+        # URL variants and near-duplicate snippets merged, then re-ranked (before the top-10 cut)
+        aggregated_results = self.ranker.rank(query, collected, provider_ranks)
+        return aggregated_results, images
+
+    async def search(self, query, contacts=[], intents=None):
+        """
+        Web fan-out + fallbacks + service/app deep links.
+        Identical concurrent queries share a single provider fan-out.
+        """
+        intents = intents or classify(query)
+        source_engine = "none"
+
+        aggregated_results, images = await self.single_flight.do(self._fan_out_key(query), lambda: self._fan_out(query))
+        # Shared with other callers: copy before local changes
+        aggregated_results, images = list(aggregated_results), list(images)
 
         # Tier 5: Emergency Fallback if ABSOLUTELY nothing found
         if not aggregated_results:
             print("⚠️ No external results found. Entering Emergency Fallback...")
-            kb_match = self.knowledge_base.find_match(query)
+            kb_match = await self.knowledge_base.find_match_async(query)
             if kb_match:
                 print("Tier 5-A Success: KB")
                 aggregated_results = kb_match.get('sources', [])
@@ -285,27 +456,28 @@ class SearchManager:
                 source_engine = "knowledge_base"
             else:
                 print("Tier 5-B: Hardcoded Mock")
-                aggregated_results, images = self._get_mock_data(query)
+                aggregated_results, images = self._get_mock_data(query, intents)
                 source_engine = "mock"
         else:
             source_engine = "hybrid_aggregation"
             
         # --- KOREAN LIFE SERVICE INTEGRATION (New Phase) ---
         # Detect intents and inject reliable service deep links
-        service_results = self._inject_korean_services(query)
+        service_results = self._inject_korean_services(query, intents)
         
         # --- APP LAUNCH INTEGRATION (Deep Links) ---
-        app_results = self._inject_app_actions(query, contacts)
+        app_results = self._inject_app_actions(query, contacts, intents)
         
         # Merge Priorities: App > Service > Web
+        # (cards are tagged so the context packer keeps them first instead of ranking them as web snippets)
         final_results = []
         if app_results:
              print(f"📱 Injected {len(app_results)} App Launch cards.")
-             final_results.extend(app_results)
+             final_results.extend({**r, 'card': 'app'} for r in app_results)
              
         if service_results:
              print(f"🇰🇷 Injected {len(service_results)} Korean Service cards.")
-             final_results.extend(service_results)
+             final_results.extend({**r, 'card': 'service'} for r in service_results)
              
         final_results.extend(aggregated_results[:10])
         
@@ -313,29 +485,73 @@ class SearchManager:
 
         return final_results, images, source_engine
 
-    def _inject_app_actions(self, query, contacts=[]):
+    async def search_progressive(self, query, contacts=[], intents=None):
+        """
+        Progressive variant of search() for streaming clients.
+        Yields ("sources", {"engine", "results", "images"}) as each provider completes (URLs not
+        yet sent only), then ("final", (final_results, images, source_engine)) exactly like search().
+        """
+        key = self._fan_out_key(query)
+        channel = self._progress.setdefault(key, {"published": [], "queues": []})
+        queue = asyncio.Queue()
+        # Joining a fan-out already in flight: replay what it has published so far
+        for res in channel["published"]:
+            queue.put_nowait(res)
+        channel["queues"].append(queue)
+
+        search_task = asyncio.ensure_future(self.search(query, contacts, intents))
+        seen_urls = set()
+        try:
+            while not (search_task.done() and queue.empty()):
+                if queue.empty():
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait({getter, search_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    res = getter.result()
+                else:
+                    res = queue.get_nowait()
+
+                fresh = []
+                for item in res['results']:
+                    url = item.get('url')
+                    if url and canonical_url(url) not in seen_urls:
+                        seen_urls.add(canonical_url(url))
+                        fresh.append({**item, 'source_engine': res.get('engine')})
+                if fresh:
+                    yield "sources", {"engine": res.get('engine'), "results": fresh, "images": res.get('images', [])}
+
+            yield "final", search_task.result()
+        finally:
+            channel["queues"].remove(queue)
+            if not channel["queues"] and self._progress.get(key) is channel:
+                del self._progress[key]
+            if not search_task.done():
+                search_task.cancel()
+
+    def _inject_app_actions(self, query, contacts=[], intents=None):
         """
         Detects intents to open specific apps and returns Deep Link cards.
         Resolves contacts for SMS/Call.
         """
         results = []
-        q_lower = query.lower()
+        intents = intents or classify(query)
         
-        # 1. Contact Resolution logic
+        # 1. Contact Resolution logic (only call/SMS cards use it)
         target_number = ""
         target_name = ""
+        contact = None
         
-        if contacts:
-            for c in contacts:
-                # Basic matching: if Name is in query
-                if c.name in query:
-                    target_name = c.name
-                    target_number = c.number.replace("-", "").strip()
-                    print(f"🎯 Contact Match: {target_name} -> {target_number}")
-                    break
+        if contacts and ("app_call" in intents or "app_sms" in intents):
+            contact = self.contact_resolver.resolve(query, contacts)
+            if contact:
+                target_name = contact.name
+                target_number = contact.number
+                print(f"🎯 Contact Match: {target_name} -> {target_number}")
         
         # 2. YouTube
-        if "유튜브" in query or "youtube" in q_lower:
+        if "app_youtube" in intents:
             results.append({
                 "title": "YouTube 실행",
                 "url": "https://www.youtube.com", 
@@ -343,7 +559,7 @@ class SearchManager:
             })
 
         # 3. KakaoTalk
-        if "카카오톡" in query or "카톡" in query or "kakaotalk" in q_lower:
+        if "app_kakaotalk" in intents:
              results.append({
                 "title": "카카오톡 실행",
                 "url": "kakaotalk://", 
@@ -351,7 +567,7 @@ class SearchManager:
             })
 
         # 4. Phone (Dialer)
-        if "전화" in query or "call" in q_lower:
+        if "app_call" in intents:
              url = f"tel:{target_number}" if target_number else "tel:"
              title = f"{target_name}에게 전화 걸기" if target_name else "전화 걸기 (키패드)"
              results.append({
@@ -363,7 +579,7 @@ class SearchManager:
         # 5. Message (SMS)
         # Parsing body: "Send text to [Name] saying [Body]"
         # Korean: "[Name]에게 [Body]라고 문자 보내줘"
-        if "문자" in query or "메시지" in query or "sms" in q_lower:
+        if "app_sms" in intents:
              body = ""
              # Simple body extraction logic
              if "라고" in query:
@@ -374,7 +590,12 @@ class SearchManager:
                      # This is too simple. Let's try to grab everything between Name and '라고'
                      # Or just the word before '라고'
                      # Better: extract quoted text? Or just everything before '라고' excluding Name.
-                     body = parts[0].replace(target_name, "").replace("에게", "").replace("한테", "").strip()
+                     head = parts[0]
+                     if contact and contact.end <= len(head):
+                         head = head[:contact.start] + head[contact.end:]  # Drop "[Name]에게"
+                     else:
+                         head = head.replace("에게", "").replace("한테", "")
+                     body = head.strip()
              
              # Fallback simple extraction if '라고' missing but intent exists
              elif "메시지" in query:
@@ -405,7 +626,7 @@ class SearchManager:
             })
             
         # 6. T-Map (Navigation)
-        if "티맵" in query or "tmap" in q_lower:
+        if "app_tmap" in intents:
              results.append({
                 "title": "티맵(T-Map) 실행",
                 "url": "tmap://", 
@@ -414,18 +635,17 @@ class SearchManager:
             
         return results
 
-    def _inject_korean_services(self, query):
+    def _inject_korean_services(self, query, intents=None):
         """
         Detects intents for Shopping, Maps, Booking and generates deep links 
         to major Korean platforms (Naver, Coupang, Kakao).
         """
         results = []
-        q_lower = query.lower()
+        intents = intents or classify(query)
         q_encoded = urllib.parse.quote_plus(query)
         
         # 1. Shopping Intent (Coupang, Naver SmartStore)
-        shopping_keywords = ["살래", "사줘", "구매", "가격", "최저가", "쿠팡", "쇼핑", "얼마", "buy", "price", "cost"]
-        if any(k in q_lower for k in shopping_keywords):
+        if "shopping" in intents:
             # Clean query for shopping (remove intent words optionally, or keep for context)
             clean_q = query.replace("최저가", "").replace("가격", "").replace("구매", "").strip()
             clean_q_enc = urllib.parse.quote_plus(clean_q)
@@ -442,8 +662,7 @@ class SearchManager:
             })
 
         # 2. Map/Place/Navigation Intent (Naver Map, Kakao Map)
-        map_keywords = ["어디", "위치", "가는길", "지도", "맛집", "근처", "주변", "병원", "약국", "map", "location", "nav"]
-        if any(k in q_lower for k in map_keywords):
+        if "map" in intents:
              results.append({
                 "title": f"네이버 지도: '{query}' 검색",
                 "url": f"https://map.naver.com/v5/search/{q_encoded}",
@@ -457,8 +676,7 @@ class SearchManager:
             })
 
         # 3. Booking/Reservation Intent (Naver Booking, CatchTable - simplified to Naver for now)
-        booking_keywords = ["예약", "숙소", "펜션", "호텔", "식당", "회식", "booking", "reserve"]
-        if any(k in q_lower for k in booking_keywords):
+        if "booking" in intents:
              results.append({
                 "title": f"네이버 예약/플레이스: {query}",
                 "url": f"https://map.naver.com/v5/search/{q_encoded}", # Naver Map serves as the main portal for Place/Booking
@@ -467,10 +685,9 @@ class SearchManager:
              
         return results
 
-    # --- Sync Helper Implementations ---
-    def _search_google_sync(self, query):
+    # --- Provider Implementations (async, pooled HTTP) ---
+    async def _search_google(self, query):
         print(f"Attempting Tier 1 (Google) for: {query}")
-        import requests
         params = {
             "engine": "google",
             "q": query,
@@ -478,7 +695,8 @@ class SearchManager:
             "num": 5,
             "hl": "ko", "gl": "kr"
         }
-        response = requests.get("https://serpapi.com/search", params=params)
+        response = await http_clients.get("google").get("/search", params=params)
+        response.raise_for_status() # Errors / rate limits count against the circuit breaker
         if response.status_code == 200:
             data = response.json()
             organic = data.get("organic_results", [])
@@ -486,46 +704,49 @@ class SearchManager:
             if results: return {"engine": "google", "results": results, "images": []}
         return None
 
-    def _search_tavily_sync(self, query):
+    async def _search_tavily(self, query):
         print(f"Attempting Tier 2 (Tavily) for: {query}")
-        search_result = self.tavily_client.search(query=query, search_depth="basic", include_images=True)
+        headers = {"Authorization": f"Bearer {self.tavily_key}", "content-type": "application/json"}
+        response = await http_clients.get("tavily").post("/search", json={"query": query, "search_depth": "basic", "include_images": True}, headers=headers)
+        response.raise_for_status()
+        search_result = response.json()
         results = search_result.get("results", [])
         images = search_result.get("images", [])
         if results: return {"engine": "tavily", "results": results, "images": images}
         return None
 
-    def _search_exa_sync(self, query):
+    async def _search_exa(self, query):
         print(f"Attempting Tier 3 (Exa) for: {query}")
-        import requests
         headers = {"accept": "application/json", "content-type": "application/json", "x-api-key": self.exa_key}
-        response = requests.post("https://api.exa.ai/search", json={"query": query, "numResults": 5, "useAutoprompt": True, "contents": {"text": True}}, headers=headers)
+        response = await http_clients.get("exa").post("/search", json={"query": query, "numResults": 5, "useAutoprompt": True, "contents": {"text": True}}, headers=headers)
+        response.raise_for_status()
         if response.status_code == 200:
             data = response.json()
-            results = [{"title": i.get("title") or "Exa Result", "url": i.get("url"), "content": i.get("text", "")[:300] + "..."} for i in data.get("results", [])]
+            results = [{"title": i.get("title") or "Exa Result", "url": i.get("url"), "content": (i.get("text") or "")[:300] + "..."} for i in data.get("results", [])]
             if results: return {"engine": "exa", "results": results, "images": []}
         return None
 
-    def _search_brave_sync(self, query):
+    async def _search_brave(self, query):
          print(f"Attempting Tier 4 (Brave) for: {query}")
-         import requests
          headers = {"Accept": "application/json", "X-Subscription-Token": self.brave_key}
-         response = requests.get("https://api.search.brave.com/res/v1/web/search", params={"q": query, "count": 5}, headers=headers)
+         response = await http_clients.get("brave").get("/res/v1/web/search", params={"q": query, "count": 5}, headers=headers)
+         response.raise_for_status()
          if response.status_code == 200:
              data = response.json()
              results = [{"title": i.get("title"), "url": i.get("url"), "content": i.get("description")} for i in data.get("web", {}).get("results", [])]
              if results: return {"engine": "brave", "results": results, "images": []}
          return None
 
-    def _get_mock_data(self, query):
+    def _get_mock_data(self, query, intents=None):
         """
         Hardcoded mock data for core scenarios (copied from previous main.py logic)
         """
         results = []
         images = []
         
-        q_lower = query.lower()
+        intents = intents or classify(query)
         
-        if "보건소" in query or "health center" in q_lower:
+        if "topic_health_center" in intents:
             results = [
                 {"title": "보건소 이용안내 - G-Health 공공보건포털", "url": "https://www.g-health.kr/portal/index.do", "content": "전국 보건소 찾기 및 진료 시간 안내. 내과, 치과, 한방 진료 등 보건소에서 제공하는 다양한 의료 서비스를 확인하세요."},
                 {"title": "보건소 - 찾기/안내/예약 - 서울특별시", "url": "https://health.seoul.go.kr", "content": "서울시 내 25개 자치구 보건소 위치 및 연락처 정보. 예방접종, 대사증후군 관리 등 시민 건강 서비스 안내."},
@@ -539,7 +760,7 @@ class SearchManager:
                 "https://www.yongin.go.kr/resources/images/hist/content/img_hist_2020_04_01.jpg"
             ]
 
-        elif any(k in q_lower for k in ["당뇨", "diabetes", "혈당", "인슐린", "insulin", "glucose"]):
+        elif "topic_diabetes" in intents:
              results = [
                 {"title": "2023 당뇨병 진료지침 (제8판) - 대한당뇨병학회", "url": "https://www.diabetes.or.kr/pro/publish/guide.php", "content": "대한당뇨병학회에서 제공하는 최신 당뇨병 진료지침. 약물 치료, 식사 요법, 운동 요법 등 포괄적인 가이드라인을 웹에서 확인하세요."},
                 {"title": "당뇨병의 진단 및 검사 - 서울아산병원 질환백과", "url": "https://www.amc.seoul.kr/asan/healthinfo/disease/diseaseDetail.do?contentId=31596", "content": "당뇨병의 정의, 원인, 증상, 진단 검사 및 치료 방법에 대한 상세한 의료 정보입니다."},
@@ -552,7 +773,7 @@ class SearchManager:
                  "https://post-phinf.pstatic.net/MjAyMTEyMTZfMjQ5/MDAxNjM5NjM4ODQ5MjQ5.example.jpg"
              ]
         
-        elif "고혈압" in query or "hypertension" in q_lower:
+        elif "topic_hypertension" in intents:
             results = [
                 {"title": "고혈압의 진단과 치료 - 질병관리청 국가건강정보포털", "url": "https://health.kdca.go.kr", "content": "고혈압은 침묵의 살인자로 불리며, 뇌졸중 및 심혈관 질환의 주요 원인입니다. 정기적인 혈압 측정과 생활 습관 개선이 필수적입니다."},
                 {"title": "대한고혈압학회 - 일반인/환자를 위한 정보", "url": "https://www.koreanhypertension.org", "content": "올바른 혈압 측정법, 고혈압 약물 복용 가이드, 식단 관리 등 고혈압 환자를 위한 전문적인 정보를 제공합니다."},
@@ -566,7 +787,7 @@ class SearchManager:
                 "http://www.samsunghospital.com/upload/editor/20200518_1.jpg"
             ]
         
-        elif any(k in q_lower for k in ["감기", "독감", "cold", "flu", "기침", "열"]):
+        elif "topic_cold" in intents:
             results = [
                  {"title": "감기와 독감의 차이점 - 질병관리청", "url": "https://kdca.go.kr", "content": "감기는 바이러스 감염에 의한 상기도 감염이며, 독감은 인플루엔자 바이러스에 의한 급성 호흡기 질환입니다."},
                  {"title": "환절기 호흡기 건강 관리 수칙", "url": "https://www.amc.seoul.kr", "content": "충분한 수분 섭취와 실내 습도 유지가 중요합니다. 외출 후 손 씻기를 생활화하세요."},
@@ -579,7 +800,7 @@ class SearchManager:
                 "https://img.freepik.com/free-photo/hot-tea-cup_23-2148111111.jpg"
             ]
             
-        elif any(k in q_lower for k in ["naver", "네이버"]):
+        elif "topic_naver" in intents:
              print(f"Using Naver Fallback for: {query}")
              query_encoded = urllib.parse.quote_plus(query.replace("네이버", "").replace("naver", "").strip())
              results = [
@@ -0,0 +1,65 @@
+import os
+
+
+class SpeculationPolicy:
+    """
+    When to start Gemini before the web fan-out has finished, and what to do with late sources.
+
+    Generation starts on the first trigger that fires:
+      web            - at least `min_sources` provider results have arrived
+      knowledge_base - a stored answer / curated medical facts already cover the query
+                       (not for time-sensitive queries, which need fresh web results)
+      search_done    - the fan-out finished first (a regular, non-speculative answer)
+
+    Late sources (arriving after generation started):
+      ignore  - shown in the UI, answer continues
+      restart - answer is thrown away and regenerated with the new context, but only while the
+                answer is still being generated and short, at most `max_restarts` times per request
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("SPECULATIVE_GENERATION", "false").lower() == "true"
+        self.min_sources = int(os.getenv("SPECULATIVE_MIN_SOURCES", "3"))
+        self.late_policy = os.getenv("SPECULATIVE_LATE_POLICY", "ignore")
+        self.max_restarts = int(os.getenv("SPECULATIVE_MAX_RESTARTS", "1"))
+        self.restart_min_new = int(os.getenv("SPECULATIVE_RESTART_MIN_NEW", "3"))
+        self.restart_max_chars = int(os.getenv("SPECULATIVE_RESTART_MAX_CHARS", "400"))
+
+        self.triggers = {"web": 0, "knowledge_base": 0, "search_done": 0}
+        self.kept = 0
+        self.restarted = 0
+
+    def trigger(self, n_web, has_seed, search_done, is_time_sensitive):
+        """Name of the trigger that allows generation to start now, or None."""
+        if search_done:
+            return "search_done"
+        if n_web >= self.min_sources:
+            return "web"
+        if has_seed and not is_time_sensitive:
+            return "knowledge_base"
+        return None
+
+    def should_restart(self, late_new, answer_chars, restarts):
+        return (
+            self.late_policy == "restart"
+            and restarts < self.max_restarts
+            and late_new >= self.restart_min_new
+            and answer_chars <= self.restart_max_chars
+        )
+
+    def record(self, trigger, restarts):
+        self.triggers[trigger] += 1
+        self.restarted += restarts
+        if trigger != "search_done" and restarts == 0:
+            self.kept += 1
+
+    def stats(self):
+        speculative = self.triggers["web"] + self.triggers["knowledge_base"]
+        return {
+            "enabled": self.enabled,
+            "late_policy": self.late_policy,
+            "triggers": dict(self.triggers),
+            "kept": self.kept,
+            "restarted": self.restarted,
+            "keep_rate": round(self.kept / speculative, 3) if speculative else 0,
+        }
@@ -0,0 +1,94 @@
+import os
+import re
+import asyncio
+from .result_cache import TTLCache
+from .single_flight import SingleFlight
+from .http_client import http_clients
+
+
+def normalize_prefix(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class SuggestService:
+    """
+    Typeahead suggestions from Google Suggest over the pooled "suggest" client.
+    - TTL cache keyed on the normalized prefix
+    - a longer prefix is answered by filtering a cached shorter one ("당뇨" -> "당뇨 식단") when
+      enough cached suggestions still match
+    - identical prefixes in flight share one upstream request
+    """
+
+    def __init__(self):
+        self.ttl = int(os.getenv("SUGGEST_CACHE_TTL", "600"))
+        self.cache = TTLCache(max_entries=int(os.getenv("SUGGEST_CACHE_MAX_ENTRIES", "5000")), max_bytes=8 * 1024 * 1024)
+        self.single_flight = SingleFlight()
+        self.min_reuse = 6  # Chips the frontend shows
+        self.min_prefix = 1
+        # Merged into local typeahead results only if it answers within this (or is cached)
+        self.remote_enabled = os.getenv("SUGGEST_REMOTE", "true").lower() == "true"
+        self.remote_deadline = float(os.getenv("SUGGEST_REMOTE_DEADLINE", "0.3"))
+
+        self.prefix_hits = 0
+        self.fetches = 0
+        self.errors = 0
+        self.late = 0
+
+    def _from_shorter_prefix(self, prefix):
+        for end in range(len(prefix) - 1, self.min_prefix - 1, -1):
+            cached = self.cache.peek(prefix[:end])
+            if cached is None:
+                continue
+            matching = [s for s in cached if s.lower().startswith(prefix)]
+            if len(matching) >= self.min_reuse:
+                return matching
+            return None  # The closest cached prefix is not enough; a shorter one would be worse
+        return None
+
+    async def _fetch(self, prefix):
+        self.fetches += 1
+        client = http_clients.get("suggest")
+        response = await client.get("/complete/search", params={"client": "firefox", "q": prefix})
+        response.raise_for_status()
+        suggestions = [s for s in response.json()[1] if isinstance(s, str)]
+        self.cache.set(prefix, suggestions, self.ttl)
+        return suggestions
+
+    async def suggest(self, q):
+        """Suggestion strings for q ([] when the upstream fails)."""
+        prefix = normalize_prefix(q)
+        if not prefix:
+            return []
+
+        cached = self.cache.get(prefix)
+        if cached is not None:
+            return cached
+        reused = self._from_shorter_prefix(prefix)
+        if reused is not None:
+            self.prefix_hits += 1
+            return reused
+
+        try:
+            return await self.single_flight.do(prefix, lambda: self._fetch(prefix))
+        except Exception as e:
+            self.errors += 1
+            print(f"Suggestion Error: {e!r}")
+            return []
+
+    async def suggest_within(self, q):
+        """suggest() bounded by remote_deadline; a late answer is still cached for the next keystroke."""
+        try:
+            return await asyncio.wait_for(self.suggest(q), self.remote_deadline)
+        except asyncio.TimeoutError:
+            self.late += 1
+            return []
+
+    def stats(self):
+        return {
+            "cache": self.cache.stats(),
+            "prefix_hits": self.prefix_hits,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "late": self.late,
+            "single_flight": self.single_flight.stats(),
+        }
@@ -0,0 +1,160 @@
+import re
+import time
+import heapq
+import threading
+from bisect import bisect_left, insort
+from .hangul import get_chosung, to_keystrokes, is_jamo
+
+_KEY_END = "\U0010ffff"
+_MAX_WORD_STARTS = 4  # "독감 예방 접종" is also found from "예방" and "접종"
+
+
+def normalize_term(text):
+    return re.sub(r"\s+", " ", text).strip().rstrip("?？!.").strip().lower()
+
+
+def _is_chosung_query(text):
+    return all(is_jamo(ch) and 'ㄱ' <= ch <= 'ㅎ' for ch in text)
+
+
+class TypeaheadIndex:
+    """
+    In-memory completion index over the curated corpus (KB queries, medical_data keywords).
+    Every term is indexed from each of its first few word starts in two sorted key spaces:
+    - keystrokes ("당뇨" -> "ㄷㅏㅇㄴㅛ"): any intermediate IME state ("당ㄴ", "다") is a prefix
+    - 초성 ("당뇨" -> "ㄷㄴ"): for queries typed as initial consonants only
+    A lookup is a bisect range scan; matches at the start of a term rank above matches at a later
+    word, then by popularity (added weight + record() calls).
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.popularity = []
+        self._ids = {}  # normalized term -> id
+        self._keystrokes = []  # sorted (key, word position, id)
+        self._chosung = []
+        self._cache = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _word_keys(self, norm, term_id):
+        """(keystroke keys, 초성 keys) of a term, one per indexed word start."""
+        words = norm.split(" ")
+        keystrokes, chosung = [], []
+        for position in range(min(len(words), _MAX_WORD_STARTS)):
+            compact = "".join(words[position:])
+            keystrokes.append((to_keystrokes(compact), position, term_id))
+            chosung.append((get_chosung(compact), position, term_id))
+        return keystrokes, chosung
+
+    def _register(self, norm, term, weight):
+        """Adds the term or bumps its popularity; returns (is_new, keystroke keys, 초성 keys)."""
+        term_id = self._ids.get(norm)
+        if term_id is not None:
+            self.popularity[term_id] += weight
+            return (False, *self._word_keys(norm, term_id))
+        term_id = len(self.terms)
+        self._ids[norm] = term_id
+        self.terms.append(term.strip())
+        self.popularity.append(weight)
+        return (True, *self._word_keys(norm, term_id))
+
+    def _invalidate(self, keystrokes, chosung):
+        """Drops the cached completions whose prefix matches one of the given sorted keys."""
+        for cache_key in list(self._cache):
+            space, prefix, _ = cache_key
+            keys = chosung if space == "chosung" else keystrokes
+            i = bisect_left(keys, (prefix,))
+            if i < len(keys) and keys[i][0].startswith(prefix):
+                self._cache.pop(cache_key, None)
+
+    def add(self, term, weight=1):
+        norm = normalize_term(term)
+        if not norm:
+            return
+        with self._lock:
+            is_new, keystrokes, chosung = self._register(norm, term, weight)
+            if is_new:
+                for key in keystrokes:
+                    insort(self._keystrokes, key)
+                for key in chosung:
+                    insort(self._chosung, key)
+            self._invalidate(sorted(keystrokes), sorted(chosung))
+
+    def add_many(self, terms, weight=1):
+        """Bulk add: keys are appended and each key space is sorted once (no per-term insort)."""
+        with self._lock:
+            new_keystrokes, new_chosung = [], []
+            touched_keystrokes, touched_chosung = [], []
+            for term in terms:
+                norm = normalize_term(term)
+                if not norm:
+                    continue
+                is_new, keystrokes, chosung = self._register(norm, term, weight)
+                if is_new:
+                    new_keystrokes.extend(keystrokes)
+                    new_chosung.extend(chosung)
+                touched_keystrokes.extend(keystrokes)
+                touched_chosung.extend(chosung)
+            # The index is one sorted run; sorting the new keys first lets the final sort just merge
+            for keys, new_keys in ((self._keystrokes, new_keystrokes), (self._chosung, new_chosung)):
+                if new_keys:
+                    new_keys.sort()
+                    keys.extend(new_keys)
+                    keys.sort()
+            if self._cache and touched_keystrokes:
+                self._invalidate(sorted(touched_keystrokes), sorted(touched_chosung))
+
+    def record(self, query):
+        """A query was asked: known terms become more popular (unknown queries are not indexed)."""
+        norm = normalize_term(query)
+        term_id = self._ids.get(norm)
+        if term_id is not None:
+            with self._lock:
+                self.popularity[term_id] += 1
+                keystrokes, chosung = self._word_keys(norm, term_id)
+                self._invalidate(sorted(keystrokes), sorted(chosung))
+
+    def complete(self, q, limit=6):
+        started = time.perf_counter()
+        compact = normalize_term(q).replace(" ", "")
+        if not compact:
+            return []
+        if _is_chosung_query(compact):
+            space, keys, prefix = "chosung", self._chosung, compact
+        else:
+            space, keys, prefix = "keystrokes", self._keystrokes, to_keystrokes(compact)
+        cache_key = (space, prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            lo = bisect_left(keys, (prefix,))
+            hi = bisect_left(keys, (prefix + _KEY_END,), lo)
+
+            best = {}  # id -> earliest word position
+            for _, position, term_id in keys[lo:hi]:
+                if position < best.get(term_id, _MAX_WORD_STARTS):
+                    best[term_id] = position
+            top = heapq.nsmallest(
+                limit, best.items(),
+                key=lambda item: (item[1] > 0, -self.popularity[item[0]], len(self.terms[item[0]]))
+            )
+            cached = [self.terms[term_id] for term_id, _ in top]
+            if len(self._cache) >= 4096:
+                self._cache.clear()
+            self._cache[cache_key] = cached
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - started
+        return cached
+
+    def stats(self):
+        return {
+            "terms": len(self.terms),
+            "keys": len(self._keystrokes) + len(self._chosung),
+            "lookups": self.lookups,
+            "avg_us": round(self.lookup_seconds / self.lookups * 1e6, 1) if self.lookups else 0,
+        }
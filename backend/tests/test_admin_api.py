@@ -0,0 +1,38 @@
+import sys
+import pytest
+
+
+@pytest.fixture
+def admin_client(tmp_path, monkeypatch):
+    """TestClient for main.app (no lifespan, no providers) with ADMIN_API_TOKEN=secret."""
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("KB_DB_PATH", str(tmp_path / "kb.db"))
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    monkeypatch.delenv("VITE_SUPABASE_URL", raising=False)
+    sys.modules.pop("main", None)
+    import main
+    yield TestClient(main.app), main
+    sys.modules.pop("main", None)
+
+
+@pytest.mark.parametrize("method, path", [("post", "/api/admin/prompt/invalidate"), ("get", "/api/admin/stats")])
+def test_admin_endpoints_need_credentials(admin_client, method, path):
+    client, _ = admin_client
+    assert getattr(client, method)(path).status_code == 401
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_invalidate_accepts_an_admin_session(admin_client, monkeypatch):
+    client, main = admin_client
+    monkeypatch.setattr(main, "is_admin_session", lambda token: token == "admin-jwt")
+    path = "/api/admin/prompt/invalidate"
+    assert client.post(path, headers={"Authorization": "Bearer admin-jwt"}).status_code == 200
+    assert client.post(path, headers={"Authorization": "Bearer user-jwt"}).status_code == 401
+
+
+def test_no_token_configured_rejects_everyone(admin_client, monkeypatch):
+    client, main = admin_client
+    monkeypatch.setattr(main, "admin_api_token", "")
+    assert client.get("/api/admin/stats", headers={"X-Admin-Token": ""}).status_code == 401
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+from services.bm25 import BM25Index, bm25_terms
+from services.local_retriever import LocalRetriever, split_passages
+
+DOCS = [
+    "고혈압 환자는 소금 섭취를 줄이고 규칙적으로 운동해야 합니다.",
+    "미세먼지가 심한 날에는 외출을 자제하고 마스크를 착용하세요.",
+    "당뇨 환자는 혈당을 자주 측정하고 식단을 관리해야 합니다.",
+    "감기에 걸리면 충분히 쉬고 물을 많이 마시세요.",
+]
+
+
+def make_index():
+    index = BM25Index()
+    for doc in DOCS:
+        index.add(doc)
+    return index
+
+
+def test_terms_include_bigrams_of_longer_tokens():
+    terms = bm25_terms("미세먼지")
+    assert "미세먼지" in terms and "b:미세" in terms and "b:먼지" in terms
+
+
+def test_best_passage_first():
+    results = make_index().search("고혈압 운동")
+    assert results[0][1] == 0
+    assert [doc for _, doc in make_index().search("당뇨 혈당 관리", limit=1)] == [2]
+
+
+def test_compounds_match_their_spaced_parts_both_ways():
+    index = BM25Index()
+    index.add("미세 먼지 경보가 발령되었습니다")
+    index.add("황사 주의보")
+    index.add("혈압약 복용 시간")
+    assert index.search("미세먼지")[0][1] == 0
+    assert index.search("혈압")[0][1] == 2
+
+
+def test_keywords_weigh_more_than_body_text():
+    index = BM25Index()
+    index.add("두통이 있을 때는 휴식을 취하세요", keywords=["편두통"])
+    index.add("편두통은 한쪽 머리가 아픈 두통입니다")
+    assert index.search("편두통")[0][1] == 0
+
+
+def test_empty_index_and_unknown_words():
+    assert BM25Index().search("감기") == []
+    assert make_index().search("주식 투자") == []
+
+
+def test_split_passages_keeps_paragraphs_under_the_limit():
+    text = "\n".join(["가" * 200, "나" * 200, "다" * 200])
+    assert split_passages(text, max_chars=450) == ["가" * 200 + "\n" + "나" * 200, "다" * 200]
+
+
+def test_local_retriever_returns_relevant_facts_only(monkeypatch):
+    monkeypatch.setenv("RAG_MIN_SCORE", "1.0")  # Scores run lower on a four-fact corpus
+    facts = SimpleNamespace(entries=[
+        {"id": i, "content": doc, "keywords": kw}
+        for i, (doc, kw) in enumerate(zip(DOCS, [["고혈압"], ["미세먼지"], ["당뇨"], ["감기"]]))
+    ])
+    retriever = LocalRetriever(facts)
+    found = retriever.retrieve("고혈압 관리")
+    assert found and found[0][1] == "medical_data:0"
+    assert retriever.context_for("오늘 주식 어때") == ""
+    assert retriever.context_for("미세먼지 외출").startswith("=== TRUSTED LOCAL FACTS ===")
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import threading
+from services.circuit_breaker import CircuitBreaker, QuotaBudget
+
+
+def tripped(cooldown=0.05):
+    breaker = CircuitBreaker("tavily", failure_rate=0.5, min_calls=4, cooldown=cooldown)
+    for _ in range(4):
+        breaker.record_failure()
+    return breaker
+
+
+def test_trips_on_failure_rate_after_min_calls():
+    breaker = CircuitBreaker("tavily", failure_rate=0.5, min_calls=4)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED  # 3 calls < min_calls
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # Probe in flight
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.available()
+
+
+def test_available_does_not_reserve_the_probe():
+    breaker = tripped()
+    assert not breaker.available()
+    time.sleep(0.06)
+    assert breaker.available() and breaker.available()
+    assert breaker.allow()  # Still free for the call that is actually sent
+
+
+def test_quota_per_minute(monkeypatch):
+    monkeypatch.setenv("SERPAPI_QUOTA_PER_MINUTE", "3")
+    quota = QuotaBudget("serpapi")
+    assert [quota.try_consume() for _ in range(5)] == [True, True, True, False, False]
+    assert not quota.available() and quota.stats()["used_this_minute"] == 3
+    quota.refund()
+    assert quota.try_consume()
+
+
+def test_quota_per_day_unlimited_by_default():
+    quota = QuotaBudget("exa")
+    assert all(quota.try_consume() for _ in range(100))
+
+
+def test_quota_is_not_overspent_by_concurrent_callers(monkeypatch):
+    monkeypatch.setenv("BRAVE_QUOTA_PER_DAY", "50")
+    quota = QuotaBudget("brave")
+    granted = []
+    barrier = threading.Barrier(8)
+
+    def spend():
+        barrier.wait()
+        granted.extend(ok for ok in (quota.try_consume() for _ in range(20)) if ok)
+
+    threads = [threading.Thread(target=spend) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(granted) == 50 and quota.stats()["used_today"] == 50
+
+
+def test_run_provider_spends_budget_only_when_sending(tmp_path, monkeypatch):
+    monkeypatch.setenv("KB_DB_PATH", str(tmp_path / "kb.db"))
+    monkeypatch.setenv("TAVILY_QUOTA_PER_MINUTE", "2")
+    from services.search_manager import SearchManager
+    manager = SearchManager()
+    calls = []
+
+    async def provider(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return {"results": [{"title": "t", "url": f"https://a.test/{query}", "content": "c"}], "engine": "tavily"}
+
+    async def fan_out():
+        # All planned against the same budget; only two may actually be sent
+        assert all(manager._provider_available("tavily") for _ in range(5))
+        return await asyncio.gather(*(manager._run_provider("tavily", f"질문 {i}", provider) for i in range(5)))
+
+    results = asyncio.run(fan_out())
+    assert len(calls) == 2
+    assert sum(r is not None for r in results) == 2
@@ -0,0 +1,63 @@
+import pytest
+from services.contact_resolver import ContactIndex, ContactResolver
+
+
+class Contact:
+    def __init__(self, name, number):
+        self.name = name
+        self.number = number
+
+
+CONTACTS = [
+    Contact("엄마", "010-1111-2222"),
+    Contact("김철수", "010-3333-4444"),
+    Contact("김부장", "010-5555-6666"),
+    Contact("이영희", "010-7777-8888"),
+    Contact("Mom Work", "010-9999-0000"),
+]
+
+
+@pytest.mark.parametrize("query, name", [
+    ("엄마한테 전화해줘", "엄마"),
+    ("엄마한테전화해줘", "엄마"),
+    ("엄마전화해", "엄마"),
+    ("김부장님께 문자 보내줘", "김부장"),
+    ("김부장님께문자보내줘", "김부장"),
+    ("철수에게 전화", "김철수"),
+    ("철수에게전화", "김철수"),
+    ("momwork call", "Mom Work"),
+])
+def test_resolves_spaced_and_unspaced_queries(query, name):
+    match = ContactIndex(CONTACTS).resolve(query)
+    assert match is not None and match.name == name
+
+
+def test_number_is_normalised_and_span_covers_the_particle():
+    query = "이영희한테 문자"
+    match = ContactIndex(CONTACTS).resolve(query)
+    assert match.number == "01077778888"
+    assert query[match.start:match.end] == "이영희한테"
+
+
+def test_recipient_particle_wins_over_an_earlier_mention():
+    match = ContactIndex(CONTACTS).resolve("엄마 말고 김철수한테 전화해")
+    assert match.name == "김철수"
+
+
+def test_names_inside_other_words_are_ignored():
+    index = ContactIndex([Contact("Kim", "010")])
+    assert index.resolve("call kimchi shop") is None
+    assert ContactIndex(CONTACTS).resolve("날씨 알려줘") is None
+
+
+def test_ambiguous_given_names_are_not_aliased():
+    index = ContactIndex([Contact("김민수", "1"), Contact("박민수", "2")])
+    assert index.resolve("민수에게 전화") is None
+
+
+def test_resolver_caches_indexes_by_contact_list():
+    resolver = ContactResolver()
+    assert resolver.resolve("엄마한테 전화", CONTACTS).name == "엄마"
+    assert resolver.resolve("철수한테 문자", list(CONTACTS)).name == "김철수"
+    assert resolver.stats()["builds"] == 1 and resolver.stats()["hits"] == 1
+    assert resolver.resolve("엄마한테 전화", []) is None
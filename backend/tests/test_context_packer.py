@@ -0,0 +1,76 @@
+from services.context_packer import ContextPacker, estimate_tokens, truncate_tokens
+
+
+def web(title, content, url=None):
+    return {"title": title, "url": url or f"https://{abs(hash(title))}.test", "content": content}
+
+
+def test_truncate_tokens_respects_the_limit():
+    text = "고혈압은 혈압이 높은 상태입니다. " * 50
+    cut = truncate_tokens(text, 40)
+    assert cut.endswith("…")
+    assert estimate_tokens(cut) <= 42
+    assert truncate_tokens("짧은 문장", 40) == "짧은 문장"
+
+
+def test_web_snippets_fit_the_budget(monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "300")
+    monkeypatch.setenv("CONTEXT_SNIPPET_MAX_TOKENS", "80")
+    packer = ContextPacker()
+    results = [web(f"문서 {i}", f"고혈압 관리 내용 {i} " * 100) for i in range(10)]
+    context, _ = packer.pack("고혈압 관리", results, "tavily")
+    assert estimate_tokens(context) <= 300
+    assert 0 < packer.stats()["snippets_kept"] < 10
+
+
+def test_duplicates_are_dropped_and_relevant_snippets_come_first():
+    packer = ContextPacker()
+    results = [
+        web("날씨", "오늘은 맑고 따뜻한 날씨가 이어집니다."),
+        web("당뇨 증상", "당뇨 초기 증상으로는 갈증과 잦은 소변이 있습니다."),
+        web("당뇨 증상 (복사)", "당뇨 초기 증상으로는 갈증과 잦은 소변이 있습니다."),
+    ]
+    context, _ = packer.pack("당뇨 초기 증상", results, "google")
+    assert packer.stats()["duplicates"] == 1
+    assert context.index("당뇨 증상") < context.index("날씨")
+
+
+def test_cards_stay_first_in_order():
+    packer = ContextPacker()
+    results = [
+        {"title": "엄마에게 전화하기", "url": "tel:01012345678", "content": "엄마에게 바로 전화를 겁니다.", "card": "app"},
+        {"title": "네이버 지도: 내과", "url": "https://map.naver.com/v5/search/x", "content": "지도에서 확인하세요.", "card": "service"},
+        web("내과 추천", "근처 내과 병원 추천 목록과 진료 시간 안내입니다."),
+    ]
+    context, _ = packer.pack("근처 내과 병원", results, "hybrid_aggregation")
+    assert context.index("엄마에게 전화하기") < context.index("네이버 지도") < context.index("내과 추천")
+
+
+def test_cards_are_kept_when_history_spends_the_budget(monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "100")
+    monkeypatch.setenv("CONTEXT_HISTORY_MAX_TOKENS", "200")
+    packer = ContextPacker()
+    history = [{"role": "user", "content": "허리가 아파요 " * 200}]
+    results = [
+        {"title": "YouTube 실행", "url": "https://www.youtube.com", "content": "유튜브 앱을 실행합니다.", "card": "app"},
+        web("허리 운동", "허리 통증에 좋은 운동 " * 50),
+    ]
+    context, _ = packer.pack("허리 운동 영상", results, "hybrid_aggregation", history)
+    assert "YouTube 실행" in context
+    assert "허리 운동'" not in context
+
+
+def test_every_history_message_keeps_its_role(monkeypatch):
+    monkeypatch.setenv("CONTEXT_HISTORY_MAX_TOKENS", "120")
+    packer = ContextPacker()
+    history = [
+        {"role": "user", "content": "어제부터 열이 나요"},
+        {"role": "assistant", "content": "해열제 복용과 수분 섭취를 권장합니다. " * 80},
+        {"role": "user", "content": "병원에 가야 할까요?"},
+    ]
+    _, packed = packer.pack("병원 가야 해?", [], "mock", history)
+    lines = packed.split("\n")
+    assert [line.split(":")[0] for line in lines] == ["USER", "ASSISTANT", "USER"]
+    assert "어제부터 열이 나요" in lines[0]
+    assert "병원에 가야 할까요?" in lines[2]
+    assert estimate_tokens(packed) <= 130
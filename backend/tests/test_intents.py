@@ -0,0 +1,46 @@
+import pytest
+from services.intents import INTENTS, AhoCorasick, classify
+
+QUERIES = [
+    "고혈압 치료법 알려줘",
+    "근처 약국 어디야",
+    "엄마한테 전화해줘",
+    "카톡 열어줘",
+    "Today weather in Seoul",
+    "당뇨 식이요법 가이드라인 통계",
+    "층간소음 분쟁 손해배상",
+    "쿠팡 최저가 영양제 추천",
+    "그냥 인사",
+    "",
+]
+
+
+def naive(text):
+    """The per-stage substring checks classify() replaced."""
+    text = text.lower()
+    return {intent for intent, keywords in INTENTS.items() if any(k.lower() in text for k in keywords)}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_classify_matches_a_substring_scan(query):
+    assert set(classify(query)) == naive(query)
+
+
+def test_overlapping_keywords_are_all_reported():
+    found = classify("치료법")
+    assert "academic_clinical" in found and "medical" in found
+    assert found.matches["medical"] == ["치료"]
+    assert found.matches["academic_clinical"] == ["치료법"]
+
+
+def test_automaton_reports_every_occurrence():
+    automaton = AhoCorasick()
+    for pattern in ("he", "she", "his", "hers"):
+        automaton.add(pattern, pattern)
+    automaton.build()
+    assert [(start, value) for start, _, value in automaton.search("ushers")] == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_classify_is_cached():
+    assert classify("감기 빨리 낫는 법") is classify("감기 빨리 낫는 법")
+    assert "app_call" not in classify("감기 빨리 낫는 법")
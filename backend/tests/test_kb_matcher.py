@@ -0,0 +1,63 @@
+import numpy as np
+from services.kb_matcher import NgramMatcher
+
+CORPUS = ["감기 빨리 낫는 법", "두통이 심할 때 먹는 약", "고혈압 관리 방법", "당뇨 초기 증상", "허리 통증에 좋은 운동"]
+
+
+def test_best_match_is_the_same_question():
+    matcher = NgramMatcher()
+    matcher.add_many(CORPUS)
+    matcher.rebuild()
+    top = matcher.top_k(matcher.scores("고혈압 관리 방법"), k=3)
+    assert top[0][0] == 2 and abs(top[0][1] - 1.0) < 1e-5
+
+
+def test_particles_and_conjugation_still_match():
+    matcher = NgramMatcher()
+    matcher.add_many(CORPUS)
+    matcher.rebuild()
+    assert matcher.top_k(matcher.scores("허리가 통증이 있어요"), k=1)[0][0] == 4
+
+
+def test_pending_rows_are_scored_like_cosine_similarity():
+    matcher = NgramMatcher(min_rebuild=100)
+    matcher.add_many(CORPUS)
+    matcher.rebuild()
+    matcher.add("목이 아프고 기침이 나요")
+    assert matcher.stats()["pending_rows"] == 1
+
+    scores = matcher.scores("목이 아프고 기침이 나요")
+    assert len(scores) == len(CORPUS) + 1
+    assert abs(scores[-1] - 1.0) < 1e-5
+    assert matcher.top_k(scores, k=1)[0][0] == len(CORPUS)
+
+
+def test_pending_block_matches_a_rebuild_with_the_same_idf():
+    matcher = NgramMatcher(min_rebuild=100)
+    matcher.add_many(CORPUS)
+    matcher.rebuild()
+    matcher.add_many(["감기 증상 관리", "두통 약 추천"])
+    pending_scores = matcher.scores("감기 두통")
+
+    # Pending rows use the idf of the last build; the ranking matches a full rebuild
+    rebuilt = NgramMatcher()
+    rebuilt.add_many(CORPUS + ["감기 증상 관리", "두통 약 추천"])
+    rebuilt.rebuild()
+    assert np.argmax(pending_scores) == np.argmax(rebuilt.scores("감기 두통"))
+
+
+def test_pending_is_capped_whatever_the_corpus_size():
+    matcher = NgramMatcher(rebuild_ratio=0.5, min_rebuild=2, max_pending=8)
+    matcher.add_many([f"질문 {i} 번째" for i in range(100)])
+    assert matcher.stats()["pending_rows"] == 0
+    matcher.add_many([f"추가 {i}" for i in range(7)])
+    assert matcher.stats()["pending_rows"] == 7  # 10% of 100 would allow 50
+    matcher.add("추가 마지막")
+    assert matcher.stats()["pending_rows"] == 0 and matcher.stats()["rebuilds"] == 2
+
+
+def test_unknown_text_scores_zero():
+    matcher = NgramMatcher()
+    matcher.add_many(CORPUS)
+    assert not matcher.scores("xyz").any()
+    assert NgramMatcher.top_k(matcher.scores("xyz")) == []
@@ -0,0 +1,77 @@
+import json
+import pytest
+from services.kb_store import KnowledgeStore, open_store, migrate_json
+
+
+def entry(query, answer="답변"):
+    return {"id": query, "query": query, "answer": answer, "created_at": "2026-01-01T00:00:00"}
+
+
+def blocked_path(tmp_path):
+    """A db path whose parent is a regular file, so it can never be created."""
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    return str(blocker / "kb.db")
+
+
+def test_duplicate_queries_are_ignored(tmp_path):
+    store = KnowledgeStore(str(tmp_path / "kb.db"))
+    assert store.insert(entry("감기 증상"))
+    assert not store.insert(entry("감기 증상", "다른 답변"))
+    assert store.insert_many([entry("감기 증상"), entry("독감 증상"), entry("독감 증상")]) == 1
+    assert store.count() == 2
+    assert store.get("감기 증상")["answer"] == "답변"
+
+
+def test_load_since_returns_only_new_rows(tmp_path):
+    path = str(tmp_path / "kb.db")
+    writer, reader = KnowledgeStore(path), KnowledgeStore(path)
+    writer.insert_many([entry("a"), entry("b")])
+    rows = reader.load_since(0)
+    assert [e["query"] for _, e in rows] == ["a", "b"]
+
+    writer.insert(entry("c"))
+    newer = reader.load_since(rows[-1][0])
+    assert [e["query"] for _, e in newer] == ["c"]
+    assert reader.load_since(reader.last_seq()) == []
+
+
+def test_migrate_json_fills_legacy_fields_and_first_file_wins(tmp_path):
+    main_file, backup_file = tmp_path / "kb.json", tmp_path / "kb_backup.json"
+    main_file.write_text(json.dumps([{"query": "두통", "answer": "새 답변", "timestamp": "2025-03-01"}]), encoding="utf-8")
+    backup_file.write_text(json.dumps([{"query": "두통", "answer": "옛 답변"}, {"query": "복통"}, {"answer": "query 없음"}]), encoding="utf-8")
+    store = KnowledgeStore(str(tmp_path / "kb.db"))
+
+    assert migrate_json(store, [str(main_file), str(backup_file), str(tmp_path / "missing.json")]) == 2
+    migrated = store.get("두통")
+    assert migrated["answer"] == "새 답변"
+    assert migrated["created_at"] == "2025-03-01T00:00:00"
+    assert migrated["sources"] == [] and migrated["category"] == "general"
+    assert migrate_json(store, [str(main_file), str(backup_file)]) == 0
+
+
+def test_open_store_uses_the_next_writable_path(tmp_path):
+    fallback = str(tmp_path / "tmp" / "kb.db")
+    store = open_store([blocked_path(tmp_path), fallback])
+    assert store.path == fallback and not store.in_memory
+
+
+def test_open_store_falls_back_to_memory_loudly(tmp_path, capsys):
+    store = open_store([blocked_path(tmp_path)])
+    assert store.in_memory
+    assert "❌" in capsys.readouterr().out
+    assert store.insert(entry("기억")) and store.exists("기억")
+
+
+def test_open_store_can_require_a_persistent_location(tmp_path):
+    with pytest.raises(RuntimeError):
+        open_store([blocked_path(tmp_path)], require_persistent=True)
+
+
+def test_knowledge_base_stats_report_the_store(tmp_path, monkeypatch):
+    from services.knowledge_base import KnowledgeBase
+    monkeypatch.setenv("KB_DB_PATH", blocked_path(tmp_path))
+    monkeypatch.setattr("tempfile.gettempdir", lambda: blocked_path(tmp_path))
+    kb = KnowledgeBase(data_file=str(tmp_path / "none.json"), backup_file=str(tmp_path / "none_backup.json"))
+    assert kb.stats()["store"]["in_memory"] is True
+    assert kb.stats()["store"]["fallback"] is True
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import subprocess
+import pytest
+from services.kdca_aggregator import KdcaAggregator, DEFAULT_FEEDS
+
+STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "kdca_stub_server.py")
+ROWS = 250
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Starts scripts/kdca_stub_server.py with the given flags; returns its base URL."""
+    procs = []
+
+    def start(*flags):
+        port = _free_port()
+        proc = subprocess.Popen([sys.executable, STUB, "--port", str(port), "--latency", "0", "--rows", str(ROWS), *flags],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        procs.append(proc)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError("KDCA stub did not start")
+                time.sleep(0.05)
+        monkeypatch.setenv("KDCA_BASE_URL", f"http://127.0.0.1:{port}")
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for proc in procs:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+def fetch(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    aggregator = KdcaAggregator("test-key")
+    return asyncio.run(aggregator.fetch_all()), aggregator.feed_stats
+
+
+def assert_table(table, rows_per_feed):
+    by_feed = {}
+    for row in table:
+        by_feed.setdefault(row["feed"], []).append(row)
+        assert set(row) >= {"id", "feed", "kind", "date", "url", "disease", "level", "level_color", "message"}
+    assert {feed: len(rows) for feed, rows in by_feed.items()} == {feed["name"]: rows_per_feed for feed in DEFAULT_FEEDS}
+    assert len({row["id"] for row in table}) == len(table)
+    assert [row["date"] for row in table] == sorted((row["date"] for row in table), reverse=True)
+
+
+def test_xml_and_json_pages(stub, monkeypatch):
+    # auto: the covid feed asks for JSON, the other feeds get the portal's default XML
+    stub("--format", "auto")
+    table, stats = fetch(monkeypatch, KDCA_PAGE_SIZE="100")
+    assert_table(table, ROWS)
+    assert all(s["ok"] and s["rows"] == ROWS for s in stats.values())
+
+    covid = next(row for row in table if row["feed"] == "covid")
+    assert covid["disease"] == "코로나19 (COVID-19)" and covid["message"].startswith("일일 확진자")
+    notice = next(row for row in table if row["kind"] == "notice")
+    assert notice["message"].startswith("감염병 예방 수칙") and notice["url"].startswith("https://www.kdca.go.kr/")
+    disease = next(row for row in table if row["feed"] == "infectious_disease")
+    assert disease["message"].startswith("신고 환자") and disease["date"][4] == "-"
+
+
+def test_xml_only(stub, monkeypatch):
+    stub("--format", "xml")
+    table, _ = fetch(monkeypatch, KDCA_PAGE_SIZE="100")
+    assert_table(table, ROWS)
+
+
+def test_json_only(stub, monkeypatch):
+    stub("--format", "json")
+    table, _ = fetch(monkeypatch, KDCA_PAGE_SIZE="100")
+    assert_table(table, ROWS)
+
+
+def test_paging_is_capped(stub, monkeypatch):
+    stub()
+    table, _ = fetch(monkeypatch, KDCA_PAGE_SIZE="50", KDCA_MAX_PAGES="2")
+    assert_table(table, 100)
+
+
+def test_auth_error_leaves_feeds_out(stub, monkeypatch):
+    stub("--auth-error")
+    table, stats = fetch(monkeypatch)
+    assert table == []
+    assert set(stats) == {feed["name"] for feed in DEFAULT_FEEDS}
+    assert all(not s["ok"] and "SERVICE_KEY_IS_NOT_REGISTERED_ERROR" in s["error"] for s in stats.values())
@@ -0,0 +1,67 @@
+import pytest
+from services.knowledge_base import KnowledgeBase
+from services.kb_index import KeywordIndex
+
+
+@pytest.fixture
+def kb_path(tmp_path, monkeypatch):
+    path = tmp_path / "kb.db"
+    monkeypatch.setenv("KB_DB_PATH", str(path))
+    return path
+
+
+def make_kb():
+    # No legacy JSON: the store starts empty
+    return KnowledgeBase(data_file="data/missing.json", backup_file="data/missing_backup.json")
+
+
+def save(kb, query, answer="답변"):
+    kb.save_interaction(query, {"answer": answer, "sources": [{"title": "t", "url": "https://a.test", "content": "c"}], "images": []})
+
+
+def test_exact_keyword_and_no_match(kb_path):
+    kb = make_kb()
+    save(kb, "고혈압 관리 방법")
+    save(kb, "당뇨 초기 증상")
+    assert kb.find_match("고혈압 관리 방법")["query"] == "고혈압 관리 방법"
+    assert kb.find_match("고혈압을 관리하는 방법이 궁금해요")["query"] == "고혈압 관리 방법"
+    assert kb.find_match("주말 영화 추천") is None
+
+
+def test_other_workers_entries_are_synced(kb_path):
+    first, second = make_kb(), make_kb()
+    save(first, "감기 빨리 낫는 법")
+    assert second.find_match("감기 빨리 낫는 법")["query"] == "감기 빨리 낫는 법"
+    assert len(second.data) == len(second.matcher) == 1
+
+
+def test_failed_sync_is_retried_without_losing_alignment(kb_path, monkeypatch):
+    kb = make_kb()
+    save(kb, "허리 통증에 좋은 운동")
+    other = make_kb()
+    save(other, "두통이 심할 때 먹는 약")
+
+    original = kb.matcher.add_many
+    def fail_once(texts):
+        monkeypatch.setattr(kb.matcher, "add_many", original)
+        original(texts[:1])  # Partly applied, then fails
+        raise RuntimeError("matcher failure")
+    monkeypatch.setattr(kb.matcher, "add_many", fail_once)
+
+    kb._load_data()
+    assert [e["query"] for e in kb.data] == ["허리 통증에 좋은 운동"]
+    assert len(kb.matcher) == len(kb.data)
+
+    kb._load_data()
+    assert [e["query"] for e in kb.data] == ["허리 통증에 좋은 운동", "두통이 심할 때 먹는 약"]
+    assert len(kb.matcher) == len(kb.data)
+    assert kb.find_similar("두통이 심할 때 먹는 약", 0.9)[0]["query"] == "두통이 심할 때 먹는 약"
+
+
+def test_index_candidates_rank_keyword_overlap_first():
+    index = KeywordIndex()
+    index.add(0, "감기 증상", ["감기", "증상"])
+    index.add(1, "감기 예방 증상", ["감기", "예방", "증상"])
+    index.add(2, "두통", ["두통"])
+    assert index.candidates({"감기", "예방"}, fuzzy_candidates=[2]) == [1, 0, 2]
+    assert index.lookup_exact("두통") == 2
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import pytest
+from services.provider_scheduler import ProviderScheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """Deadlines scaled down to tenths of a second."""
+    monkeypatch.setenv("SEARCH_FIXED_WAVE_SECONDS", "0.2")
+    monkeypatch.setenv("SEARCH_MIN_DEADLINE", "0.05")
+    monkeypatch.setenv("SEARCH_MAX_DEADLINE", "0.4")
+    scheduler = ProviderScheduler()
+    scheduler.check_interval = 0.02
+    return scheduler
+
+
+def provider(name, delay, n_results=5):
+    async def run():
+        await asyncio.sleep(delay)
+        return {"engine": name, "results": [{"url": f"https://{name}.test/{i}"} for i in range(n_results)]}
+    return run
+
+
+def warm_up(scheduler, name, latency, n_results=5, timed_out=False):
+    for _ in range(scheduler.min_samples):
+        scheduler.record(name, latency, n_results, timed_out)
+
+
+def timed_run(scheduler, providers, backups=None):
+    async def go():
+        started = time.monotonic()
+        collected = await scheduler.run(providers, backups)
+        return collected, time.monotonic() - started
+    return asyncio.run(go())
+
+
+def test_soft_deadline_from_rolling_p90(scheduler):
+    assert scheduler.soft_deadline(["tavily"]) == 0.2  # Cold start: the fixed first wave
+    warm_up(scheduler, "tavily", 0.1)
+    assert scheduler.soft_deadline(["tavily"]) == pytest.approx(0.125)
+    warm_up(scheduler, "exa", 10.0)
+    assert scheduler.soft_deadline(["tavily", "exa"]) == 0.4  # Capped at the max deadline
+
+
+def test_early_exit_once_enough_results_arrived(scheduler):
+    warm_up(scheduler, "fast", 0.01)
+    warm_up(scheduler, "slow", 0.3, n_results=1)
+    collected, elapsed = timed_run(scheduler, {"fast": provider("fast", 0.01), "slow": provider("slow", 0.3)})
+    assert [r["engine"] for r in collected] == ["fast"]
+    assert elapsed < 0.2
+
+
+def test_thin_results_wait_until_the_hard_deadline(scheduler):
+    timeouts = []
+    scheduler.on_timeout = timeouts.append
+
+    async def go():
+        started = time.monotonic()
+        collected = await scheduler.run({"thin": provider("thin", 0.01, 1), "stuck": provider("stuck", 5.0)})
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0.1)  # Let the straggler drain record its timeout
+        return collected, elapsed
+
+    collected, elapsed = asyncio.run(go())
+    assert [r["engine"] for r in collected] == ["thin"]
+    assert 0.35 <= elapsed < 0.6
+    assert timeouts == ["stuck"]
+
+
+def test_backups_are_hedged_in_when_primaries_are_thin(scheduler):
+    collected, elapsed = timed_run(scheduler, {"tavily": provider("tavily", 0.01, 0)}, {"brave": provider("brave", 0.01)})
+    assert [r["engine"] for r in collected] == ["brave"]
+    assert elapsed < 0.2
+
+
+def test_chronically_slow_providers_are_skipped_with_probes(scheduler):
+    warm_up(scheduler, "slow", 1.0, n_results=0, timed_out=True)
+    started = []
+
+    async def slow():
+        started.append(1)
+        return None
+
+    for _ in range(scheduler.probe_every):
+        timed_run(scheduler, {"slow": slow, "fast": provider("fast", 0.01)})
+    assert len(started) == 1
+    assert scheduler.stats_for("slow").skipped == scheduler.probe_every - 1
+
+
+def test_fixed_mode_extends_the_wave_only_when_thin(scheduler):
+    scheduler.mode = "fixed"
+    collected, elapsed = timed_run(scheduler, {"fast": provider("fast", 0.01), "late": provider("late", 0.3)})
+    assert [r["engine"] for r in collected] == ["fast"] and elapsed < 0.3
+
+    collected, elapsed = timed_run(scheduler, {"thin": provider("thin", 0.01, 1), "late": provider("late", 0.3)})
+    assert sorted(r["engine"] for r in collected) == ["late", "thin"] and elapsed >= 0.3
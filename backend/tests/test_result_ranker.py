@@ -0,0 +1,51 @@
+from services.result_ranker import ResultRanker, canonical_url, simhashes
+
+
+def result(url, title, content):
+    return {"url": url, "title": title, "content": content}
+
+
+def test_canonical_url_collapses_variants():
+    assert canonical_url("https://m.health.chosun.com/a/?utm_source=x&fbclid=1#top") == "health.chosun.com/a"
+    assert canonical_url("http://www.health.chosun.com/a") == "health.chosun.com/a"
+    assert canonical_url("https://site.test/p?b=2&a=1") == canonical_url("https://site.test/p?a=1&b=2")
+    assert canonical_url("tel:01012345678") == "tel:01012345678"
+
+
+def test_simhash_is_close_for_near_duplicates():
+    base = "고혈압 환자는 싱겁게 먹고 규칙적으로 운동하며 체중을 관리하는 것이 좋습니다 매일 혈압을 측정하세요"
+    (a, b, c), counts = simhashes([base, base + " 출처", "미세먼지가 심한 날에는 외출을 줄이고 마스크를 착용하세요 실내 환기는 짧게 하세요"])
+    assert (a ^ b).bit_count() < (a ^ c).bit_count()
+    assert simhashes([""]) == ([0], [0])
+
+
+def test_url_variants_are_merged_and_count_as_agreement():
+    ranker = ResultRanker()
+    items = [
+        result("https://blog.test/x", "다른 글", "관련 없는 이야기입니다"),
+        result("https://news.test/a?utm_source=tavily", "당뇨 식단", "당뇨 환자 식단 관리 방법"),
+        result("https://m.news.test/a/", "당뇨 식단", "당뇨 환자 식단 관리 방법"),
+    ]
+    ranked = ranker.rank("당뇨 식단", items, [0, 0, 1])
+    assert len(ranked) == 2
+    assert ranked[0]["url"] == "https://news.test/a?utm_source=tavily"
+    assert ranker.stats()["url_duplicates"] == 1
+
+
+def test_near_duplicate_snippets_are_dropped():
+    ranker = ResultRanker()
+    text = "독감 예방접종은 매년 10월에서 11월 사이에 맞는 것이 좋으며 고위험군은 특히 서둘러야 합니다 접종 후 2주가 지나야 효과가 나타납니다"
+    items = [
+        result("https://a.test/1", "독감 예방접종 시기", text),
+        result("https://b.test/2", "독감 예방접종 시기", text),  # Syndicated copy on another site
+        result("https://c.test/3", "허리 운동", "허리 통증에 좋은 스트레칭 동작 다섯 가지를 소개합니다 매일 꾸준히 하세요 무리하지 마세요"),
+    ]
+    ranked = ranker.rank("독감 예방접종", items)
+    assert [r["url"] for r in ranked] == ["https://a.test/1", "https://c.test/3"]
+    assert ranker.stats()["near_duplicates"] == 1
+
+
+def test_short_snippets_only_match_exactly():
+    ranker = ResultRanker()
+    items = [result("https://a.test/1", "감기", "감기 증상"), result("https://b.test/2", "감기", "감기 치료")]
+    assert len(ranker.rank("감기", items)) == 2
@@ -0,0 +1,37 @@
+import asyncio
+
+
+def make_manager(tmp_path, monkeypatch, deadline):
+    monkeypatch.setenv("KB_DB_PATH", str(tmp_path / "kb.db"))
+    monkeypatch.setenv("ACADEMIC_DEADLINE_SECONDS", str(deadline))
+    from services.search_manager import SearchManager
+    return SearchManager()
+
+
+def test_missed_deadline_falls_back_to_mock_papers(tmp_path, monkeypatch):
+    from services.search_manager import mock_academic_papers
+    manager = make_manager(tmp_path, monkeypatch, 0.05)
+
+    async def slow(query):
+        await asyncio.sleep(1)
+        return [{"title": "late", "link": "https://late.test/a.pdf"}]
+
+    monkeypatch.setattr(manager, "_search_academic", slow)
+    papers = asyncio.run(manager.search_academic("당뇨 진료지침"))
+    assert papers == mock_academic_papers()
+
+
+def test_answer_within_deadline_is_returned_and_cached(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch, 1.0)
+    calls = []
+
+    async def fast(query):
+        calls.append(query)
+        papers = [{"title": "found", "link": "https://found.test/a.pdf"}]
+        manager.result_cache.set(manager._cache_key("academic", query), papers, manager.cache_ttl["academic"])
+        return papers
+
+    monkeypatch.setattr(manager, "_search_academic", fast)
+    assert asyncio.run(manager.search_academic("고혈압 논문"))[0]["title"] == "found"
+    assert asyncio.run(manager.search_academic("고혈압 논문"))[0]["title"] == "found"
+    assert calls == ["고혈압 논문"]
@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+from loadtest import backend_env, free_port  # noqa: E402
+
+# Every stand-in answers in ~10 ms
+FAST = [arg for name in ("tavily", "serpapi", "exa", "brave", "gemini", "supabase", "suggest") for arg in ("--profile", f"{name}=0.01:0:0")]
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """TestClient for main.app with every provider pointed at scripts/fake_providers.py."""
+    from fastapi.testclient import TestClient
+
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "scripts", "fake_providers.py"), "--port", str(port),
+                             "--gemini-chunks", "3", "--gemini-chunk-interval", "0", *FAST],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                raise RuntimeError("fake providers did not start")
+            time.sleep(0.05)
+
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in backend_env(f"http://127.0.0.1:{port}", str(tmp_path_factory.mktemp("backend"))).items():
+            mp.setenv(name, value)
+        sys.modules.pop("main", None)
+        import main
+        with TestClient(main.app) as test_client:
+            yield test_client, main
+    proc.terminate()
+    proc.wait(timeout=5)
+
+
+def stream_search(test_client, **body):
+    with test_client.stream("POST", "/api/search", json=body) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_search_without_thread_is_learned(client):
+    test_client, main = client
+    query = "고혈압 관리 방법 회귀 테스트"
+    events = stream_search(test_client, query=query)
+
+    kinds = [event["type"] for event in events]
+    assert "error" not in kinds, events[-1]
+    assert kinds[0] == "meta" and kinds[-1] == "done" and "content" in kinds
+    assert main.search_manager.knowledge_base.store.exists(query)
+
+
+def test_search_with_thread_history_is_not_learned(client):
+    test_client, main = client
+    query = "고혈압 관리 방법 개인 대화"
+    events = stream_search(test_client, query=query, thread_id="thread-1")
+
+    assert "error" not in [event["type"] for event in events]
+    assert not main.search_manager.knowledge_base.store.exists(query)
@@ -0,0 +1,56 @@
+from services.typeahead import TypeaheadIndex
+
+TERMS = ["당뇨 초기 증상", "당뇨 식단", "독감 예방 접종", "두통 원인", "고혈압 관리"]
+
+
+def make_index():
+    index = TypeaheadIndex()
+    index.add_many(TERMS)
+    return index
+
+
+def test_prefix_and_intermediate_ime_states():
+    index = make_index()
+    assert set(index.complete("당뇨")) == {"당뇨 초기 증상", "당뇨 식단"}
+    assert set(index.complete("당ㄴ")) == {"당뇨 초기 증상", "당뇨 식단"}
+    assert "두통 원인" in index.complete("두")
+    assert index.complete("당뇨 식") == ["당뇨 식단"]
+    assert index.complete("없는말") == []
+    assert index.complete("  ") == []
+
+
+def test_chosung_queries():
+    index = make_index()
+    assert set(index.complete("ㄷㄴ")) == {"당뇨 초기 증상", "당뇨 식단"}
+    assert index.complete("ㄱㅎㅇ") == ["고혈압 관리"]
+
+
+def test_later_words_match_but_rank_below_term_starts():
+    index = make_index()
+    index.add("접종 후 발열")
+    assert index.complete("접종") == ["접종 후 발열", "독감 예방 접종"]
+
+
+def test_popularity_orders_results_and_refreshes_the_cache():
+    index = make_index()
+    assert index.complete("당뇨", limit=1) == ["당뇨 식단"]  # Shorter first on equal popularity
+    index.record("당뇨 초기 증상?")
+    assert index.complete("당뇨", limit=1) == ["당뇨 초기 증상"]
+    index.record("처음 보는 질문")
+    assert len(index) == len(TERMS)
+
+
+def test_adding_a_term_invalidates_cached_prefixes():
+    index = make_index()
+    assert index.complete("고") == ["고혈압 관리"]
+    index.add("고지혈증 약", weight=5)
+    assert index.complete("고") == ["고지혈증 약", "고혈압 관리"]
+    index.add_many(["고혈압 약"], weight=10)
+    assert index.complete("고")[0] == "고혈압 약"
+
+
+def test_duplicates_only_add_popularity():
+    index = TypeaheadIndex()
+    index.add_many(["감기 증상", "감기 증상 ", "감기  증상?"])
+    assert len(index) == 1
+    assert index.stats()["keys"] == 4
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { supabase } from '../../lib/supabaseClient'; // Ensure correct path
+import { API_BASE_URL } from '../../lib/api_config';
 import { Save, RotateCcw, Play, CheckCircle, AlertCircle } from 'lucide-react';
 
 const PromptEditor = () => {
@@ -52,6 +53,17 @@ const PromptEditor = () => {
 
             if (error) throw error;
 
+            // Tell the backend to reload its cached prompt (non-fatal: it also refreshes on its own)
+            try {
+                const { data: { session } } = await supabase.auth.getSession();
+                await fetch(`${API_BASE_URL}/api/admin/prompt/invalidate`, {
+                    method: 'POST',
+                    headers: { Authorization: `Bearer ${session?.access_token}` }
+                });
+            } catch (e) {
+                console.warn("Prompt cache invalidation failed (Non-fatal):", e);
+            }
+
             setStatus({ type: 'success', message: '프롬프트가 성공적으로 저장되었습니다! 다음 대화부터 적용됩니다.' });
 
             // Re-fetch to confirm and update metadata if any
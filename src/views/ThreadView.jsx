@@ -89,6 +89,7 @@ const ThreadView = ({ initialQuery, onSearch, activeSection = 'answer', setActiv
             setAnswer('');
             setSources([]);
             setImages([]);
+            setAcademic([]);
             setRelated([]);
             setDisclaimer('');
 
@@ -99,7 +100,8 @@ const ThreadView = ({ initialQuery, onSearch, activeSection = 'answer', setActiv
                     body: JSON.stringify({
                         query: initialQuery,
                         thread_id: threadId, // Pass threadId for context history
-                        contacts: contacts || [] // Pass contacts for Speed Dial
+                        contacts: contacts || [], // Pass contacts for Speed Dial
+                        progressive: true // Sources stream in as each search engine answers
                     }),
                     signal: controller.signal
                 });
@@ -130,12 +132,27 @@ const ThreadView = ({ initialQuery, onSearch, activeSection = 'answer', setActiv
                             // Stop loading on first valid data packet
                             if (loading) setLoading(false);
 
-                            if (event.type === 'meta') {
+                            if (event.type === 'sources') {
+                                // Progressive: append each engine's new sources as they arrive
+                                setSources(prev => {
+                                    const seen = new Set(prev.map(s => s.url));
+                                    return [...prev, ...(event.sources || []).filter(s => !seen.has(s.url))];
+                                });
+                                if (event.images?.length) setImages(prev => [...prev, ...event.images]);
+                            }
+                            else if (event.type === 'academic') {
+                                setAcademic(event.academic || []);
+                            }
+                            else if (event.type === 'meta') {
                                 setSources(event.sources || []);
                                 setImages(event.images || []);
                                 setAcademic(event.academic || []);
                                 if (event.disclaimer) setDisclaimer(event.disclaimer);
                             }
+                            else if (event.type === 'reset') {
+                                // Server discarded an early draft answer (late sources arrived)
+                                setAnswer('');
+                            }
                             else if (event.type === 'content') {
                                 setAnswer(prev => prev + (event.delta || ""));
                             }